@@ -5,7 +5,8 @@ Main web UI for ingesting and deleting LOTR data.
 Two-step flow: Fetch from API → Preview → Send to Data Cloud
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+import json
 import logging
 import os
 import sys
@@ -35,9 +36,16 @@ except Exception as e:
     sys.exit(1)
 
 # Import pipeline modules
-from ingestion import ingest_characters, ingest_quotes
+from character_index import SORT_FIELDS, get_character_index, project_character
+from ingestion import ingest_characters, ingest_quotes, replay_dead_letters
+from dead_letters import get_dead_letter_store
 from deletion import delete_lotr_data
-from lotr_client import fetch_all_data
+from encoded_responses import available_encodings, get_encoded_body
+from error_journal import get_error_journal
+from jobs import JobQueueFull, get_job_manager
+from lotr_client import LOTRClient, fetch_all_data, quotes_for_characters
+from snapshots import get_snapshot_registry, select_characters
+from transport import get_transport
 
 # Create Flask app
 app = Flask(__name__)
@@ -45,6 +53,9 @@ app = Flask(__name__)
 # Constants
 MAX_CHARACTERS = 10000
 MAX_REQUEST_SIZE = 50 * 1024 * 1024  # 50MB max request size
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+SSE_HEARTBEAT_SECONDS = 15  # keeps idle event streams open through proxies
 
 
 def sanitize_error_message(error, is_debug=False):
@@ -64,17 +75,140 @@ def sanitize_error_message(error, is_debug=False):
             return "An internal error occurred. Please try again later."
 
 
+def get_request_characters():
+    """
+    Get the characters an ingest request refers to: a snapshotId from /fetch
+    (plus optional characterIds), or a characters array from older clients.
+    
+    Returns:
+        Tuple of (characters, snapshot, error_response). snapshot is the
+        registered dataset (None for a characters array); error_response is
+        set instead when the request can't be served.
+    """
+    payload = request.json
+    if not isinstance(payload, dict):
+        # e.g. a bare array: answered like a body without characters
+        payload = {}
+    
+    if payload.get('snapshotId'):
+        snapshot = get_snapshot_registry().get(payload['snapshotId'])
+        if snapshot is None:
+            return None, None, (jsonify({
+                'status': 'error',
+                'error': 'Snapshot expired. Fetch again!',
+                'logs': ['🔥 This data is no longer held by the server. Click "Fetch LOTR Data" again.']
+            }), 410)
+        
+        character_ids = payload.get('characterIds')
+        if character_ids is not None and (
+                not isinstance(character_ids, list) or not all(isinstance(i, str) for i in character_ids)):
+            return None, None, (jsonify({
+                'status': 'error',
+                'error': 'characterIds must be an array of strings',
+                'logs': ['🔥 Invalid data format']
+            }), 400)
+        
+        characters, missing = select_characters(snapshot, character_ids)
+        if character_ids is None:
+            # Same characters /fetch returned for this snapshot
+            characters = characters[:MAX_CHARACTERS]
+        if missing:
+            logger.warning(f"{len(missing)} selected characters are not in snapshot {payload['snapshotId']}")
+        return characters, snapshot, None
+    
+    if 'characters' not in payload:
+        return None, None, (jsonify({
+            'status': 'error',
+            'error': 'No character data provided. Fetch first!',
+            'logs': ['🔥 No data to ingest. Click "Fetch LOTR Data" first.']
+        }), 400)
+    
+    characters = payload['characters']
+    
+    # Validate characters array
+    if not isinstance(characters, list):
+        return None, None, (jsonify({
+            'status': 'error',
+            'error': 'Characters must be an array',
+            'logs': ['🔥 Invalid data format']
+        }), 400)
+    
+    return characters, None, None
+
+
+def submit_job(kind, fn, *args, started_log):
+    """
+    Run a pipeline as a background job.
+    
+    Returns:
+        202 response with the job ID, or 503 if the job queue is full
+    """
+    try:
+        job = get_job_manager().submit(kind, fn, *args)
+    except JobQueueFull as e:
+        logger.warning(f"Refusing {kind} job: {e}")
+        response = jsonify({
+            'status': 'error',
+            'error': 'Too many jobs in progress. Try again shortly.',
+            'logs': ['⏳ The riders are all abroad. Try again shortly.']
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    return jsonify({
+        'status': 'accepted',
+        'jobId': job.id,
+        'logs': [started_log]
+    }), 202
+
+
+def fetch_payload(data, snapshot_id):
+    """Build the /fetch response body for a dataset"""
+    # The dataset is shared in-process, so limit a copy rather than the original
+    characters = data['characters']
+    if len(characters) > MAX_CHARACTERS:
+        logger.warning(f"Received {len(characters)} characters, limiting to {MAX_CHARACTERS}")
+        characters = characters[:MAX_CHARACTERS]
+    
+    logs = [
+        "🌍 The journey through Middle-earth commences...",
+        f"📚 Gathered {data['stats']['characterCount']} characters",
+        f"💬 Collected {data['stats']['quoteCount']} quotes",
+        f"🎬 Found {data['stats']['movieCount']} movies",
+        f"✨ {data['stats']['charactersWithQuotes']} characters have spoken in the films!"
+    ]
+    
+    return {
+        'status': 'success',
+        'snapshotId': snapshot_id,
+        'characters': characters,
+        'movies': data['movies'],
+        'stats': data['stats'],
+        'logs': logs
+    }
+
+
+def get_fetch_body(data):
+    """Register a dataset as a snapshot and get its pre-encoded /fetch body"""
+    snapshot_id = get_snapshot_registry().register(data)
+    return get_encoded_body(snapshot_id, lambda: fetch_payload(data, snapshot_id))
+
+
 @app.route('/')
 def index():
     """Serve the main UI"""
     return render_template('index.html')
 
 
-@app.route('/fetch', methods=['POST'])
+@app.route('/fetch', methods=['GET', 'POST'])
 def fetch():
     """
     Step 1: Fetch all data from The One API.
     Returns characters, quotes, and movies for preview.
+    
+    The body is encoded once per snapshot and served gzip/br-compressed when
+    the client accepts it. GET requests are revalidated with a strong ETag
+    and answered with 304 while the snapshot is unchanged.
     """
     try:
         logger.info("📜 Fetch endpoint called - getting all data from The One API")
@@ -88,7 +222,7 @@ def fetch():
             }), 413
         
         force_refresh = False
-        if request.is_json:
+        if request.method == 'POST' and request.is_json:
             force_refresh = request.json.get('force_refresh', False)
         
         # Fetch all data (characters, quotes, movies)
@@ -98,25 +232,23 @@ def fetch():
         if not isinstance(data, dict) or 'characters' not in data:
             raise ValueError("Invalid data structure returned from API")
         
-        if len(data['characters']) > MAX_CHARACTERS:
-            logger.warning(f"Received {len(data['characters'])} characters, limiting to {MAX_CHARACTERS}")
-            data['characters'] = data['characters'][:MAX_CHARACTERS]
+        # Later ingest calls refer to this exact dataset by ID
+        body = get_fetch_body(data)
+        encoding = request.accept_encodings.best_match(available_encodings(), default='identity')
+        etag = body.etag(encoding)
         
-        logs = [
-            "🌍 The journey through Middle-earth commences...",
-            f"📚 Gathered {data['stats']['characterCount']} characters",
-            f"💬 Collected {data['stats']['quoteCount']} quotes",
-            f"🎬 Found {data['stats']['movieCount']} movies",
-            f"✨ {data['stats']['charactersWithQuotes']} characters have spoken in the films!"
-        ]
+        if request.method in ('GET', 'HEAD') and request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body.body(encoding), mimetype='application/json')
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
         
-        return jsonify({
-            'status': 'success',
-            'characters': data['characters'],
-            'movies': data['movies'],
-            'stats': data['stats'],
-            'logs': logs
-        })
+        response.set_etag(etag)
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Browsers may keep the body but must revalidate it (cheap 304s)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     except ValueError as e:
         logger.error(f"Validation error in fetch: {e}")
@@ -139,7 +271,10 @@ def fetch():
 def ingest():
     """
     Step 2: Send pre-fetched characters to Data Cloud.
-    Expects characters array in request body.
+    Runs as a background job; poll GET /jobs/<jobId> for progress and the result.
+    Expects a snapshotId from /fetch (optionally with characterIds), or a
+    characters array, in the request body. With "delta": true only characters
+    that are new or changed since they were last ingested are sent.
     """
     try:
         logger.info("🌋 Ingest endpoint called - sending to Data Cloud")
@@ -160,22 +295,9 @@ def ingest():
                 'logs': ['🔥 Invalid request format']
             }), 400
         
-        if 'characters' not in request.json:
-            return jsonify({
-                'status': 'error',
-                'error': 'No character data provided. Fetch first!',
-                'logs': ['🔥 No data to ingest. Click "Fetch LOTR Data" first.']
-            }), 400
-        
-        characters = request.json['characters']
-        
-        # Validate characters array
-        if not isinstance(characters, list):
-            return jsonify({
-                'status': 'error',
-                'error': 'Characters must be an array',
-                'logs': ['🔥 Invalid data format']
-            }), 400
+        characters, _, error_response = get_request_characters()
+        if error_response:
+            return error_response
         
         if len(characters) > MAX_CHARACTERS:
             return jsonify({
@@ -191,10 +313,18 @@ def ingest():
                 'logs': ['🔥 Character list is empty']
             }), 400
         
-        # Run ingestion with pre-fetched data
-        result = ingest_characters(characters)
+        delta = request.json.get('delta', False)
+        if not isinstance(delta, bool):
+            return jsonify({
+                'status': 'error',
+                'error': 'delta must be true or false',
+                'logs': ['🔥 Invalid data format']
+            }), 400
         
-        return jsonify(result)
+        # Run ingestion with pre-fetched data in the background
+        scope = 'changed characters among ' if delta else ''
+        return submit_job('ingest', ingest_characters, characters, delta,
+                          started_log=f'⚔️ Ingestion of {scope}{len(characters)} characters has begun')
     
     except ValueError as e:
         logger.error(f"Validation error in ingest: {e}")
@@ -217,7 +347,9 @@ def ingest():
 def ingest_quotes_endpoint():
     """
     Ingest quotes as Engagement DMO for Data Cloud Related Lists.
-    Expects characters array with sampleQuotes in request body.
+    Runs as a background job; poll GET /jobs/<jobId> for progress and the result.
+    Expects a snapshotId from /fetch (optionally with characterIds), or a
+    characters array, in the request body.
     """
     try:
         logger.info("📜 Quote ingest endpoint called - sending quotes to Data Cloud")
@@ -238,22 +370,9 @@ def ingest_quotes_endpoint():
                 'logs': ['🔥 Invalid request format']
             }), 400
         
-        if 'characters' not in request.json:
-            return jsonify({
-                'status': 'error',
-                'error': 'No character data provided. Fetch first!',
-                'logs': ['🔥 No data to ingest. Click "Fetch LOTR Data" first.']
-            }), 400
-        
-        characters = request.json['characters']
-        
-        # Validate characters array
-        if not isinstance(characters, list):
-            return jsonify({
-                'status': 'error',
-                'error': 'Characters must be an array',
-                'logs': ['🔥 Invalid data format']
-            }), 400
+        characters, snapshot, error_response = get_request_characters()
+        if error_response:
+            return error_response
         
         if len(characters) == 0:
             return jsonify({
@@ -262,10 +381,12 @@ def ingest_quotes_endpoint():
                 'logs': ['🔥 Character list is empty']
             }), 400
         
-        # Run quote ingestion
-        result = ingest_quotes(characters)
-        
-        return jsonify(result)
+        # Run quote ingestion (full quote sets come from the same snapshot)
+        full_quotes = None
+        if snapshot is not None:
+            full_quotes = quotes_for_characters(snapshot, [char.get('_id') for char in characters])
+        return submit_job('ingest-quotes', ingest_quotes, characters, full_quotes,
+                          started_log=f'📜 Quote ingestion for {len(characters)} characters has begun')
     
     except ValueError as e:
         logger.error(f"Validation error in quote ingest: {e}")
@@ -284,15 +405,128 @@ def ingest_quotes_endpoint():
         }), 500
 
 
+@app.route('/errors', methods=['GET'])
+def list_errors():
+    """
+    Page through the ingestion error journal, oldest first.
+    Query: runId (one ingestion run), offset, limit.
+    """
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'error': 'offset and limit must be integers',
+            'logs': ['🔥 Invalid paging parameters']
+        }), 400
+    
+    if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({
+            'status': 'error',
+            'error': f'offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}',
+            'logs': ['🔥 Invalid paging parameters']
+        }), 400
+    
+    try:
+        run_id = request.args.get('runId') or None
+        total, errors = get_error_journal().read(run_id, offset, limit)
+        return jsonify({
+            'status': 'success',
+            'runId': run_id,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'errors': errors
+        })
+    
+    except Exception as e:
+        logger.error(f"Error journal read error: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'error': sanitize_error_message(e, app.debug),
+            'logs': [f"🔥 The records of woe are unreadable: {sanitize_error_message(e, app.debug)}"]
+        }), 500
+
+
+@app.route('/errors/runs', methods=['GET'])
+def list_error_runs():
+    """
+    Ingestion runs with errors in the journal, most recent first.
+    """
+    try:
+        runs = get_error_journal().runs()
+        return jsonify({'status': 'success', 'count': len(runs), 'runs': runs})
+    
+    except Exception as e:
+        logger.error(f"Error journal read error: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'error': sanitize_error_message(e, app.debug),
+            'logs': [f"🔥 The records of woe are unreadable: {sanitize_error_message(e, app.debug)}"]
+        }), 500
+
+
+@app.route('/dead-letters', methods=['GET'])
+def list_dead_letters():
+    """
+    Batches that were not ingested (failed after retries, or skipped when a
+    run was stopped), without their records. Optional ?kind=characters|quotes.
+    """
+    try:
+        letters = get_dead_letter_store().list(request.args.get('kind') or None)
+        return jsonify({
+            'status': 'success',
+            'count': len(letters),
+            'recordCount': sum(letter['recordCount'] for letter in letters),
+            'deadLetters': letters
+        })
+    
+    except Exception as e:
+        logger.error(f"Dead letter listing error: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'error': sanitize_error_message(e, app.debug),
+            'logs': [f"🔥 The lost messages could not be found: {sanitize_error_message(e, app.debug)}"]
+        }), 500
+
+
+@app.route('/dead-letters/replay', methods=['POST'])
+def replay_dead_letters_endpoint():
+    """
+    Re-send stored failed batches as a background job. Body may carry
+    {"ids": [...]} to replay only some; otherwise every stored batch is sent.
+    """
+    letter_ids = None
+    if request.is_json and not isinstance(request.json, dict):
+        return jsonify({
+            'status': 'error',
+            'error': 'Request body must be a JSON object',
+            'logs': ['🔥 Invalid data format']
+        }), 400
+
+    if request.is_json and request.json.get('ids') is not None:
+        letter_ids = request.json.get('ids')
+        if not isinstance(letter_ids, list) or not all(isinstance(i, str) for i in letter_ids):
+            return jsonify({
+                'status': 'error',
+                'error': 'ids must be an array of dead letter IDs',
+                'logs': ['🔥 Invalid dead letter IDs']
+            }), 400
+    
+    logger.info("📮 Dead letter replay endpoint called")
+    return submit_job('replay', replay_dead_letters, letter_ids,
+                      started_log='📮 The lost messages ride again')
+
+
 @app.route('/wipe', methods=['POST'])
 def wipe():
     """
-    Trigger the deletion pipeline.
+    Trigger the deletion pipeline as a background job.
     """
     try:
         logger.info("🧹 Wipe endpoint called")
-        result = delete_lotr_data()
-        return jsonify(result)
+        return submit_job('wipe', delete_lotr_data, started_log='🔥 The great purge has begun')
     
     except Exception as e:
         logger.error(f"Wipe endpoint error: {e}", exc_info=True)
@@ -303,12 +537,200 @@ def wipe():
         }), 500
 
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    State, progress and (once done) the result of a background job.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'error': 'Unknown job',
+            'logs': ['🔥 No record of this errand. It may have finished long ago.']
+        }), 404
+    
+    return jsonify({'status': 'success', **job.to_dict()})
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    Live progress of a background job as Server-Sent Events.
+    
+    Events: state, log ({message}), progress (counters and recordsPerSecond)
+    and done (final state with result or error), after which the stream ends.
+    Every subscriber gets the job's events from the start (or after
+    Last-Event-ID when reconnecting), so watching never re-runs any work.
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'error': 'Unknown job',
+            'logs': ['🔥 No record of this errand. It may have finished long ago.']
+        }), 404
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', '0'))
+    except ValueError:
+        last_event_id = 0
+    
+    def stream():
+        cursor = last_event_id
+        while True:
+            events, done = job.events_after(cursor, timeout=SSE_HEARTBEAT_SECONDS)
+            if not events and not done:
+                yield ': keep-alive\n\n'
+                continue
+            for event_id, event, data in events:
+                cursor = event_id
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+            if done:
+                return
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/characters', methods=['GET'])
+def list_characters():
+    """
+    List characters a page at a time.
+    
+    Query parameters:
+        q: Search name, race and realm (case-insensitive substring)
+        race, realm: Exact filters (case-insensitive)
+        sort: quoteCount (default, most quotes first) or name
+        order: asc or desc
+        offset, limit: Paging (limit defaults to 50, at most 1000)
+        fields: Comma-separated fields to return (default: all but sampleQuotes)
+        snapshotId: Read a snapshot returned by /fetch instead of the current data
+    
+    The current data is read from the SQLite store's indexes when
+    SQLITE_STORE_ENABLED is set, and from the in-memory index otherwise.
+    """
+    try:
+        args = request.args
+        
+        sort = args.get('sort', 'quoteCount')
+        order = args.get('order')
+        if sort not in SORT_FIELDS or order not in (None, 'asc', 'desc'):
+            return jsonify({
+                'status': 'error',
+                'error': f"sort must be one of {', '.join(SORT_FIELDS)} and order asc or desc",
+                'logs': ['🔥 Invalid sort']
+            }), 400
+        
+        try:
+            offset = int(args.get('offset', 0))
+            limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        except ValueError:
+            offset = limit = -1
+        if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({
+                'status': 'error',
+                'error': f'offset must be non-negative and limit between 1 and {MAX_PAGE_SIZE}',
+                'logs': ['🔥 Invalid paging']
+            }), 400
+        
+        fields = None
+        if args.get('fields'):
+            fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        
+        query = {
+            'search': args.get('q'),
+            'race': args.get('race'),
+            'realm': args.get('realm'),
+            'sort': sort,
+            'descending': None if order is None else order == 'desc',
+            'offset': offset,
+            'limit': limit,
+        }
+        
+        # The SQLite store (if enabled) answers from its indexes without the
+        # dataset in memory; it does not keep sampleQuotes
+        store = None
+        if not args.get('snapshotId') and 'sampleQuotes' not in (fields or ()):
+            store = LOTRClient().get_store()
+        
+        if store is not None:
+            total, characters = store.find_characters(**query)
+            characters = [project_character(char, fields) for char in characters]
+            snapshot_id = store.get_snapshot_id()
+        else:
+            if args.get('snapshotId'):
+                data = get_snapshot_registry().get(args['snapshotId'])
+                if data is None:
+                    return jsonify({
+                        'status': 'error',
+                        'error': 'Snapshot expired. Fetch again!',
+                        'logs': ['🔥 This data is no longer held by the server.']
+                    }), 410
+            else:
+                data = fetch_all_data()
+            total, characters = get_character_index(data).query(fields=fields, **query)
+            snapshot_id = data.get('snapshotId')
+        
+        return jsonify({
+            'status': 'success',
+            'snapshotId': snapshot_id,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'characters': characters
+        })
+    
+    except Exception as e:
+        logger.error(f"Character list endpoint error: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'error': sanitize_error_message(e, app.debug),
+            'logs': [f"🔥 The roll of names could not be read: {sanitize_error_message(e, app.debug)}"]
+        }), 500
+
+
+@app.route('/characters/<char_id>/quotes', methods=['GET'])
+def character_quotes(char_id):
+    """
+    Get every quote for one character.
+    Served from the SQLite store when it is enabled.
+    """
+    try:
+        quotes = LOTRClient().get_character_quotes(char_id)
+        
+        if quotes is None:
+            return jsonify({
+                'status': 'error',
+                'error': 'Character not found',
+                'logs': [f'🔥 No character with id {char_id}']
+            }), 404
+        
+        return jsonify({
+            'status': 'success',
+            'characterId': char_id,
+            'quoteCount': len(quotes),
+            'quotes': quotes
+        })
+    
+    except Exception as e:
+        logger.error(f"Character quotes endpoint error: {e}", exc_info=True)
+        return jsonify({
+            'status': 'error',
+            'error': sanitize_error_message(e, app.debug),
+            'logs': [f"🔥 The words could not be found: {sanitize_error_message(e, app.debug)}"]
+        }), 500
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'ok',
-        'message': 'The Grey Pilgrim stands ready'
+        'message': 'The Grey Pilgrim stands ready',
+        'connections': get_transport().stats()
     })
 
 
@@ -0,0 +1,336 @@
+"""
+Async LOTR API Client
+asyncio version of LOTRClient for embedding in async services.
+
+Pages are fetched concurrently on one aiohttp session without a thread per
+request. The client shares the token bucket, cache, enrichment and SQLite
+store with the synchronous LOTRClient, so both see the same snapshots.
+Refreshes go through the same single-flight and cache file lock as well, so a
+sync and an async refresh never both hit The One API.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import aiohttp
+from config import Config
+from json_stream import PageDecoder
+from lotr_client import (
+    LOTRClient, PAGE_LIMIT, STREAM_CHUNK_SIZE, _assemble_pages, _cache_file_lock, _conditional_headers,
+    _join_refresh, _leave_refresh, _page_meta, _split_pages
+)
+from rate_limiter import RETRYABLE_STATUS_CODES, backoff_delay, get_lotr_rate_limiter, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+ENDPOINTS = [
+    ('character', 'characters'),
+    ('quote', 'quotes'),
+    ('movie', 'movies'),
+]
+
+
+async def _gather_or_cancel(*aws):
+    """Like asyncio.gather, but cancels the remaining tasks as soon as one fails"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class AsyncLOTRClient:
+    """asyncio client for The One API"""
+
+    def __init__(self, session=None):
+        """
+        Args:
+            session: Optional aiohttp.ClientSession to reuse. If not given, the
+                     client opens one and closes it in aclose().
+        """
+        self._sync = LOTRClient()
+        self.base_url = Config.LOTR_API_BASE_URL
+        self.rate_limiter = get_lotr_rate_limiter()
+        self._session = session
+        self._owns_session = session is None
+        self._slots = None
+        self._inflight = None
+        self._background = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Cancel any refresh in progress and close the session if we opened it"""
+        for task in (self._inflight, self._background):
+            if task is not None and not task.done():
+                task.cancel()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            host = urlsplit(self.base_url).hostname
+            timeout = Config.get_http_host_timeouts().get(host, Config.HTTP_TIMEOUT_SECONDS)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=Config.HTTP_POOL_MAXSIZE),
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            )
+        return self._session
+
+    def _get_slots(self):
+        # Created lazily so the semaphore belongs to the running event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(Config.LOTR_FETCH_WORKERS)
+        return self._slots
+
+    async def _acquire_token(self):
+        """Wait for a token from the shared bucket without blocking the event loop"""
+        while True:
+            wait = self.rate_limiter.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _fetch_page(self, endpoint, page, total_pages='?', previous=None):
+        """
+        Fetch a single page of an endpoint, retrying 429/5xx and connection
+        errors with the same backoff and throttling as LOTRClient.
+
+        Returns:
+            Tuple of (docs, total_pages, page_meta); docs is None when the page
+            is unchanged since the previous snapshot
+        """
+        url = f"{self.base_url}/{endpoint}"
+        params = {'limit': PAGE_LIMIT, 'page': page}
+        headers = _conditional_headers(self._sync._get_headers(), previous)
+
+        for attempt in range(Config.LOTR_MAX_RETRIES + 1):
+            last_attempt = attempt == Config.LOTR_MAX_RETRIES
+            retry_after = None
+
+            async with self._get_slots():
+                await self._acquire_token()
+                logger.info(f"📖 Fetching {endpoint} (page {page}/{total_pages})...")
+
+                try:
+                    async with self._get_session().get(url, headers=headers, params=params) as response:
+                        if response.status not in RETRYABLE_STATUS_CODES or last_attempt:
+                            result = await self._parse_page(endpoint, page, response, previous)
+                            self.rate_limiter.recover()
+                            return result
+                        reason = response.status
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        if response.status == 429:
+                            self.rate_limiter.throttle(retry_after)
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if last_attempt:
+                        raise
+                    reason = type(e).__name__
+
+            delay = backoff_delay(attempt, retry_after)
+            logger.warning(
+                f"🔁 {endpoint} page {page} failed ({reason}), "
+                f"retry {attempt + 1}/{Config.LOTR_MAX_RETRIES} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def _parse_page(self, endpoint, page, response, previous=None):
+        """Turn a page response into (docs, total_pages, page_meta), raising on errors"""
+        if response.status == 401:
+            raise Exception(
+                "🚫 LOTR API authentication failed. "
+                "Verify your API key at https://the-one-api.dev/account"
+            )
+        if response.status >= 400:
+            raise Exception(f"❌ LOTR API error: {response.status} - {await response.text()}")
+
+        if response.status == 304 and previous:
+            logger.info(f"♻️  {endpoint} page {page} not modified")
+            return None, previous.get('pages', 1), previous
+
+        # Decode the body as it streams in, like LOTRClient
+        decoder = PageDecoder()
+        async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+            decoder.feed(chunk)
+        data, fingerprint = decoder.finish()
+        if previous and previous.get('fingerprint') == fingerprint:
+            logger.info(f"♻️  {endpoint} page {page} unchanged (same fingerprint)")
+            return None, previous.get('pages', 1), previous
+
+        page_meta = _page_meta(page, data, response.headers, fingerprint)
+        return data.get('docs', []), page_meta['pages'], page_meta
+
+    async def _fetch_endpoint(self, endpoint, description, previous=None):
+        """
+        Fetch every page of an endpoint: page 1 first, then the rest concurrently.
+
+        Returns:
+            Tuple of (items, page_metas, changed), as LOTRClient._fetch_endpoint
+        """
+        previous_pages = _split_pages(*previous) if previous else {}
+
+        async def fetch(page, total_pages='?'):
+            old_meta, old_docs = previous_pages.get(page, (None, None))
+            docs, pages, meta = await self._fetch_page(endpoint, page, total_pages, old_meta)
+            return (old_docs, pages, meta) if docs is None else (docs, pages, meta)
+
+        results = {1: await fetch(1)}
+        total_pages = results[1][1]
+        remaining = list(range(2, total_pages + 1))
+
+        pages = await _gather_or_cancel(*(fetch(page, total_pages) for page in remaining))
+        results.update(zip(remaining, pages))
+
+        return _assemble_pages(results, previous_pages, description)
+
+    async def _fetch_fresh(self, incremental=None):
+        """Download, enrich and cache a new snapshot (disk and CPU work run in a thread)"""
+        loop = asyncio.get_running_loop()
+
+        if incremental is None:
+            incremental = Config.LOTR_INCREMENTAL_REFRESH
+        previous = await loop.run_in_executor(None, self._sync._previous_snapshot) if incremental else None
+
+        logger.info("🌍 The journey through Middle-earth commences (async)...")
+
+        try:
+            fetched = await _gather_or_cancel(*(
+                self._fetch_endpoint(endpoint, description, (previous or {}).get(endpoint))
+                for endpoint, description in ENDPOINTS
+            ))
+        except asyncio.CancelledError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error fetching data: {e}")
+            raise Exception(f"🔥 The journey has encountered darkness: {str(e)}")
+
+        def build_and_save():
+            data = self._sync._build_dataset(fetched, previous)
+            self._sync._save_to_cache(data)
+            self._sync._sync_store(data)
+            return data
+
+        return await loop.run_in_executor(None, build_and_save)
+
+    async def _refresh(self, incremental=None):
+        """Refresh the cache; concurrent callers on this client share one refresh"""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._coordinated_refresh(incremental))
+        # Shield so one cancelled caller doesn't cancel the refresh the others wait on
+        return await asyncio.shield(self._inflight)
+
+    async def _coordinated_refresh(self, incremental=None):
+        """
+        Refresh the cache like LOTRClient._refresh: join a refresh already
+        running in this process (sync or async), otherwise take the cache file
+        lock and fetch unless another worker refreshed while we waited for it.
+        Blocking steps run in a thread so the event loop keeps going.
+        """
+        loop = asyncio.get_running_loop()
+        path = str(self._sync.cache_file)
+        flight, leader = _join_refresh(path)
+
+        if not leader:
+            logger.info("⏳ A refresh is already in progress, waiting for it")
+            return await asyncio.wrap_future(flight)
+
+        try:
+            requested_at = datetime.now()
+            lock = _cache_file_lock(self._sync.cache_lock_file)
+            acquire = loop.run_in_executor(None, lock.__enter__)
+            try:
+                await asyncio.shield(acquire)
+            except asyncio.CancelledError:
+                # The thread still gets the lock; give it back as soon as it does
+                acquire.add_done_callback(
+                    lambda f: f.cancelled() or f.exception() is not None or lock.__exit__(None, None, None)
+                )
+                raise
+
+            try:
+                # Another process may have refreshed while we waited for the lock
+                data = await loop.run_in_executor(None, self._sync._load_if_refreshed_since, requested_at)
+                if data is None:
+                    data = await self._fetch_fresh(incremental)
+                else:
+                    logger.info("📦 Another worker refreshed the cache, using its data")
+            finally:
+                lock.__exit__(None, None, None)
+
+            flight.set_result(data)
+            return data
+
+        except asyncio.CancelledError:
+            # Wakes sync waiters with concurrent.futures.CancelledError
+            flight.cancel()
+            raise
+
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+
+        finally:
+            _leave_refresh(path)
+
+    def _start_background_refresh(self, incremental=None):
+        if self._background is not None and not self._background.done():
+            return
+        self._background = asyncio.ensure_future(self._refresh(incremental))
+        self._background.add_done_callback(self._log_background_result)
+
+    @staticmethod
+    def _log_background_result(task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Background refresh failed, keeping stale data: {task.exception()}")
+        else:
+            logger.info("🔄 Background refresh complete")
+
+    async def fetch_all_data(self, force_refresh=False, incremental=None):
+        """
+        Fetch all LOTR data: characters, quotes, and movies.
+        Same caching rules as LOTRClient.fetch_all_data.
+
+        Returns:
+            Dict with characters, quotes, movies, and enriched data
+        """
+        loop = asyncio.get_running_loop()
+
+        if not force_refresh:
+            age = await loop.run_in_executor(None, self._sync._cache_age)
+            if age is not None and age < timedelta(hours=Config.CACHE_MAX_STALE_HOURS):
+                cached = await loop.run_in_executor(None, self._sync._load_from_cache)
+                if cached and age < timedelta(hours=Config.CACHE_MAX_AGE_HOURS):
+                    return cached
+                if cached and Config.CACHE_STALE_WHILE_REVALIDATE:
+                    logger.info(f"⏰ Cache is stale (age: {age}), serving it while refreshing in the background")
+                    self._start_background_refresh(incremental)
+                    return cached
+
+        return await self._refresh(incremental)
+
+    async def fetch_characters(self, force_refresh=False):
+        """Fetch all LOTR characters"""
+        data = await self.fetch_all_data(force_refresh)
+        return data['characters']
+
+    async def get_characters(self):
+        """Get full character data including sampleQuotes"""
+        data = await self.fetch_all_data()
+        return data['characters']
+
+    async def get_character_ids(self):
+        """Get list of character IDs"""
+        data = await self.fetch_all_data()
+        return [char['_id'] for char in data['characters'] if '_id' in char]
@@ -5,8 +5,10 @@ Handles token acquisition using client credentials flow + Data Cloud token excha
 
 import requests
 import logging
+import threading
 from datetime import datetime, timedelta
 from config import Config
+from transport import get_transport
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,10 @@ class DataCloudAuth:
         self.dc_access_token = None  # Data Cloud specific token
         self.dc_instance_url = None  # Data Cloud instance URL
         self.token_expires_at = None
+        self._lock = threading.Lock()
+    
+    def _has_valid_token(self):
+        return bool(self.dc_access_token and self.token_expires_at and datetime.now() < self.token_expires_at)
     
     def get_token(self):
         """
@@ -31,11 +37,18 @@ class DataCloudAuth:
         Raises: Exception if authentication fails
         """
         # Return cached token if still valid
-        if self.dc_access_token and self.token_expires_at:
-            if datetime.now() < self.token_expires_at:
-                logger.debug("Using cached Data Cloud access token")
-                return self.dc_access_token
+        if self._has_valid_token():
+            logger.debug("Using cached Data Cloud access token")
+            return self.dc_access_token
         
+        # Concurrent batches share one token exchange
+        with self._lock:
+            if self._has_valid_token():
+                return self.dc_access_token
+            return self._acquire_token()
+    
+    def _acquire_token(self):
+        """Run the two-step token exchange and cache the result"""
         # Step 1: Acquire Salesforce access token
         logger.info("Step 1: Acquiring Salesforce access token...")
         
@@ -48,11 +61,10 @@ class DataCloudAuth:
         }
         
         try:
-            response = requests.post(
+            response = get_transport().post(
                 token_url,
                 data=payload,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'},
-                timeout=30
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
             )
             response.raise_for_status()
             
@@ -74,11 +86,10 @@ class DataCloudAuth:
                 'subject_token_type': 'urn:ietf:params:oauth:token-type:access_token'
             }
             
-            exchange_response = requests.post(
+            exchange_response = get_transport().post(
                 exchange_url,
                 data=exchange_payload,
-                headers={'Content-Type': 'application/x-www-form-urlencoded'},
-                timeout=30
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
             )
             exchange_response.raise_for_status()
             
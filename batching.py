@@ -0,0 +1,147 @@
+"""
+Adaptive Batching for the Ingestion API
+Packs records into batches by serialized size instead of a fixed record
+count, so batches of short character records hold many more records than
+batches of long quote dialogs, and none exceed the API's payload limit.
+
+The size target adapts while a run is in progress (AIMD, like the LOTR rate
+limiter): it grows step by step while batches succeed quickly and halves
+when a batch fails or is slow. A 413 (payload too large) lowers the ceiling
+for the rest of the run, and the rejected records are handed back to be
+re-packed into smaller batches.
+"""
+
+import json
+import logging
+import math
+from collections import deque
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Bytes requests adds around the records: {"data": [...]}
+PAYLOAD_OVERHEAD = len(json.dumps({'data': []}))
+# Bytes between two records in the serialized list (", ")
+SEPARATOR_SIZE = 2
+
+
+def record_size(record):
+    """Serialized size of one record, as requests encodes it (json=...)"""
+    return len(json.dumps(record).encode('utf-8'))
+
+
+class AdaptiveBatcher:
+    """Hands out batches of records sized by bytes, adjusting to observed latency and errors"""
+
+    # Target growth per fast successful batch, as a fraction of the ceiling
+    GROWTH_STEP = 0.1
+
+    def __init__(self, records, target_bytes=None, max_bytes=None, min_bytes=None,
+                 max_records=None, target_latency=None):
+        """
+        Args:
+            records: Records to send, in order
+            target_bytes: Starting payload size (defaults to INGEST_BATCH_BYTES)
+            max_bytes: Payload ceiling (defaults to INGEST_MAX_BATCH_BYTES)
+            min_bytes: Payload floor when shrinking (defaults to INGEST_MIN_BATCH_BYTES)
+            max_records: Records per batch cap (defaults to BATCH_SIZE)
+            target_latency: Seconds per batch above which it counts as slow
+                            (defaults to INGEST_TARGET_LATENCY_SECONDS)
+        """
+        self.records = records
+        self.max_bytes = max_bytes or Config.INGEST_MAX_BATCH_BYTES
+        self.min_bytes = min(min_bytes or Config.INGEST_MIN_BATCH_BYTES, self.max_bytes)
+        self.target_bytes = max(self.min_bytes, min(target_bytes or Config.INGEST_BATCH_BYTES, self.max_bytes))
+        self.max_records = max_records or Config.BATCH_SIZE
+        self.target_latency = target_latency or Config.INGEST_TARGET_LATENCY_SECONDS
+
+        self._sizes = [record_size(record) for record in records]
+        self._position = 0
+        self._retry = deque()  # (record, size) handed back by requeue()
+        self._remaining_bytes = sum(self._sizes)
+        self._batches = 0
+
+    def _peek_size(self):
+        if self._retry:
+            return self._retry[0][1]
+        if self._position < len(self.records):
+            return self._sizes[self._position]
+        return None
+
+    def _take(self):
+        if self._retry:
+            return self._retry.popleft()
+        self._position += 1
+        return self.records[self._position - 1], self._sizes[self._position - 1]
+
+    def next_batch(self):
+        """
+        Take the next batch: as many records as fit in the current target.
+        A single record larger than the target is sent on its own.
+
+        Returns:
+            List of records, or None when every record has been handed out
+        """
+        if self._peek_size() is None:
+            return None
+
+        record, record_bytes = self._take()
+        batch = [record]
+        size = PAYLOAD_OVERHEAD + record_bytes
+        taken_bytes = record_bytes
+        while len(batch) < self.max_records:
+            next_size = self._peek_size()
+            if next_size is None or size + SEPARATOR_SIZE + next_size > self.target_bytes:
+                break
+            record, record_bytes = self._take()
+            batch.append(record)
+            size += SEPARATOR_SIZE + record_bytes
+            taken_bytes += record_bytes
+
+        if size > self.max_bytes:
+            logger.warning(f"⚠️ A single record of {size} bytes is above the {self.max_bytes} byte limit")
+
+        self._remaining_bytes -= taken_bytes
+        self._batches += 1
+        return batch
+
+    def requeue(self, batch):
+        """Hand back a rejected batch so its records go out again in smaller batches"""
+        for record in reversed(batch):
+            record_bytes = record_size(record)
+            self._retry.appendleft((record, record_bytes))
+            self._remaining_bytes += record_bytes
+        self._batches -= 1
+
+    def estimated_total(self):
+        """Batches handed out so far plus an estimate of those still to come"""
+        if self._peek_size() is None:
+            return self._batches
+        return self._batches + math.ceil(
+            (self._remaining_bytes + PAYLOAD_OVERHEAD) / max(self.target_bytes - PAYLOAD_OVERHEAD, 1)
+        )
+
+    def observe(self, batch, success, elapsed, status_code=None):
+        """
+        Adjust the size target from one batch's outcome.
+
+        Args:
+            batch: The records that were sent
+            success: Whether the API accepted them
+            elapsed: Round-trip seconds
+            status_code: HTTP status of a failed batch, if any
+        """
+        if status_code == 413:
+            # The API told us the real limit is lower: never go back above this batch
+            self.max_bytes = max(self.min_bytes, min(self.max_bytes, self._batch_bytes(batch) // 2))
+            self.target_bytes = min(self.target_bytes, self.max_bytes)
+            logger.warning(f"📉 Payload too large; batch ceiling lowered to {self.max_bytes} bytes")
+        elif not success or elapsed > self.target_latency:
+            self.target_bytes = max(self.min_bytes, self.target_bytes // 2)
+            logger.info(f"📉 Batch target lowered to {self.target_bytes} bytes")
+        elif self.target_bytes < self.max_bytes:
+            step = int(self.max_bytes * self.GROWTH_STEP)
+            self.target_bytes = min(self.max_bytes, self.target_bytes + step)
+
+    def _batch_bytes(self, batch):
+        return PAYLOAD_OVERHEAD + sum(record_size(record) for record in batch) + SEPARATOR_SIZE * (len(batch) - 1)
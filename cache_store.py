@@ -0,0 +1,264 @@
+"""
+LOTR Cache Store
+Compact, versioned on-disk format for the One API snapshot.
+
+Layout (format version 2):
+    <store>/manifest.json                           version, cached_at, stats, page metadata, file names
+    <store>/<entity>.<generation>.ndjson[.gz]       one compact JSON document per line
+    <store>/<index>.<generation>.json[.gz]          precomputed indexes (optional, rebuilt if missing)
+
+Every file is written under a temporary name and renamed into place. The
+manifest is renamed last, so it is the commit point: readers either see the
+previous snapshot or the new one, never a half-written file.
+
+Version 1 was the single pretty-printed data/lotr_raw.json; it is migrated
+on first read.
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+ENTITIES = ('characters', 'quotes', 'movies')
+
+# Derived fields rebuilt on load rather than stored (sampleQuotes repeats every quote)
+DERIVED_CHARACTER_FIELDS = ('sampleQuotes',)
+
+# Indexes saved with a snapshot so loading it skips rebuilding them
+INDEXES = ('quoteIndex', 'sampleIndex')
+
+
+def _atomic_write(path, write, compress=False):
+    """Write a file via a temp file + rename; write(f) receives a text file object"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if compress:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+                write(f)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_ndjson(f, items, drop_fields=()):
+    for item in items:
+        if drop_fields:
+            item = {k: v for k, v in item.items() if k not in drop_fields}
+        f.write(json.dumps(item, separators=(',', ':'), ensure_ascii=False))
+        f.write('\n')
+
+
+def _open_text(path):
+    opener = gzip.open if str(path).endswith('.gz') else open
+    return opener(path, 'rt', encoding='utf-8')
+
+
+def _iter_ndjson(f):
+    """Decode an open NDJSON file one line at a time, closing it at the end"""
+    with f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_ndjson(path):
+    return list(_iter_ndjson(_open_text(path)))
+
+
+def _read_json(path):
+    with _open_text(path) as f:
+        return json.load(f)
+
+
+def manifest_path(store_dir):
+    """Path of the manifest (the file whose mtime/size identifies a snapshot)"""
+    return Path(store_dir) / MANIFEST_NAME
+
+
+def read_manifest(store_dir):
+    """
+    Read the snapshot manifest, upgrading older format versions.
+
+    Returns:
+        Manifest dict, or None if there is no usable snapshot
+    """
+    try:
+        with open(manifest_path(store_dir), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    version = manifest.get('version', 0)
+    if version > FORMAT_VERSION:
+        logger.warning(f"Cache format v{version} is newer than supported v{FORMAT_VERSION}, ignoring it")
+        return None
+
+    while version < FORMAT_VERSION:
+        migrate = _MANIFEST_MIGRATIONS.get(version)
+        if migrate is None:
+            logger.warning(f"No migration from cache format v{version}, ignoring it")
+            return None
+        manifest = migrate(manifest)
+        version = manifest['version']
+
+    return manifest
+
+
+def read_snapshot(store_dir, manifest):
+    """
+    Load every entity listed in a manifest.
+
+    Returns:
+        Dict with characters, quotes, movies, stats, pages, cached_at,
+        snapshotId (the generation) and any saved indexes. Characters come
+        back without derived fields (sampleQuotes).
+    """
+    store_dir = Path(store_dir)
+    data = {
+        entity: _read_ndjson(store_dir / manifest['files'][entity])
+        for entity in ENTITIES
+    }
+    for index in INDEXES:
+        if index in manifest['files']:
+            data[index] = _read_json(store_dir / manifest['files'][index])
+    data['stats'] = manifest.get('stats', {})
+    data['pages'] = manifest.get('pages', {})
+    data['cached_at'] = manifest['cached_at']
+    data['snapshotId'] = manifest['generation']
+    return data
+
+
+def stream_snapshot(store_dir, manifest):
+    """
+    Read the entities listed in a manifest one record at a time, for
+    consumers that write the records elsewhere (e.g. the SQLite store)
+    instead of holding whole lists. Every file is opened up front, so a
+    later generation swap can't remove one before it is read.
+
+    Returns:
+        Dict of entity -> iterator of records (characters without derived fields)
+    """
+    store_dir = Path(store_dir)
+    files = {}
+    try:
+        for entity in ENTITIES:
+            files[entity] = _open_text(store_dir / manifest['files'][entity])
+    except Exception:
+        for f in files.values():
+            f.close()
+        raise
+    return {entity: _iter_ndjson(f) for entity, f in files.items()}
+
+
+def write_snapshot(store_dir, data, compress=True):
+    """
+    Write a snapshot atomically and remove files from older generations.
+
+    Args:
+        data: Dict with characters, quotes, movies, stats, pages and cached_at,
+              plus optional indexes
+
+    Returns:
+        The manifest that was written
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    previous = read_manifest(store_dir)
+    generation = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    suffix = '.ndjson.gz' if compress else '.ndjson'
+
+    files = {}
+    for entity in ENTITIES:
+        name = f"{entity}.{generation}{suffix}"
+        drop = DERIVED_CHARACTER_FIELDS if entity == 'characters' else ()
+        _atomic_write(
+            store_dir / name,
+            lambda f, items=data[entity], drop=drop: _write_ndjson(f, items, drop),
+            compress=compress
+        )
+        files[entity] = name
+
+    index_suffix = '.json.gz' if compress else '.json'
+    for index in INDEXES:
+        if data.get(index) is None:
+            continue
+        name = f"{index}.{generation}{index_suffix}"
+        _atomic_write(
+            store_dir / name,
+            lambda f, value=data[index]: json.dump(value, f, separators=(',', ':')),
+            compress=compress
+        )
+        files[index] = name
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'generation': generation,
+        'cached_at': data['cached_at'],
+        'compressed': compress,
+        'files': files,
+        'stats': data.get('stats', {}),
+        'pages': data.get('pages', {})
+    }
+    _atomic_write(
+        manifest_path(store_dir),
+        lambda f: json.dump(manifest, f, separators=(',', ':'))
+    )
+
+    # Keep the previous generation for readers that loaded its manifest just before the swap
+    keep = set(files.values()) | set((previous or {}).get('files', {}).values())
+    _remove_stale_files(store_dir, keep)
+
+    return manifest
+
+
+def _remove_stale_files(store_dir, keep):
+    for path in store_dir.iterdir():
+        if path.name == MANIFEST_NAME or path.name in keep or path.name.endswith('.tmp'):
+            continue
+        if path.name.startswith(ENTITIES + INDEXES):
+            try:
+                path.unlink()
+            except OSError as e:
+                logger.debug(f"Could not remove old cache file {path}: {e}")
+
+
+def migrate_legacy_file(legacy_file, store_dir, compress=True):
+    """
+    Convert a version 1 cache (one pretty-printed JSON file) to the current format.
+
+    Returns:
+        The new manifest, or None if there was nothing to migrate
+    """
+    legacy_file = Path(legacy_file)
+    if not legacy_file.exists() or manifest_path(store_dir).exists():
+        return None
+
+    try:
+        with open(legacy_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        data.setdefault('pages', {})
+        manifest = write_snapshot(store_dir, data, compress)
+        legacy_file.unlink()
+        logger.info(f"📦 Migrated {legacy_file} to cache format v{FORMAT_VERSION}")
+        return manifest
+    except Exception as e:
+        logger.warning(f"Could not migrate legacy cache {legacy_file}: {e}")
+        return None
+
+
+# Manifest upgrades: version -> function returning the manifest at version + 1
+_MANIFEST_MIGRATIONS = {}
@@ -0,0 +1,137 @@
+"""
+Character Index
+Precomputed sort orders and search keys for one snapshot's characters, so
+GET /characters can filter, sort and page without re-scanning and re-sorting
+the whole list on every request.
+
+Indexes are built once per snapshot and kept for the few most recent ones.
+"""
+
+import threading
+from collections import OrderedDict
+from config import Config
+
+# Sort keys accepted by CharacterIndex.query
+SORT_FIELDS = ('quoteCount', 'name')
+
+# Fields left out unless asked for (sampleQuotes repeats the quote corpus)
+DEFAULT_EXCLUDED_FIELDS = ('sampleQuotes',)
+
+
+def _clean(value):
+    """Lower-case a searchable value; the API uses 'NaN' for unknown"""
+    if not value or value == 'NaN':
+        return ''
+    return str(value).casefold()
+
+
+class CharacterIndex:
+    """Search keys and sort orders for a list of characters"""
+
+    def __init__(self, characters):
+        self.characters = characters
+        self._names = [_clean(c.get('name')) for c in characters]
+        self._races = [_clean(c.get('race')) for c in characters]
+        self._realms = [_clean(c.get('realm')) for c in characters]
+
+        # Positions by race / realm for exact-match filters
+        self._by_race = {}
+        self._by_realm = {}
+        for pos in range(len(characters)):
+            self._by_race.setdefault(self._races[pos], set()).add(pos)
+            self._by_realm.setdefault(self._realms[pos], set()).add(pos)
+
+        # (sort field, descending) -> positions; quote count ties are ordered by name
+        positions = range(len(characters))
+        by_name = sorted(positions, key=lambda pos: self._names[pos])
+        self._orders = {
+            ('name', False): by_name,
+            ('name', True): by_name[::-1],
+            ('quoteCount', False): sorted(
+                positions, key=lambda pos: (characters[pos].get('quoteCount', 0), self._names[pos])
+            ),
+            ('quoteCount', True): sorted(
+                positions, key=lambda pos: (-characters[pos].get('quoteCount', 0), self._names[pos])
+            ),
+        }
+
+    def query(self, search=None, race=None, realm=None, sort='quoteCount', descending=None,
+              offset=0, limit=50, fields=None):
+        """
+        Filter, sort, page and project characters.
+
+        Args:
+            search: Case-insensitive substring of name, race or realm
+            race: Exact race (case-insensitive)
+            realm: Exact realm (case-insensitive)
+            sort: One of SORT_FIELDS
+            descending: Sort direction (defaults to descending for quoteCount,
+                        ascending for name)
+            fields: Fields to return (_id is always included); None returns
+                    everything except DEFAULT_EXCLUDED_FIELDS
+
+        Returns:
+            Tuple of (total matches, list of projected characters for the page)
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        if descending is None:
+            descending = sort == 'quoteCount'
+
+        order = self._orders[(sort, descending)]
+
+        allowed = None
+        if race:
+            allowed = self._by_race.get(_clean(race), set())
+        if realm:
+            realm_positions = self._by_realm.get(_clean(realm), set())
+            allowed = realm_positions if allowed is None else allowed & realm_positions
+
+        needle = _clean(search)
+        if allowed is not None or needle:
+            order = [
+                pos for pos in order
+                if (allowed is None or pos in allowed)
+                and (not needle or needle in self._names[pos]
+                     or needle in self._races[pos] or needle in self._realms[pos])
+            ]
+
+        page = [project_character(self.characters[pos], fields) for pos in order[offset:offset + limit]]
+        return len(order), page
+
+
+def project_character(char, fields):
+    """
+    Keep the requested fields of a character (_id is always included);
+    None keeps everything except DEFAULT_EXCLUDED_FIELDS.
+    """
+    if fields is None:
+        return {k: v for k, v in char.items() if k not in DEFAULT_EXCLUDED_FIELDS}
+    projected = {'_id': char.get('_id')}
+    for field in fields:
+        if field in char:
+            projected[field] = char[field]
+    return projected
+
+
+# Indexes for recent snapshots: snapshot ID -> CharacterIndex
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_character_index(data):
+    """Get the index for a dataset, building it on first use"""
+    key = data.get('snapshotId') or id(data['characters'])
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and index.characters is data['characters']:
+            _indexes.move_to_end(key)
+            return index
+
+    index = CharacterIndex(data['characters'])
+    with _indexes_lock:
+        _indexes[key] = index
+        # One index per snapshot the registry can hand out
+        while len(_indexes) > Config.SNAPSHOT_REGISTRY_SIZE:
+            _indexes.popitem(last=False)
+    return index
@@ -16,7 +16,24 @@ class Config:
     # LOTR API
     LOTR_API_KEY = os.getenv("LOTR_API_KEY")
     LOTR_API_BASE_URL = "https://the-one-api.dev/v2"
-    
+
+    # LOTR API fetch settings (The One API allows 100 requests per 10 minutes)
+    LOTR_PARALLEL_FETCH = os.getenv("LOTR_PARALLEL_FETCH", "true").lower() == "true"
+    LOTR_FETCH_WORKERS = int(os.getenv("LOTR_FETCH_WORKERS", "4"))  # max in-flight requests overall
+    LOTR_RATE_LIMIT = int(os.getenv("LOTR_RATE_LIMIT", "100"))
+    LOTR_RATE_PERIOD_SECONDS = int(os.getenv("LOTR_RATE_PERIOD_SECONDS", "600"))
+    LOTR_RATE_BURST = int(os.getenv("LOTR_RATE_BURST", "10"))
+    LOTR_INCREMENTAL_REFRESH = os.getenv("LOTR_INCREMENTAL_REFRESH", "true").lower() == "true"
+    LOTR_MAX_RETRIES = int(os.getenv("LOTR_MAX_RETRIES", "5"))  # per page, on 429/5xx/connection errors
+    LOTR_RETRY_BASE_SECONDS = float(os.getenv("LOTR_RETRY_BASE_SECONDS", "1"))
+    LOTR_RETRY_MAX_SECONDS = float(os.getenv("LOTR_RETRY_MAX_SECONDS", "60"))
+
+    # HTTP transport (shared keep-alive pools)
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # hosts kept pooled
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # connections per host
+    HTTP_TIMEOUT_SECONDS = int(os.getenv("HTTP_TIMEOUT_SECONDS", "30"))
+    HTTP_HOST_TIMEOUTS = os.getenv("HTTP_HOST_TIMEOUTS", "")  # e.g. "the-one-api.dev=20,login.salesforce.com=30"
+
     # Data Cloud OAuth
     DC_CLIENT_ID = os.getenv("DATA_CLOUD_CLIENT_ID")
     DC_CLIENT_SECRET = os.getenv("DATA_CLOUD_CLIENT_SECRET")
@@ -34,16 +51,62 @@ class Config:
     
     # Cache settings - with type conversion
     CACHE_DIR = "data"
-    CACHE_FILE = "data/lotr_raw.json"
+    CACHE_STORE_DIR = "data/lotr_cache"  # manifest + per-entity NDJSON files
+    CACHE_FILE = "data/lotr_raw.json"  # legacy single-file cache, migrated on first read
+    CACHE_COMPRESS = os.getenv("CACHE_COMPRESS", "true").lower() == "true"
+    
+    # Optional SQLite store for indexed lookups (populated by fetch_all_data)
+    SQLITE_STORE_ENABLED = os.getenv("SQLITE_STORE_ENABLED", "false").lower() == "true"
+    SQLITE_STORE_FILE = os.getenv("SQLITE_STORE_FILE", "data/lotr.db")
+    CACHE_LOCK_FILE = "data/lotr_raw.lock"  # serializes refreshes across worker processes
     CACHE_MAX_AGE_HOURS = int(os.getenv("CACHE_MAX_AGE_HOURS", "24"))
+    # Serve a stale cache while refreshing in the background, up to this hard limit
+    CACHE_STALE_WHILE_REVALIDATE = os.getenv("CACHE_STALE_WHILE_REVALIDATE", "true").lower() == "true"
+    CACHE_MAX_STALE_HOURS = int(os.getenv("CACHE_MAX_STALE_HOURS", "168"))
+    
+    # Quotes kept in each character's sampleQuotes (all, first, top or random)
+    # quoteCount and /characters/<id>/quotes always cover every quote
+    QUOTE_SAMPLE_MODE = os.getenv("QUOTE_SAMPLE_MODE", "all").lower()
+    QUOTE_SAMPLE_SIZE = int(os.getenv("QUOTE_SAMPLE_SIZE", "5"))
+    
+    # Datasets from /fetch kept in memory for snapshotId-based ingest requests
+    SNAPSHOT_REGISTRY_SIZE = int(os.getenv("SNAPSHOT_REGISTRY_SIZE", "3"))
+    
+    # Background jobs for /ingest, /ingest-quotes and /wipe
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "10"))  # queued + running before new jobs are refused
+    JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "100"))  # finished jobs kept for /jobs/<id>
+    JOB_STATE_DIR = "data/jobs"  # job state shared by all worker processes
+    JOB_STATE_RETENTION_HOURS = int(os.getenv("JOB_STATE_RETENTION_HOURS", "24"))  # job files older than this are pruned
+    
+    # Production serving (gunicorn.conf.py; ./start.sh --production)
+    SERVER_BIND = os.getenv("SERVER_BIND", "0.0.0.0:5001")
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "4"))  # processes
+    SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))  # threads per process (each SSE stream holds one)
+    SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "120"))  # seconds before a silent worker is restarted
+    SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"  # warm up once before forking
     
     # Logging
     LOG_DIR = "logs"
-    ERROR_LOG_FILE = "logs/ingestion_errors.json"
+    ERROR_LOG_FILE = "logs/ingestion_errors.ndjson"  # append-only journal, one failed batch per line
+    ERROR_LOG_MAX_BYTES = int(os.getenv("ERROR_LOG_MAX_BYTES", str(5 * 1024 * 1024)))  # rotate at this size
+    ERROR_LOG_BACKUPS = int(os.getenv("ERROR_LOG_BACKUPS", "5"))  # rotated files kept
     
     # Ingestion settings - with type conversion
     BATCH_SIZE = int(os.getenv("BATCH_SIZE", "200"))
     DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "200"))  # API max: 200 for streaming delete
+    # Batches are packed by serialized size; the Ingestion API rejects payloads over 200 KB
+    INGEST_BATCH_BYTES = int(os.getenv("INGEST_BATCH_BYTES", "100000"))  # starting target
+    INGEST_MAX_BATCH_BYTES = int(os.getenv("INGEST_MAX_BATCH_BYTES", "190000"))  # ceiling the target grows to
+    INGEST_MIN_BATCH_BYTES = int(os.getenv("INGEST_MIN_BATCH_BYTES", "10000"))  # floor it shrinks to
+    INGEST_TARGET_LATENCY_SECONDS = float(os.getenv("INGEST_TARGET_LATENCY_SECONDS", "5"))  # slower batches shrink the target
+    INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))  # per batch, on 429/5xx/connection errors
+    INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "1"))
+    INGEST_RETRY_MAX_SECONDS = float(os.getenv("INGEST_RETRY_MAX_SECONDS", "30"))
+    DEAD_LETTER_DIR = "data/dead_letters"  # batches that were not ingested, for replay
+    INGEST_LEDGER_FILE = "data/ingest_ledger.json"  # fingerprints of ingested records, for delta ingests
+    INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "4"))  # batches sent concurrently
+    INGEST_MAX_FAILED_BATCHES = int(os.getenv("INGEST_MAX_FAILED_BATCHES", "3"))  # stop sending after this many fail (0 = never)
     
     # Request limits
     MAX_CHARACTERS = int(os.getenv("MAX_CHARACTERS", "10000"))
@@ -85,6 +148,59 @@ class Config:
         if cls.CACHE_MAX_AGE_HOURS < 0:
             errors.append("⏰ Cache max age must be non-negative")
         
+        if cls.CACHE_MAX_STALE_HOURS < cls.CACHE_MAX_AGE_HOURS:
+            errors.append("⏰ Cache max staleness must be at least the cache max age")
+        
+        if cls.QUOTE_SAMPLE_MODE not in ('all', 'first', 'top', 'random'):
+            errors.append("💬 QUOTE_SAMPLE_MODE must be one of: all, first, top, random")
+        
+        if cls.QUOTE_SAMPLE_SIZE < 1:
+            errors.append("💬 Quote sample size must be positive")
+        
+        if cls.SNAPSHOT_REGISTRY_SIZE < 1:
+            errors.append("📸 Snapshot registry size must be positive")
+        
+        if cls.JOB_WORKERS < 1 or cls.JOB_QUEUE_SIZE < cls.JOB_WORKERS or cls.JOB_HISTORY_SIZE < 1:
+            errors.append("📋 Job workers and history must be positive, and the queue at least as large as the workers")
+        
+        if cls.JOB_STATE_RETENTION_HOURS < 1:
+            errors.append("📋 Job files must be kept for at least an hour (JOB_STATE_RETENTION_HOURS)")
+        
+        if not 0 < cls.INGEST_MIN_BATCH_BYTES <= cls.INGEST_BATCH_BYTES <= cls.INGEST_MAX_BATCH_BYTES:
+            errors.append("📦 Ingest batch bytes must satisfy 0 < INGEST_MIN_BATCH_BYTES <= INGEST_BATCH_BYTES <= INGEST_MAX_BATCH_BYTES")
+        
+        if cls.INGEST_TARGET_LATENCY_SECONDS <= 0:
+            errors.append("📦 Ingest target latency must be positive")
+        
+        if cls.ERROR_LOG_MAX_BYTES < 1024 or cls.ERROR_LOG_BACKUPS < 0:
+            errors.append("🗂️ Error log must rotate at 1 KB or more and keep a non-negative number of backups")
+        
+        if cls.INGEST_MAX_RETRIES < 0 or cls.INGEST_RETRY_BASE_SECONDS <= 0 or cls.INGEST_RETRY_MAX_SECONDS <= 0:
+            errors.append("🔁 Ingest retries must be non-negative and retry delays positive")
+        
+        if cls.INGEST_MAX_IN_FLIGHT < 1 or cls.INGEST_MAX_FAILED_BATCHES < 0:
+            errors.append("🌋 Ingest in-flight batches must be positive and the failure limit not negative")
+        
+        if cls.SERVER_WORKERS < 1 or cls.SERVER_THREADS < 1 or cls.SERVER_TIMEOUT < 1:
+            errors.append("🏰 Server workers, threads and timeout must be positive")
+        
+        if cls.LOTR_FETCH_WORKERS < 1:
+            errors.append("🐎 Fetch workers must be positive")
+
+        if cls.LOTR_RATE_LIMIT < 1 or cls.LOTR_RATE_PERIOD_SECONDS < 1 or cls.LOTR_RATE_BURST < 1:
+            errors.append("⏳ LOTR API rate limit, period and burst must be positive")
+
+        if cls.LOTR_MAX_RETRIES < 0 or cls.LOTR_RETRY_BASE_SECONDS <= 0 or cls.LOTR_RETRY_MAX_SECONDS <= 0:
+            errors.append("🔁 LOTR API retries must be non-negative and retry delays positive")
+
+        if cls.HTTP_POOL_CONNECTIONS < 1 or cls.HTTP_POOL_MAXSIZE < 1 or cls.HTTP_TIMEOUT_SECONDS < 1:
+            errors.append("🔌 HTTP pool sizes and timeout must be positive")
+
+        try:
+            cls.get_http_host_timeouts()
+        except ValueError:
+            errors.append("🔌 HTTP_HOST_TIMEOUTS must look like 'host=seconds,host=seconds'")
+
         if cls.BATCH_SIZE < 1 or cls.BATCH_SIZE > 1000:
             errors.append("📦 Batch size must be between 1 and 1000")
         
@@ -102,8 +218,23 @@ class Config:
             )
             raise ValueError(error_message)
     
+    @classmethod
+    def get_http_host_timeouts(cls):
+        """
+        Parse HTTP_HOST_TIMEOUTS into a dict of hostname -> seconds.
+        Raises ValueError if an entry is malformed.
+        """
+        timeouts = {}
+        for entry in cls.HTTP_HOST_TIMEOUTS.split(','):
+            if not entry.strip():
+                continue
+            host, _, seconds = entry.partition('=')
+            timeouts[host.strip()] = float(seconds)
+        return timeouts
+
     @classmethod
     def ensure_directories(cls):
         """Create necessary directories if they don't exist"""
         os.makedirs(cls.CACHE_DIR, exist_ok=True)
+        os.makedirs(cls.JOB_STATE_DIR, exist_ok=True)
         os.makedirs(cls.LOG_DIR, exist_ok=True)
@@ -0,0 +1,129 @@
+"""
+Ingestion Dead-Letter Store
+Keeps batches that could not be ingested (after retries, or skipped when a
+run was stopped) so they can be replayed on their own instead of
+re-ingesting everything.
+
+Each batch is one JSON file under DEAD_LETTER_DIR, written atomically, so
+any worker process can add, list, replay and remove entries.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import datetime
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# What a batch holds; decides which Ingestion API object it is replayed to
+KINDS = ('characters', 'quotes')
+
+
+class DeadLetterStore:
+    """Failed ingestion batches on disk, one file per batch"""
+
+    def __init__(self, directory=None):
+        """
+        Args:
+            directory: Where batches are kept (defaults to DEAD_LETTER_DIR)
+        """
+        self.directory = directory or Config.DEAD_LETTER_DIR
+
+    def add(self, kind, records, error, status_code=None, run_id=None):
+        """
+        Save a batch that was not ingested.
+
+        Returns:
+            The dead letter's ID
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown batch kind: {kind}")
+
+        letter = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'runId': run_id,
+            'recordCount': len(records),
+            'error': error,
+            'statusCode': status_code,
+            'failedAt': datetime.now().isoformat(),
+            'replayAttempts': 0,
+            'records': records,
+        }
+        self._write(letter)
+        logger.info(f"📮 Saved failed {kind} batch ({len(records)} records) as dead letter {letter['id']}")
+        return letter['id']
+
+    def list(self, kind=None):
+        """
+        Summaries of the stored batches (without their records), oldest first.
+        """
+        letters = []
+        for letter_id in self._ids():
+            letter = self.get(letter_id)
+            if letter is not None and (kind is None or letter['kind'] == kind):
+                letters.append({k: v for k, v in letter.items() if k != 'records'})
+        return sorted(letters, key=lambda letter: letter['failedAt'])
+
+    def get(self, letter_id):
+        """A stored batch with its records, or None"""
+        if not re.fullmatch(r'[0-9a-f]{32}', letter_id):
+            return None
+        try:
+            with open(self._path(letter_id), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def record_failure(self, letter, error, status_code=None):
+        """Note a failed replay of a stored batch"""
+        letter = dict(letter)
+        letter['error'] = error
+        letter['statusCode'] = status_code
+        letter['replayAttempts'] = letter.get('replayAttempts', 0) + 1
+        letter['lastReplayAt'] = datetime.now().isoformat()
+        self._write(letter)
+
+    def remove(self, letter_id):
+        """Drop a batch once it has been ingested"""
+        try:
+            os.remove(self._path(letter_id))
+        except FileNotFoundError:
+            pass
+
+    def _ids(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [name[:-len('.json')] for name in names if name.endswith('.json')]
+
+    def _path(self, letter_id):
+        return os.path.join(self.directory, f"{letter_id}.json")
+
+    def _write(self, letter):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(letter['id'])
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(letter, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+# Singleton instance
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_dead_letter_store():
+    """Get the singleton dead-letter store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DeadLetterStore()
+    return _store
@@ -12,6 +12,9 @@ import time
 from datetime import datetime, timedelta, timezone
 from config import Config
 from auth import get_auth
+from transport import get_transport
+from ingest_ledger import get_ingest_ledger
+from jobs import JobLogs, report_progress
 from lotr_client import LOTRClient
 
 logger = logging.getLogger(__name__)
@@ -25,11 +28,10 @@ def get_salesforce_token():
         'client_id': Config.DC_CLIENT_ID,
         'client_secret': Config.DC_CLIENT_SECRET
     }
-    response = requests.post(
+    response = get_transport().post(
         token_url,
         data=payload,
-        headers={'Content-Type': 'application/x-www-form-urlencoded'},
-        timeout=30
+        headers={'Content-Type': 'application/x-www-form-urlencoded'}
     )
     response.raise_for_status()
     return response.json()
@@ -60,7 +62,8 @@ def delete_salesforce_accounts():
         query_url = f"{sf_instance}/services/data/v59.0/query?q={requests.utils.quote(query)}"
         
         logger.info(f"   Querying: {query}")
-        query_response = requests.get(query_url, headers=headers, timeout=30)
+        transport = get_transport()
+        query_response = transport.get(query_url, headers=headers)
         query_response.raise_for_status()
         
         results = query_response.json()
@@ -87,7 +90,7 @@ def delete_salesforce_accounts():
             delete_url = f"{sf_instance}/services/data/v59.0/sobjects/Account/{account_id}"
             
             try:
-                delete_response = requests.delete(delete_url, headers=headers, timeout=30)
+                delete_response = transport.delete(delete_url, headers=headers)
                 delete_response.raise_for_status()
                 deleted_count += 1
                 logger.info(f"   ✅ Deleted Account: {account_name}")
@@ -149,6 +152,7 @@ def delete_from_datacloud_bulk(record_ids, object_name, source_name):
     auth = get_auth()
     token = auth.get_token()
     instance_url = auth.get_instance_url()
+    transport = get_transport()
     
     base_url = f"https://{instance_url}"
     headers_json = {
@@ -170,11 +174,10 @@ def delete_from_datacloud_bulk(record_ids, object_name, source_name):
             'operation': 'delete'
         }
         
-        job_resp = requests.post(
+        job_resp = transport.post(
             f"{base_url}/api/v1/ingest/jobs",
             headers=headers_json,
-            json=job_payload,
-            timeout=30
+            json=job_payload
         )
         job_resp.raise_for_status()
         
@@ -200,7 +203,7 @@ def delete_from_datacloud_bulk(record_ids, object_name, source_name):
         # Step 3: Upload CSV
         logger.info("📤 Uploading CSV to job...")
         
-        upload_resp = requests.put(
+        upload_resp = transport.put(
             f"{base_url}/api/v1/ingest/jobs/{job_id}/batches",
             headers=headers_csv,
             data=csv_content,
@@ -212,11 +215,10 @@ def delete_from_datacloud_bulk(record_ids, object_name, source_name):
         # Step 4: Close job to trigger processing
         logger.info("🔒 Closing job to trigger processing...")
         
-        close_resp = requests.patch(
+        close_resp = transport.patch(
             f"{base_url}/api/v1/ingest/jobs/{job_id}",
             headers=headers_json,
-            json={'state': 'UploadComplete'},
-            timeout=30
+            json={'state': 'UploadComplete'}
         )
         close_resp.raise_for_status()
         logger.info("   ✅ Job closed - processing started")
@@ -230,7 +232,7 @@ def delete_from_datacloud_bulk(record_ids, object_name, source_name):
         for i in range(max_polls):
             time.sleep(10)
             
-            status_resp = requests.get(job_url, headers=headers_json, timeout=30)
+            status_resp = transport.get(job_url, headers=headers_json)
             job_status = status_resp.json()
             state = job_status.get('state')
             
@@ -285,7 +287,8 @@ def get_quote_ids_from_characters(characters):
     Quote IDs are formatted as: {characterId}_{index}
     
     Args:
-        characters: List of character dicts with sampleQuotes
+        characters: List of character dicts with quoteCount (sampleQuotes may be
+                    trimmed, so its length is only a fallback)
     
     Returns:
         List of quote IDs
@@ -293,8 +296,8 @@ def get_quote_ids_from_characters(characters):
     quote_ids = []
     for char in characters:
         char_id = char.get('_id', '')
-        sample_quotes = char.get('sampleQuotes', [])
-        for idx in range(len(sample_quotes)):
+        quote_count = char.get('quoteCount', len(char.get('sampleQuotes', [])))
+        for idx in range(quote_count):
             quote_ids.append(f"{char_id}_{idx}")
     return quote_ids
 
@@ -309,7 +312,7 @@ def delete_lotr_data():
     Returns:
         Dict with deletion summary
     """
-    logs = []
+    logs = JobLogs()
     
     try:
         logs.append("🔥 The fires are lit! Beginning the great purge...")
@@ -317,6 +320,7 @@ def delete_lotr_data():
         
         # Step 1: Delete Salesforce Accounts with characterId__c
         logs.append("🏰 Step 1: Purging Salesforce Accounts...")
+        report_progress(step=1, totalSteps=3)
         account_result = delete_salesforce_accounts()
         
         if account_result.get('deleted_count', 0) > 0:
@@ -330,8 +334,14 @@ def delete_lotr_data():
         # Get character data for both character and quote deletion
         logs.append("📋 Gathering the names of those who must depart...")
         client = LOTRClient()
-        characters = client.get_characters()
-        character_ids = [c.get('_id') for c in characters if c.get('_id')]
+        store = client.get_store()
+        if store is not None:
+            character_ids = store.get_character_ids()
+            quote_ids = store.get_quote_ids()
+        else:
+            characters = client.get_characters()
+            character_ids = [c.get('_id') for c in characters if c.get('_id')]
+            quote_ids = get_quote_ids_from_characters(characters)
         
         # Also include any test records that might exist
         test_ids = ['test123', 'test_validation_123', 'test_validation_456', 'test_flow_001']
@@ -339,6 +349,7 @@ def delete_lotr_data():
         
         # Step 2: Delete Characters from Data Cloud
         logs.append("☁️  Step 2: Purging Character records from Data Cloud...")
+        report_progress(step=2, totalSteps=3)
         logs.append(f"📝 {len(all_character_ids)} characters marked for removal")
         
         char_result = {'success': True, 'records_submitted': 0}
@@ -351,6 +362,8 @@ def delete_lotr_data():
             
             if char_result.get('success'):
                 logs.append(f"   ✅ Character delete job submitted ({len(all_character_ids)} records)")
+                # Everything must be sent again, so a delta ingest can't skip anything
+                get_ingest_ledger().clear()
             else:
                 logs.append(f"   ❌ Character delete failed: {char_result.get('error', 'Unknown')}")
         else:
@@ -358,7 +371,7 @@ def delete_lotr_data():
         
         # Step 3: Delete Quotes from Data Cloud
         logs.append("💬 Step 3: Purging Quote records from Data Cloud...")
-        quote_ids = get_quote_ids_from_characters(characters)
+        report_progress(step=3, totalSteps=3)
         logs.append(f"📝 {len(quote_ids)} quotes marked for removal")
         
         quote_result = {'success': True, 'records_submitted': 0}
@@ -0,0 +1,92 @@
+"""
+Pre-encoded Responses
+Serializes a snapshot's /fetch body once and keeps it in memory in each
+content coding a client asks for (identity, gzip and, if the optional
+`brotli` package is installed, br). Repeat requests skip JSON encoding and
+compression, and conditional requests are answered with 304.
+"""
+
+import gzip
+import json
+import logging
+import threading
+from collections import OrderedDict
+from config import Config
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def available_encodings():
+    """Content codings we can serve, in order of preference"""
+    return ['br', 'gzip', 'identity'] if brotli is not None else ['gzip', 'identity']
+
+
+class EncodedBody:
+    """One JSON body and its compressed forms (each built on first use)"""
+
+    def __init__(self, version, payload):
+        """
+        Args:
+            version: Identifier of the content (e.g. the snapshot ID), used for ETags
+            payload: JSON-serializable response body
+        """
+        self.version = version
+        self._encoded = {
+            'identity': json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        }
+        self._lock = threading.Lock()
+
+    def etag(self, encoding):
+        """Strong ETag for one representation (each coding is different bytes)"""
+        return f"{self.version}-{encoding}"
+
+    def body(self, encoding):
+        """Get the body in a content coding, compressing it the first time"""
+        with self._lock:
+            if encoding not in self._encoded:
+                raw = self._encoded['identity']
+                if encoding == 'gzip':
+                    # mtime=0 keeps the bytes (and so the ETag) stable
+                    self._encoded[encoding] = gzip.compress(raw, compresslevel=6, mtime=0)
+                elif encoding == 'br' and brotli is not None:
+                    self._encoded[encoding] = brotli.compress(raw, quality=9)
+                else:
+                    raise ValueError(f"Unsupported content coding: {encoding}")
+                logger.info(
+                    f"🗜️  Encoded /fetch body for {self.version} as {encoding}: "
+                    f"{len(raw)} -> {len(self._encoded[encoding])} bytes"
+                )
+            return self._encoded[encoding]
+
+
+# Bodies for recent snapshots: version -> EncodedBody
+_bodies = OrderedDict()
+_bodies_lock = threading.Lock()
+
+
+def get_encoded_body(version, build_payload):
+    """
+    Get the pre-encoded body for a content version.
+
+    Args:
+        version: Snapshot ID the body is derived from
+        build_payload: Called with no arguments to build the body the first time
+    """
+    with _bodies_lock:
+        body = _bodies.get(version)
+        if body is not None:
+            _bodies.move_to_end(version)
+            return body
+
+    body = EncodedBody(version, build_payload())
+    with _bodies_lock:
+        _bodies[version] = body
+        # One body per snapshot the registry can hand out
+        while len(_bodies) > Config.SNAPSHOT_REGISTRY_SIZE:
+            _bodies.popitem(last=False)
+    return body
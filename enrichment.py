@@ -0,0 +1,195 @@
+"""
+Quote Enrichment
+Adds quoteCount and sampleQuotes to LOTR characters.
+
+Quotes are indexed once: each character maps to the offsets of its quotes in
+the snapshot's quote list, in API order. Every quote gets a single
+{'dialog', 'movie'} view, and characters' sampleQuotes lists reference those
+shared views instead of building a copy per character. The quote index and
+the sampled offsets are saved with the cache, so a warm start skips grouping
+and sampling and only attaches the shared views (see attach_sample_quotes).
+
+sampleQuotes can be capped per character (QUOTE_SAMPLE_MODE / QUOTE_SAMPLE_SIZE);
+quoteCount always counts every quote, and character_quotes() returns the
+full set.
+"""
+
+import hashlib
+import logging
+import random
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# all: every quote; first: the first N in API order; top: the N longest lines;
+# random: N quotes sampled deterministically per character
+SAMPLE_MODES = ('all', 'first', 'top', 'random')
+
+
+def build_quote_index(quotes):
+    """
+    Group quote offsets by character.
+
+    Returns:
+        Dict of character ID -> list of offsets into quotes, in API order
+    """
+    index = {}
+    for offset, quote in enumerate(quotes):
+        char_id = quote.get('character')
+        if char_id:
+            offsets = index.get(char_id)
+            if offsets is None:
+                index[char_id] = [offset]
+            else:
+                offsets.append(offset)
+    return index
+
+
+def movie_names(movies):
+    """Map movie ID -> display name"""
+    return {m['_id']: m.get('name', 'Unknown') for m in movies}
+
+
+def quote_view(quote, names):
+    """The {'dialog', 'movie'} form of a quote shown with a character"""
+    return {
+        'dialog': quote.get('dialog', ''),
+        'movie': names.get(quote.get('movie'), 'Unknown')
+    }
+
+
+def sample_offsets(char_id, offsets, quotes, mode, size):
+    """
+    Pick the quote offsets shown in a character's sampleQuotes.
+
+    Returns:
+        List of offsets (in API order, except for 'top' which is longest first)
+    """
+    if mode == 'all' or len(offsets) <= size:
+        return offsets
+    if mode == 'first':
+        return offsets[:size]
+    if mode == 'top':
+        ranked = sorted(offsets, key=lambda offset: len(quotes[offset].get('dialog') or ''), reverse=True)
+        return ranked[:size]
+    if mode == 'random':
+        # Seeded by character ID so every load of a snapshot picks the same quotes
+        seed = int(hashlib.sha256(char_id.encode('utf-8')).hexdigest()[:16], 16)
+        return sorted(random.Random(seed).sample(offsets, size))
+    raise ValueError(f"Unknown quote sample mode: {mode}")
+
+
+def build_sample_index(index, quotes, sample_mode=None, sample_size=None):
+    """
+    Pick every character's sampleQuotes offsets.
+
+    Returns:
+        Dict with the mode and size it was built for, and 'offsets' (character
+        ID -> sampled offsets), or None for offsets when the mode is 'all'
+        (the samples are then the quote index itself)
+    """
+    sample_mode = sample_mode or Config.QUOTE_SAMPLE_MODE
+    sample_size = sample_size or Config.QUOTE_SAMPLE_SIZE
+    offsets = None
+    if sample_mode != 'all':
+        offsets = {
+            char_id: sample_offsets(char_id, char_offsets, quotes, sample_mode, sample_size)
+            for char_id, char_offsets in index.items()
+        }
+    return {'mode': sample_mode, 'size': sample_size, 'offsets': offsets}
+
+
+def sample_index_matches(samples, sample_mode=None, sample_size=None):
+    """Whether a saved sample index was built for the configured sampling"""
+    sample_mode = sample_mode or Config.QUOTE_SAMPLE_MODE
+    sample_size = sample_size or Config.QUOTE_SAMPLE_SIZE
+    if not samples or samples.get('mode') != sample_mode:
+        return False
+    return sample_mode == 'all' or samples.get('size') == sample_size
+
+
+def _sampled(samples, index, char_id):
+    offsets = samples['offsets'] if samples['offsets'] is not None else index
+    return offsets.get(char_id, ())
+
+
+def _views(quotes, names, samples):
+    """Shared quote views: a list for every quote, or a dict built as offsets are sampled"""
+    if samples['offsets'] is None:
+        # quote_view inlined: this runs once per quote on every load
+        name = names.get
+        return [{'dialog': q.get('dialog', ''), 'movie': name(q.get('movie'), 'Unknown')} for q in quotes]
+    return {}
+
+
+def _sample_views(views, offsets, quotes, names):
+    """The shared views of some quote offsets, building any that are missing"""
+    if isinstance(views, list):
+        return [views[offset] for offset in offsets]
+    for offset in offsets:
+        if offset not in views:
+            views[offset] = quote_view(quotes[offset], names)
+    return [views[offset] for offset in offsets]
+
+
+def enrich_characters(characters, quotes, movies, index=None, affected_ids=None,
+                      sample_mode=None, sample_size=None):
+    """
+    Add quoteCount and sampleQuotes to characters.
+
+    Args:
+        index: Quote index from build_quote_index for these quotes (built if None)
+        affected_ids: If given, only these characters are re-enriched; the
+                      others already carry enrichment from the previous snapshot
+        sample_mode: One of SAMPLE_MODES (defaults to QUOTE_SAMPLE_MODE)
+        sample_size: Quotes kept per character unless the mode is 'all'
+                     (defaults to QUOTE_SAMPLE_SIZE)
+
+    Returns:
+        Tuple of (enriched characters, quote index, sample index from
+        build_sample_index). Enriched characters are copies, so earlier
+        snapshots stay intact.
+    """
+    if index is None:
+        index = build_quote_index(quotes)
+    samples = build_sample_index(index, quotes, sample_mode, sample_size)
+
+    names = movie_names(movies)
+    # With only some characters re-enriched, only their samples need views
+    views = _views(quotes, names, samples) if affected_ids is None else {}
+
+    enriched = []
+    for char in characters:
+        char_id = char['_id']
+        if affected_ids is None or char_id in affected_ids:
+            char = dict(char)
+            char['quoteCount'] = len(index.get(char_id, ()))
+            char['sampleQuotes'] = _sample_views(views, _sampled(samples, index, char_id), quotes, names)
+        enriched.append(char)
+
+    return enriched, index, samples
+
+
+def attach_sample_quotes(characters, quotes, movies, index, samples):
+    """
+    Set sampleQuotes from a saved sample index, on a warm load.
+
+    Unlike enrich_characters nothing is regrouped or resampled, and the
+    characters are updated in place: they must be freshly loaded dicts that
+    nothing else references yet. quoteCount is already part of the saved
+    characters.
+    """
+    names = movie_names(movies)
+    views = _views(quotes, names, samples)
+    for char in characters:
+        char['sampleQuotes'] = _sample_views(views, _sampled(samples, index, char['_id']), quotes, names)
+    return characters
+
+
+def character_quotes(char_id, quotes, movies, index):
+    """
+    Get every quote of one character as {'dialog', 'movie'} dicts, in API order.
+    The position in this list is the index used in Data Cloud quote IDs.
+    """
+    names = movie_names(movies)
+    return [quote_view(quotes[offset], names) for offset in index.get(char_id, ())]
@@ -0,0 +1,164 @@
+"""
+Ingestion Error Journal
+Append-only NDJSON log of failed ingestion batches, one JSON object per line.
+
+Appending never reads the file back, so recording an error costs the same
+however long the journal is. Appends hold a thread lock and, where fcntl is
+available, an exclusive lock on a file next to the journal, so lines from
+several threads and worker processes never interleave. When the journal
+reaches ERROR_LOG_MAX_BYTES it is rotated to .1, .2, ... keeping
+ERROR_LOG_BACKUPS old files.
+
+The reader pages through entries oldest first, optionally for one run. It
+takes no lock, so a long scan never holds up appends: it opens every journal
+file before reading any, and open files follow their data through a rotation.
+"""
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from config import Config
+from file_lock import locked_file
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorJournal:
+    """Rotating NDJSON journal of ingestion errors"""
+
+    def __init__(self, path=None, max_bytes=None, backups=None):
+        """
+        Args:
+            path: Journal file (defaults to ERROR_LOG_FILE)
+            max_bytes: Size at which the journal is rotated (defaults to ERROR_LOG_MAX_BYTES)
+            backups: Rotated files kept (defaults to ERROR_LOG_BACKUPS)
+        """
+        self.path = path or Config.ERROR_LOG_FILE
+        self.max_bytes = max_bytes or Config.ERROR_LOG_MAX_BYTES
+        self.backups = Config.ERROR_LOG_BACKUPS if backups is None else backups
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, locked_file(f"{self.path}.lock"):
+            yield
+
+    def append(self, entry):
+        """Append one entry (a JSON-serializable dict) as a line"""
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._locked():
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, 'ab') as f:
+                f.write(line)
+
+    def _rotate(self):
+        """Shift journal -> .1 -> .2 ..., dropping the oldest (lock held)"""
+        if self.backups < 1:
+            os.remove(self.path)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        logger.info(f"🗂️  Rotated error journal {self.path}")
+
+    def _files(self):
+        """Journal files, oldest first"""
+        files = [f"{self.path}.{n}" for n in range(self.backups, 0, -1)]
+        files.append(self.path)
+        return [path for path in files if os.path.exists(path)]
+
+    def _open_files(self):
+        """Open the journal files, oldest first, before any is read"""
+        handles = []
+        for path in self._files():
+            try:
+                handles.append(open(path, encoding='utf-8'))
+            except FileNotFoundError:
+                # Dropped by a rotation since it was listed
+                continue
+        return handles
+
+    def _entries(self):
+        handles = self._open_files()
+        try:
+            for f in handles:
+                for line in f:
+                    if not line.endswith('\n'):
+                        # Still being written
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash; skip it
+                        continue
+        finally:
+            for f in handles:
+                f.close()
+
+    def read(self, run_id=None, offset=0, limit=100):
+        """
+        Page through entries, oldest first.
+
+        Args:
+            run_id: Only entries of this ingestion run
+            offset: Matching entries to skip
+            limit: Maximum entries to return
+
+        Returns:
+            Tuple of (total matching entries, list of entries for the page)
+        """
+        total = 0
+        page = []
+        for entry in self._entries():
+            if run_id is not None and entry.get('runId') != run_id:
+                continue
+            if offset <= total < offset + limit:
+                page.append(entry)
+            total += 1
+        return total, page
+
+    def runs(self):
+        """
+        Summaries of the runs in the journal, most recent first.
+
+        Returns:
+            List of {'runId', 'kind', 'errorCount', 'firstAt', 'lastAt'}
+        """
+        runs = {}
+        for entry in self._entries():
+            run_id = entry.get('runId')
+            run = runs.get(run_id)
+            if run is None:
+                run = runs[run_id] = {
+                    'runId': run_id,
+                    'kind': entry.get('kind'),
+                    'errorCount': 0,
+                    'firstAt': entry.get('timestamp'),
+                }
+            run['errorCount'] += 1
+            run['lastAt'] = entry.get('timestamp')
+        return sorted(runs.values(), key=lambda run: run['lastAt'] or '', reverse=True)
+
+
+# Singleton instance
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_error_journal():
+    """Get the singleton error journal"""
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                _journal = ErrorJournal()
+    return _journal
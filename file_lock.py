@@ -0,0 +1,36 @@
+"""
+Cross-Process File Locks
+Exclusive locks on a file next to shared data (cache, error journal, ingest
+ledger), so threads and gunicorn worker processes take turns writing it.
+
+Locks use fcntl.flock where it is available. Without fcntl (e.g. on Windows)
+the lock file is still opened but nothing is locked, so callers that share
+state between threads also hold a threading.Lock of their own.
+"""
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads in this process are coordinated
+    fcntl = None
+
+
+@contextmanager
+def locked_file(path):
+    """
+    Hold an exclusive lock on a file for the duration of the block.
+
+    Args:
+        path: Lock file, created (with its directory) if it does not exist
+    """
+    os.makedirs(os.path.dirname(str(path)) or '.', exist_ok=True)
+    with open(path, 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
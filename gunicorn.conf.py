@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for production serving (./start.sh --production).
+
+Threaded workers (gthread) keep Server-Sent Events streams and job polling
+from tying up whole processes. Settings come from .env via Config.
+"""
+
+from config import Config
+
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+threads = Config.SERVER_THREADS
+worker_class = 'gthread'
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+preload_app = Config.SERVER_PRELOAD
+accesslog = '-'
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before workers fork
+    if server.cfg.preload_app:
+        from wsgi import warm_up
+        warm_up()
+
+
+def post_fork(server, worker):
+    # Connection pools are per process; drop any inherited from the master
+    from transport import reset_transport
+    reset_transport()
@@ -0,0 +1,122 @@
+"""
+Ingestion Ledger
+Remembers a fingerprint of every record Data Cloud last accepted, so a delta
+ingest can send only the records that are new or changed since then.
+
+A fingerprint is a SHA-256 of the transformed record without `ingestedAt`
+(which is regenerated on every run), keyed by the record's ID. Only batches
+the Ingestion API accepted are recorded; failed or skipped records keep their
+old fingerprint (or none) and go out again on the next delta run.
+
+The ledger is one JSON file under data/, rewritten atomically. Updates hold a
+thread lock and, where fcntl is available, an exclusive lock on a file next
+to the ledger while they re-read and rewrite it, so runs in other worker
+processes are merged rather than replaced.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from config import Config
+from file_lock import locked_file
+
+logger = logging.getLogger(__name__)
+
+# Regenerated on every run, so never part of a fingerprint
+VOLATILE_FIELDS = ('ingestedAt',)
+
+
+def fingerprint(record):
+    """Stable fingerprint of a transformed record's content"""
+    content = {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class IngestLedger:
+    """Fingerprints of ingested records, per kind and record ID"""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Ledger file (defaults to INGEST_LEDGER_FILE)
+        """
+        self.path = path or Config.INGEST_LEDGER_FILE
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, locked_file(f"{self.path}.lock"):
+            yield
+
+    def changed(self, kind, records, id_field):
+        """
+        Pick the records Data Cloud does not already have as they are.
+
+        Args:
+            kind: Record kind ('characters')
+            records: Transformed records
+            id_field: Field holding each record's ID (e.g. 'characterId')
+
+        Returns:
+            Tuple of (new or changed records, number of unchanged records)
+        """
+        known = self._load().get(kind, {})
+        changed = [record for record in records if known.get(record[id_field]) != fingerprint(record)]
+        return changed, len(records) - len(changed)
+
+    def record(self, kind, records, id_field):
+        """Remember records the Ingestion API accepted"""
+        if not records:
+            return
+        with self._locked():
+            ledger = self._load()
+            known = ledger.setdefault(kind, {})
+            for record in records:
+                known[record[id_field]] = fingerprint(record)
+            self._write(ledger)
+        logger.info(f"📒 Ledger updated with {len(records)} {kind}")
+
+    def clear(self):
+        """Forget everything, e.g. after the records were deleted from Data Cloud"""
+        with self._locked():
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        logger.info("📒 Ledger cleared")
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            # An unreadable ledger only means the next delta run sends everything
+            logger.warning(f"Could not read ingestion ledger, starting afresh: {e}")
+            return {}
+
+    def _write(self, ledger):
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(ledger, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+
+# Singleton instance
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ingest_ledger():
+    """Get the singleton ingestion ledger"""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = IngestLedger()
+    return _ledger
@@ -6,10 +6,21 @@ Transforms LOTR data and sends to Data Cloud Ingestion API.
 import requests
 import json
 import logging
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from config import Config
 from auth import get_auth
-from lotr_client import fetch_characters as fetch_from_api
+from batching import AdaptiveBatcher
+from dead_letters import get_dead_letter_store
+from error_journal import get_error_journal
+from ingest_ledger import get_ingest_ledger
+from transport import get_transport
+from jobs import JobLogs, report_progress
+from rate_limiter import RETRYABLE_STATUS_CODES, backoff_delay, parse_retry_after
+from lotr_client import LOTRClient, fetch_characters as fetch_from_api
 
 logger = logging.getLogger(__name__)
 
@@ -77,24 +88,30 @@ def transform_character(lotr_char):
     return transformed
 
 
-def extract_quotes_from_characters(characters):
+def extract_quotes_from_characters(characters, full_quotes=None):
     """
     Extract quotes from character data into flat quote records.
     Each quote becomes its own record linked to the character.
     
     Args:
         characters: List of character dicts with sampleQuotes
+        full_quotes: Optional dict of character ID -> every quote of that
+                     character. sampleQuotes may be trimmed (QUOTE_SAMPLE_MODE),
+                     so it is only used for characters missing from this dict.
     
     Returns:
         List of quote dicts matching LotrQuote schema
     """
     quotes = []
     ingested_at = format_datetime_for_datacloud()
+    full_quotes = full_quotes or {}
     
     for char in characters:
         char_id = char.get('_id', '')
         char_name = char.get('name', 'Unknown')
-        sample_quotes = char.get('sampleQuotes', [])
+        sample_quotes = full_quotes.get(char_id)
+        if sample_quotes is None:
+            sample_quotes = char.get('sampleQuotes', [])
         
         if not sample_quotes:
             continue
@@ -118,6 +135,68 @@ def extract_quotes_from_characters(characters):
     return quotes
 
 
+def get_full_quotes(characters):
+    """
+    Look up every quote of the given characters in the cached snapshot.
+    Returns an empty dict if the lookup fails, so callers fall back to sampleQuotes.
+    """
+    char_ids = [char.get('_id') for char in characters if char.get('_id')]
+    try:
+        return LOTRClient().get_quotes_for_characters(char_ids)
+    except Exception as e:
+        logger.warning(f"Could not load full quote sets, using sampleQuotes: {e}")
+        return {}
+
+
+def post_with_retries(url, payload, description):
+    """
+    POST a batch to the Ingestion API.
+    
+    429s, transient 5xx responses and connection errors are retried up to
+    INGEST_MAX_RETRIES times with jittered exponential backoff (honoring
+    Retry-After). Headers are rebuilt per attempt so a refreshed token is used.
+    
+    Returns:
+        The successful response
+    
+    Raises:
+        requests.exceptions.HTTPError or RequestException from the last attempt
+    """
+    auth = get_auth()
+    
+    for attempt in range(Config.INGEST_MAX_RETRIES + 1):
+        last_attempt = attempt == Config.INGEST_MAX_RETRIES
+        retry_after = None
+        
+        try:
+            response = get_transport().post(
+                url,
+                headers=auth.get_headers(),
+                json=payload,
+                timeout=60
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if last_attempt:
+                raise
+            reason = type(e).__name__
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES or last_attempt:
+                response.raise_for_status()
+                return response
+            reason = response.status_code
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        
+        delay = backoff_delay(
+            attempt, retry_after,
+            base=Config.INGEST_RETRY_BASE_SECONDS, cap=Config.INGEST_RETRY_MAX_SECONDS
+        )
+        logger.warning(
+            f"🔁 {description} failed ({reason}), "
+            f"retry {attempt + 1}/{Config.INGEST_MAX_RETRIES} in {delay:.1f}s"
+        )
+        time.sleep(delay)
+
+
 def send_quote_batch_to_ingestion_api(batch, batch_num, total_batches):
     """
     Send a batch of quote records to the Ingestion API.
@@ -144,14 +223,7 @@ def send_quote_batch_to_ingestion_api(batch, batch_num, total_batches):
     logger.info(f"   URL: {url}")
     
     try:
-        response = requests.post(
-            url,
-            headers=auth.get_headers(),
-            json=payload,
-            timeout=60
-        )
-        
-        response.raise_for_status()
+        response = post_with_retries(url, payload, f"Quote batch {batch_num}/{total_batches}")
         result = response.json()
         logger.info(f"✅ Quote batch {batch_num}/{total_batches} ingested successfully")
         
@@ -160,7 +232,10 @@ def send_quote_batch_to_ingestion_api(batch, batch_num, total_batches):
     except requests.exceptions.HTTPError as e:
         error_msg = f"HTTP {e.response.status_code}: {e.response.text[:500]}"
         logger.error(f"❌ Quote batch {batch_num}/{total_batches} failed: {error_msg}")
-        return {'success': False, 'batch_num': batch_num, 'count': len(batch), 'error': error_msg}
+        return {
+            'success': False, 'batch_num': batch_num, 'count': len(batch),
+            'error': error_msg, 'status_code': e.response.status_code
+        }
     
     except Exception as e:
         error_msg = str(e)
@@ -168,25 +243,30 @@ def send_quote_batch_to_ingestion_api(batch, batch_num, total_batches):
         return {'success': False, 'batch_num': batch_num, 'count': len(batch), 'error': error_msg}
 
 
-def ingest_quotes(characters):
+def ingest_quotes(characters, full_quotes=None):
     """
     Extract and ingest quotes from character data into Data Cloud.
     Quotes are ingested as an Engagement DMO for Related Lists.
     
     Args:
         characters: List of character dicts with sampleQuotes
+        full_quotes: Optional dict of character ID -> every quote (looked up
+                     in the current snapshot if not given)
     
     Returns:
         Dict with ingestion summary
     """
-    logs = []
+    logs = JobLogs()
+    run_id = uuid.uuid4().hex[:12]
     
     try:
         logs.append("📜 Gathering the wisdom of Middle-earth...")
         logger.info("Starting quote extraction and ingestion")
         
-        # Extract quotes from characters
-        quotes = extract_quotes_from_characters(characters)
+        # Extract quotes from characters, using the full quote sets from the snapshot
+        if full_quotes is None:
+            full_quotes = get_full_quotes(characters)
+        quotes = extract_quotes_from_characters(characters, full_quotes)
         
         if len(quotes) == 0:
             logs.append("⚠️ No quotes found in character data")
@@ -199,23 +279,23 @@ def ingest_quotes(characters):
         
         logs.append(f"✨ {len(quotes)} quotes extracted from {len(characters)} characters")
         
-        # Batch the quotes
-        batches = list(batch_records(quotes, Config.BATCH_SIZE))
-        total_batches = len(batches)
-        logs.append(f"📦 Split into {total_batches} batches")
-        
-        # Send batches
-        results = []
-        for i, batch in enumerate(batches, 1):
-            result = send_quote_batch_to_ingestion_api(batch, i, total_batches)
-            results.append(result)
+        # Batch and send the quotes
+        results = send_records(quotes, 'quotes', send_quote_batch_to_ingestion_api, run_id, logs)
+        total_batches = len(results)
         
         # Summary
         successful = sum(1 for r in results if r['success'])
-        failed = sum(1 for r in results if not r['success'])
+        skipped = sum(1 for r in results if r.get('skipped'))
+        failed = len(results) - successful - skipped
         successful_records = sum(r['count'] for r in results if r['success'])
         
-        if failed == 0:
+        if skipped:
+            logs.append(f"🛑 Stopped after {failed} failed batches; {skipped} batches were not sent")
+        dead_letters = sum(1 for r in results if r.get('deadLetterId'))
+        if dead_letters:
+            logs.append(f"📮 {dead_letters} batches saved for replay (POST /dead-letters/replay)")
+        
+        if failed == 0 and skipped == 0:
             logs.append(f"🎉 {successful_records} quotes have been preserved in the archives")
             status = "success"
         else:
@@ -228,7 +308,10 @@ def ingest_quotes(characters):
             'totalQuotes': len(quotes),
             'successfulBatches': successful,
             'failedBatches': failed,
+            'skippedBatches': skipped,
+            'deadLetterBatches': dead_letters,
             'totalBatches': total_batches,
+            'runId': run_id,
             'timestamp': format_datetime_for_datacloud(),
             'logs': logs
         }
@@ -245,12 +328,85 @@ def ingest_quotes(characters):
         }
 
 
-def batch_records(records, batch_size):
+def _timed_send(send, batch, batch_num, total_batches):
+    started = time.monotonic()
+    result = send(batch, batch_num, total_batches)
+    return result, time.monotonic() - started
+
+
+def dispatch_batches(batcher, send, max_in_flight=None, max_failed=None):
     """
-    Split records into batches.
+    Send batches concurrently, yielding (batch, result) in batch order.
+    
+    At most max_in_flight batches are on the wire at once, so a slow round
+    trip no longer stalls the ones behind it. Each result is fed back to the
+    batcher, which sizes the batches still to come; a batch rejected as too
+    large (413) is handed back to it to be split. Cancellation is
+    cooperative: once max_failed batches have failed no new batch is started
+    (requests already in flight finish), and the remaining records are
+    yielded as skipped batches without being sent.
+    
+    Args:
+        batcher: AdaptiveBatcher handing out the batches
+        send: Called as send(batch, batch_num, total_batches); returns a result dict
+        max_in_flight: Concurrent batches (defaults to INGEST_MAX_IN_FLIGHT)
+        max_failed: Failed batches before stopping, 0 to never stop
+                    (defaults to INGEST_MAX_FAILED_BATCHES)
     """
-    for i in range(0, len(records), batch_size):
-        yield records[i:i + batch_size]
+    max_in_flight = max_in_flight or Config.INGEST_MAX_IN_FLIGHT
+    if max_failed is None:
+        max_failed = Config.INGEST_MAX_FAILED_BATCHES
+    
+    failed = 0
+    batch_num = 0
+    in_flight = deque()
+    
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="dc-ingest") as executor:
+        while True:
+            stopping = max_failed and failed >= max_failed
+            while not stopping and len(in_flight) < max_in_flight:
+                batch = batcher.next_batch()
+                if batch is None:
+                    break
+                batch_num += 1
+                future = executor.submit(_timed_send, send, batch, batch_num, batcher.estimated_total())
+                in_flight.append((batch_num, batch, future))
+            
+            if not in_flight:
+                break
+            
+            num, batch, future = in_flight.popleft()
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                logger.error(f"❌ Batch {num} failed: {e}", exc_info=True)
+                result, elapsed = {'success': False, 'batch_num': num, 'count': len(batch), 'error': str(e)}, 0
+            
+            batcher.observe(batch, result['success'], elapsed, result.get('status_code'))
+            if result.get('status_code') == 413 and len(batch) > 1:
+                # Too large, not bad: the records go out again in smaller batches
+                batcher.requeue(batch)
+                continue
+            if not result['success']:
+                failed += 1
+            yield batch, result
+    
+    skipped = 0
+    while True:
+        batch = batcher.next_batch()
+        if batch is None:
+            break
+        batch_num += 1
+        skipped += 1
+        yield batch, {
+            'success': False,
+            'skipped': True,
+            'batch_num': batch_num,
+            'count': len(batch),
+            'error': f'Not sent: stopped after {failed} failed batches'
+        }
+    if skipped:
+        logger.warning(f"🛑 Stopped after {failed} failed batches, skipped {skipped} more")
 
 
 def send_batch_to_ingestion_api(batch, batch_num, total_batches):
@@ -286,14 +442,7 @@ def send_batch_to_ingestion_api(batch, batch_num, total_batches):
     logger.info(f"   Sample record: {json.dumps(batch[0], indent=2)[:500]}")
     
     try:
-        response = requests.post(
-            url,
-            headers=auth.get_headers(),
-            json=payload,
-            timeout=60
-        )
-        
-        response.raise_for_status()
+        response = post_with_retries(url, payload, f"Batch {batch_num}/{total_batches}")
         
         result = response.json()
         logger.info(f"✅ Batch {batch_num}/{total_batches} ingested successfully")
@@ -317,19 +466,18 @@ def send_batch_to_ingestion_api(batch, batch_num, total_batches):
             error_msg += f": {e.response.text[:500]}"
         
         logger.error(f"❌ Batch {batch_num}/{total_batches} failed: {error_msg}")
-        log_error(batch_num, error_msg, batch)
         
         return {
             'success': False,
             'batch_num': batch_num,
             'count': len(batch),
-            'error': error_msg
+            'error': error_msg,
+            'status_code': e.response.status_code
         }
     
     except requests.exceptions.RequestException as e:
         error_msg = f"Network error: {str(e)}"
         logger.error(f"❌ Batch {batch_num}/{total_batches} failed: {error_msg}")
-        log_error(batch_num, error_msg, batch)
         
         return {
             'success': False,
@@ -341,7 +489,6 @@ def send_batch_to_ingestion_api(batch, batch_num, total_batches):
     except Exception as e:
         error_msg = str(e)
         logger.error(f"❌ Batch {batch_num}/{total_batches} failed: {error_msg}", exc_info=True)
-        log_error(batch_num, error_msg, batch)
         
         return {
             'success': False,
@@ -351,42 +498,159 @@ def send_batch_to_ingestion_api(batch, batch_num, total_batches):
         }
 
 
-def log_error(batch_num, error_msg, batch_data):
-    """Log an ingestion error to file"""
+def send_records(records, kind, send, run_id, logs, on_ingested=None):
+    """
+    Batch and send records. Every batch that was not ingested is saved to the
+    dead-letter store, and failed ones are recorded in the error journal.
+    
+    Args:
+        kind: 'characters' or 'quotes' (see dead_letters.KINDS)
+        send: send_batch_to_ingestion_api or send_quote_batch_to_ingestion_api
+        run_id: ID of this ingestion run, stored with dead letters and journal entries
+        logs: The pipeline's logs list
+        on_ingested: Optional callable given each batch the API accepted
+    
+    Returns:
+        List of batch results in batch order
+    """
+    batcher = AdaptiveBatcher(records)
+    logs.append(
+        f"📦 Packing into about {batcher.estimated_total()} batches "
+        f"(up to {batcher.max_bytes // 1000} KB or {batcher.max_records} records each)"
+    )
+    
+    results = []
+    ingested = 0
+    for batch, result in dispatch_batches(batcher, send):
+        results.append(result)
+        if result['success']:
+            ingested += result['count']
+            if on_ingested is not None:
+                on_ingested(batch)
+        else:
+            try:
+                result['deadLetterId'] = get_dead_letter_store().add(
+                    kind, batch, result.get('error'), result.get('status_code'), run_id
+                )
+            except OSError as e:
+                logger.error(f"Could not save failed batch {result['batch_num']} for replay: {e}")
+            if not result.get('skipped'):
+                log_error(result['batch_num'], result.get('error'), batch, run_id, kind,
+                          result.get('status_code'), result.get('deadLetterId'))
+        report_progress(completedBatches=len(results), totalBatches=batcher.estimated_total(), ingestedRecords=ingested)
+    return results
+
+
+def replay_dead_letters(letter_ids=None):
+    """
+    Re-send batches from the dead-letter store. Batches that are ingested are
+    removed from the store; the others stay for a later replay.
+    
+    Args:
+        letter_ids: Optional list of dead letter IDs (every stored batch if None)
+    
+    Returns:
+        Dict with replay summary
+    """
+    logs = JobLogs()
+    run_id = uuid.uuid4().hex[:12]
+    store = get_dead_letter_store()
+    senders = {'characters': send_batch_to_ingestion_api, 'quotes': send_quote_batch_to_ingestion_api}
+    
     try:
-        Config.ensure_directories()
+        letters = store.list()
+        if letter_ids is not None:
+            wanted = set(letter_ids)
+            letters = [letter for letter in letters if letter['id'] in wanted]
+        
+        if not letters:
+            logs.append("📭 No failed batches to replay")
+            return {'status': 'success', 'replayedBatches': 0, 'ingestedCount': 0, 'logs': logs}
+        
+        logs.append(f"📮 Replaying {len(letters)} failed batches...")
+        
+        replayed = 0
+        ingested = 0
+        for i, summary in enumerate(letters, 1):
+            letter = store.get(summary['id'])
+            if letter is None:
+                continue
+            result = senders[letter['kind']](letter['records'], i, len(letters))
+            if result['success']:
+                store.remove(letter['id'])
+                replayed += 1
+                ingested += result['count']
+                if letter['kind'] == 'characters':
+                    get_ingest_ledger().record('characters', letter['records'], 'characterId')
+            else:
+                store.record_failure(letter, result.get('error'), result.get('status_code'))
+                log_error(i, result.get('error'), letter['records'], run_id, letter['kind'],
+                          result.get('status_code'), letter['id'])
+            report_progress(completedBatches=i, totalBatches=len(letters), ingestedRecords=ingested)
+        
+        remaining = len(letters) - replayed
+        if remaining == 0:
+            logs.append(f"🎉 All {replayed} batches replayed ({ingested} records)")
+            status = "success"
+        else:
+            logs.append(f"⚠️ {replayed}/{len(letters)} batches replayed; {remaining} kept for another try")
+            status = "partial"
         
-        error_entry = {
+        return {
+            'status': status,
+            'replayedBatches': replayed,
+            'remainingBatches': remaining,
+            'ingestedCount': ingested,
+            'runId': run_id,
             'timestamp': format_datetime_for_datacloud(),
+            'logs': logs
+        }
+    
+    except Exception as e:
+        error_msg = str(e)
+        logs.append(f"🔥 The messengers were lost again: {error_msg}")
+        logger.error(f"Dead-letter replay failed: {e}", exc_info=True)
+        
+        return {
+            'status': 'error',
+            'error': error_msg,
+            'logs': logs
+        }
+
+
+def log_error(batch_num, error_msg, batch_data, run_id=None, kind='characters',
+              status_code=None, dead_letter_id=None):
+    """Record a failed batch in the error journal"""
+    id_field = 'quoteId' if kind == 'quotes' else 'characterId'
+    try:
+        get_error_journal().append({
+            'timestamp': format_datetime_for_datacloud(),
+            'runId': run_id,
+            'kind': kind,
             'batch_num': batch_num,
             'error': error_msg,
+            'status_code': status_code,
             'record_count': len(batch_data),
-            'sample_ids': [r.get('characterId') for r in batch_data[:3]]
-        }
-        
-        errors = []
-        try:
-            with open(Config.ERROR_LOG_FILE, 'r') as f:
-                errors = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            pass
-        
-        errors.append(error_entry)
-        
-        with open(Config.ERROR_LOG_FILE, 'w') as f:
-            json.dump(errors, f, indent=2)
+            'sample_ids': [r.get(id_field) for r in batch_data[:3]],
+            'deadLetterId': dead_letter_id
+        })
     
     except Exception as e:
         logger.warning(f"Could not write error log: {e}")
 
 
-def ingest_characters(characters):
+def ingest_characters(characters, delta=False):
     """
     Ingest pre-fetched characters into Data Cloud.
     Called from the /ingest endpoint after user confirms.
     
+    Every accepted batch is recorded in the ingestion ledger. In delta mode
+    only characters that are new or changed since they were last ingested
+    are sent.
+    
     Args:
         characters: List of character dicts from LOTR API
+        delta: Send only new or changed characters
     
     Returns:
         Dict with ingestion summary
@@ -394,7 +658,8 @@ def ingest_characters(characters):
     Raises:
         ValueError: If input validation fails
     """
-    logs = []
+    logs = JobLogs()
+    run_id = uuid.uuid4().hex[:12]
     
     try:
         # Validate input
@@ -425,24 +690,54 @@ def ingest_characters(characters):
         
         logs.append(f"✨ {len(transformed)} records prepared for ingestion")
         
-        # Batch the records
-        batches = list(batch_records(transformed, Config.BATCH_SIZE))
-        total_batches = len(batches)
-        logs.append(f"📦 Split into {total_batches} batches")
-        
-        # Send batches to Ingestion API
-        results = []
-        for i, batch in enumerate(batches, 1):
-            result = send_batch_to_ingestion_api(batch, i, total_batches)
-            results.append(result)
+        ledger = get_ingest_ledger()
+        unchanged = 0
+        if delta:
+            transformed, unchanged = ledger.changed('characters', transformed, 'characterId')
+            logs.append(f"🔍 {len(transformed)} new or changed, {unchanged} unchanged since the last ingestion")
+            if not transformed:
+                logs.append("🌿 Nothing has changed in Middle-earth. No records sent.")
+                return {
+                    'status': 'success',
+                    'mode': 'delta',
+                    'ingestedCount': 0,
+                    'totalRecords': 0,
+                    'unchangedRecords': unchanged,
+                    'successfulBatches': 0,
+                    'failedBatches': 0,
+                    'skippedBatches': 0,
+                    'deadLetterBatches': 0,
+                    'totalBatches': 0,
+                    'runId': run_id,
+                    'timestamp': format_datetime_for_datacloud(),
+                    'logs': logs
+                }
+        
+        # Batch and send the records, remembering what was accepted
+        accepted = []
+        results = send_records(transformed, 'characters', send_batch_to_ingestion_api, run_id, logs,
+                               on_ingested=accepted.extend)
+        try:
+            ledger.record('characters', accepted, 'characterId')
+        except OSError as e:
+            # The next delta run just sends these again
+            logger.error(f"Could not update ingestion ledger: {e}")
+        total_batches = len(results)
         
         # Calculate summary
         successful = sum(1 for r in results if r['success'])
-        failed = sum(1 for r in results if not r['success'])
+        skipped = sum(1 for r in results if r.get('skipped'))
+        failed = len(results) - successful - skipped
         total_records = sum(r['count'] for r in results)
         successful_records = sum(r['count'] for r in results if r['success'])
         
-        if failed == 0:
+        if skipped:
+            logs.append(f"🛑 Stopped after {failed} failed batches; {skipped} batches were not sent")
+        dead_letters = sum(1 for r in results if r.get('deadLetterId'))
+        if dead_letters:
+            logs.append(f"📮 {dead_letters} batches saved for replay (POST /dead-letters/replay)")
+        
+        if failed == 0 and skipped == 0:
             logs.append(f"🎉 It is done. {successful_records} records have passed into the West")
             logs.append("✨ You bow to no one. (ingestion complete)")
             status = "success"
@@ -453,11 +748,16 @@ def ingest_characters(characters):
         
         return {
             'status': status,
+            'mode': 'delta' if delta else 'full',
             'ingestedCount': successful_records,
             'totalRecords': total_records,
+            'unchangedRecords': unchanged,
             'successfulBatches': successful,
             'failedBatches': failed,
+            'skippedBatches': skipped,
+            'deadLetterBatches': dead_letters,
             'totalBatches': total_batches,
+            'runId': run_id,
             'timestamp': format_datetime_for_datacloud(),
             'logs': logs
         }
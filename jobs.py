@@ -0,0 +1,458 @@
+"""
+Background Jobs
+Bounded in-process job queue for long operations (ingestion, deletion).
+
+Endpoints submit work and return a job ID straight away; a small worker pool
+runs the jobs and GET /jobs/<id> reports state, progress and the result.
+Pipelines report progress with report_progress(), which is a no-op outside
+a job, so they still work when called directly.
+
+Every job also keeps an ordered event log (state changes, log lines, progress
+with throughput, and the final result). GET /jobs/<id>/events streams it as
+Server-Sent Events: any number of clients can follow the same job, and a
+client that connects late or reconnects is replayed what it missed.
+
+Jobs are also kept under JOB_STATE_DIR, so when the app runs in several
+worker processes, whichever worker a status or event request lands on can
+answer it (read-only) for a job another worker runs: events are appended to
+<id>.events.ndjson as they happen, and <id>.json is rewritten only when the
+job changes state. Files older than JOB_STATE_RETENTION_HOURS are pruned.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+# Events kept per job for late subscribers (older ones are dropped)
+MAX_JOB_EVENTS = 1000
+
+# How often a worker following another worker's job re-reads its files
+STATE_POLL_SECONDS = 0.5
+
+# How often old job files are looked for and removed
+PRUNE_INTERVAL_SECONDS = 600
+
+# The job run by the current worker thread
+_current = threading.local()
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running"""
+
+
+class Job:
+    """One submitted operation, its progress and its event log"""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.state = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._elapsed = None
+        self._events = []
+        self._last_event_id = 0
+        self._events_file = None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # Serializes state file writes, so an older state never lands last
+        self._save_lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.state in (FINISHED, FAILED)
+
+    def update_progress(self, **counters):
+        with self._lock:
+            self.progress.update(counters)
+            if 'ingestedRecords' in self.progress and self._started is not None:
+                elapsed = time.monotonic() - self._started
+                if elapsed > 0:
+                    self.progress['recordsPerSecond'] = round(self.progress['ingestedRecords'] / elapsed, 1)
+            self._publish('progress', dict(self.progress))
+
+    def log(self, message, index=None):
+        """
+        Publish one log line.
+
+        Args:
+            index: The line's position in the logs list the job returns, so
+                   clients can tell which lines of the result they have shown
+        """
+        with self._lock:
+            self._publish('log', {'message': message, 'index': index})
+
+    def events_after(self, last_event_id, timeout=None):
+        """
+        Get the events published after last_event_id, waiting up to timeout
+        seconds for one if there are none yet.
+
+        Returns:
+            Tuple of (list of (event ID, event name, data), whether the job is done)
+        """
+        with self._changed:
+            if self._last_event_id <= last_event_id and not self.done:
+                self._changed.wait(timeout)
+            events = [event for event in self._events if event[0] > last_event_id]
+            return events, self.done
+
+    def to_dict(self):
+        with self._lock:
+            return self._as_dict()
+
+    def _as_dict(self):
+        job = {
+            'jobId': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'progress': dict(self.progress),
+            'createdAt': self.created_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at,
+        }
+        if self._elapsed is not None:
+            job['elapsedSeconds'] = self._elapsed
+        elif self._started is not None:
+            job['elapsedSeconds'] = round(time.monotonic() - self._started, 1)
+        if self.result is not None:
+            job['result'] = self.result
+        if self.error is not None:
+            job['error'] = self.error
+        return job
+
+    def _publish(self, event, data):
+        """Append an event to the log and its file, and wake subscribers (lock held)"""
+        self._last_event_id += 1
+        self._events.append((self._last_event_id, event, data))
+        if len(self._events) > MAX_JOB_EVENTS:
+            del self._events[0]
+        self._changed.notify_all()
+        self._append_event(self._events[-1])
+
+    def _append_event(self, event):
+        """Append one event line to the job's events file (lock held)"""
+        try:
+            if self._events_file is None:
+                self._events_file = open(events_path(self.id), 'a', encoding='utf-8')
+            self._events_file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._events_file.flush()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not save event of job {self.id}: {e}")
+
+    def _save_state(self):
+        """Write the job (without its events) to its state file, on state changes"""
+        with self._save_lock:
+            with self._lock:
+                job = self._as_dict()
+            path = state_path(self.id)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(job, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Could not save state of job {self.id}: {e}")
+
+    def _queue(self):
+        with self._lock:
+            self._publish('state', {'state': QUEUED})
+        self._save_state()
+
+    def _start(self):
+        with self._lock:
+            self.state = RUNNING
+            self.started_at = datetime.now().isoformat()
+            self._started = time.monotonic()
+            self._publish('state', {'state': RUNNING})
+        self._save_state()
+
+    def _finish(self, state, result=None, error=None):
+        with self._lock:
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished_at = datetime.now().isoformat()
+            self._elapsed = round(time.monotonic() - self._started, 1)
+            done = {'state': state, 'elapsedSeconds': self._elapsed}
+            if result is not None:
+                done['result'] = result
+            if error is not None:
+                done['error'] = error
+            self._publish('done', done)
+            if self._events_file is not None:
+                self._events_file.close()
+                self._events_file = None
+        self._save_state()
+
+
+class StoredJob:
+    """Read-only view of a job run by another worker process, from its files"""
+
+    def __init__(self, job_id, job):
+        self.id = job_id
+        self._job = job
+        self._events = []
+        self._offset = 0
+
+    @classmethod
+    def load(cls, job_id):
+        """Load a job's state file, or None if there is none"""
+        job = _read_state(job_id)
+        return cls(job_id, job) if job is not None else None
+
+    @property
+    def done(self):
+        return self._job['state'] in (FINISHED, FAILED) or any(event == 'done' for _, event, _ in self._events[-1:])
+
+    def to_dict(self):
+        self._reload()
+        job = dict(self._job)
+        # The events file runs ahead of the state file, which is only written on
+        # state changes (and just after the done event): take progress and the
+        # outcome from the events
+        for _, event, data in reversed(self._events):
+            if event == 'done' and job['state'] not in (FINISHED, FAILED):
+                job.update({k: v for k, v in data.items() if k in ('state', 'result', 'error', 'elapsedSeconds')})
+            elif event == 'progress':
+                job['progress'] = data
+                break
+        return job
+
+    def events_after(self, last_event_id, timeout=None):
+        """Same as Job.events_after, re-reading the job's files until something changes"""
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            self._reload()
+            events = [event for event in self._events if event[0] > last_event_id]
+            if events or self.done or time.monotonic() >= deadline:
+                return events, self.done
+            time.sleep(STATE_POLL_SECONDS)
+
+    def _reload(self):
+        job = _read_state(self.id)
+        if job is not None:
+            self._job = job
+        self._read_new_events()
+
+    def _read_new_events(self):
+        """Read events appended since the last read (complete lines only)"""
+        try:
+            with open(events_path(self.id), 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+        except OSError:
+            return
+        complete = chunk.rfind(b'\n') + 1
+        self._offset += complete
+        for line in chunk[:complete].splitlines():
+            try:
+                self._events.append(tuple(json.loads(line)))
+            except ValueError:
+                continue
+        del self._events[:-MAX_JOB_EVENTS]
+
+
+def state_path(job_id):
+    """Path of a job's state file"""
+    return os.path.join(Config.JOB_STATE_DIR, f"{job_id}.json")
+
+
+def events_path(job_id):
+    """Path of a job's append-only events file"""
+    return os.path.join(Config.JOB_STATE_DIR, f"{job_id}.events.ndjson")
+
+
+def _read_state(job_id):
+    # Job IDs are uuid4 hex; anything else never names a state file
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+        return None
+    try:
+        with open(state_path(job_id), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove_job_files(job_id):
+    for path in (state_path(job_id), events_path(job_id)):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def prune_job_files(max_age_hours=None):
+    """
+    Remove job files under JOB_STATE_DIR that have not changed for
+    max_age_hours (defaults to JOB_STATE_RETENTION_HOURS), whichever worker
+    or earlier run wrote them.
+
+    Returns:
+        Number of files removed
+    """
+    max_age_hours = Config.JOB_STATE_RETENTION_HOURS if max_age_hours is None else max_age_hours
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(Config.JOB_STATE_DIR))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    if removed:
+        logger.info(f"🧹 Removed {removed} old job files from {Config.JOB_STATE_DIR}")
+    return removed
+
+
+class JobLogs(list):
+    """
+    The logs list a pipeline returns, which also publishes each line to the
+    job running in this thread as it is appended.
+    """
+
+    def append(self, message):
+        super().append(message)
+        job = getattr(_current, 'job', None)
+        if job is not None:
+            job.log(message, len(self) - 1)
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and remembers recent ones"""
+
+    def __init__(self, max_workers=None, max_pending=None, history_size=None):
+        """
+        Args:
+            max_workers: Jobs run at the same time (defaults to JOB_WORKERS)
+            max_pending: Jobs queued or running before submit() refuses more
+                         (defaults to JOB_QUEUE_SIZE)
+            history_size: Finished jobs kept for GET /jobs/<id> (defaults to JOB_HISTORY_SIZE)
+        """
+        self.max_workers = max_workers or Config.JOB_WORKERS
+        self.max_pending = max_pending or Config.JOB_QUEUE_SIZE
+        self.history_size = history_size or Config.JOB_HISTORY_SIZE
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._pruned_at = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use so no threads exist before a server forks its workers
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="lotr-job")
+        return self._executor
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """
+        Queue fn(*args, **kwargs) as a job.
+
+        Returns:
+            The Job
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already queued or running
+        """
+        self._prune_files()
+        job = Job(kind)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} jobs are already queued or running")
+            self._pending += 1
+            self._jobs[job.id] = job
+            self._trim_history()
+            job._queue()
+            self._get_executor().submit(self._run, job, fn, args, kwargs)
+
+        logger.info(f"📋 Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id):
+        """
+        Get a job by ID: this process's Job, a StoredJob if another worker
+        runs it, or None if it is unknown or no longer kept
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return StoredJob.load(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job._start()
+        _current.job = job
+        try:
+            result = fn(*args, **kwargs)
+            job._finish(FINISHED, result=result)
+            logger.info(f"✅ {job.kind} job {job.id} finished")
+        except Exception as e:
+            logger.error(f"🔥 {job.kind} job {job.id} failed: {e}", exc_info=True)
+            job._finish(FAILED, error=str(e))
+        finally:
+            _current.job = None
+            with self._lock:
+                self._pending -= 1
+
+    def _trim_history(self):
+        """Drop the oldest finished jobs beyond history_size (lock held)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in (FINISHED, FAILED)]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del self._jobs[job_id]
+            _remove_job_files(job_id)
+
+    def _prune_files(self):
+        """Remove old job files left by any worker, at most every PRUNE_INTERVAL_SECONDS"""
+        now = time.monotonic()
+        with self._lock:
+            if self._pruned_at is not None and now - self._pruned_at < PRUNE_INTERVAL_SECONDS:
+                return
+            self._pruned_at = now
+        prune_job_files()
+
+
+def report_progress(**counters):
+    """Update the progress counters of the job running in this thread, if any"""
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        job.update_progress(**counters)
+
+
+# Singleton instance
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Get the singleton job manager"""
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = JobManager()
+    return _job_manager
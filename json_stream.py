@@ -0,0 +1,180 @@
+"""
+Streaming JSON decode for One API pages
+Decodes a response body chunk by chunk, handing out the entries of its `docs`
+array as soon as each one is complete. The raw body and a full decoded copy
+of it are never held in memory at the same time.
+"""
+
+import codecs
+import hashlib
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Returned by DocsStream._decode while a value continues in the next chunk
+# (None can't mean that: it is what a JSON null decodes to)
+_INCOMPLETE = object()
+
+
+class DocsStream:
+    """
+    Incremental parser for a top-level JSON object with one large array.
+
+    Feed it text with feed(); each call returns the array entries completed
+    by that chunk. The object's other members (pages, total, ...) end up in
+    `fields`. Call close() after the last chunk.
+    """
+
+    def __init__(self, array_key='docs'):
+        self.array_key = array_key
+        self.fields = {}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'object'
+        self._key = None
+
+    def feed(self, text, final=False):
+        """
+        Parse another chunk of text.
+
+        Returns:
+            List of array entries completed by this chunk
+        """
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        items = []
+
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos >= len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+
+            if self._state == 'object':
+                self._expect(char, '{')
+                self._state = 'key'
+
+            elif self._state == 'key':
+                if char == ',':
+                    self._pos += 1
+                    continue
+                if char == '}':
+                    self._pos += 1
+                    self._state = 'done'
+                    continue
+                key = self._decode(final)
+                if key is _INCOMPLETE:
+                    break
+                self._key = key
+                self._state = 'colon'
+
+            elif self._state == 'colon':
+                self._expect(char, ':')
+                self._state = 'array' if self._key == self.array_key else 'value'
+
+            elif self._state == 'array':
+                if char == '[':
+                    self._pos += 1
+                    self._state = 'item'
+                    continue
+                # Not an array (e.g. null): keep it as a plain member
+                self._state = 'value'
+
+            elif self._state == 'item':
+                if char == ',':
+                    self._pos += 1
+                    continue
+                if char == ']':
+                    self._pos += 1
+                    self._state = 'key'
+                    continue
+                item = self._decode(final)
+                if item is _INCOMPLETE:
+                    break
+                items.append(item)
+
+            elif self._state == 'value':
+                value = self._decode(final)
+                if value is _INCOMPLETE:
+                    break
+                self.fields[self._key] = value
+                self._state = 'key'
+
+            else:
+                raise ValueError(f"Unexpected data after the JSON object at position {self._pos}")
+
+        return items
+
+    def close(self):
+        """
+        Finish parsing once the body is complete.
+
+        Returns:
+            List of any remaining array entries
+        """
+        items = self.feed('', final=True)
+        if self._state != 'done':
+            raise ValueError("Truncated JSON response")
+        return items
+
+    def _expect(self, char, expected):
+        if char != expected:
+            raise ValueError(f"Expected '{expected}' at position {self._pos}, got '{char}'")
+        self._pos += 1
+
+    def _decode(self, final):
+        """Decode one JSON value at the current position, or return _INCOMPLETE if it is not all here yet"""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return _INCOMPLETE
+        # A number at the very end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not final:
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+
+class PageDecoder:
+    """Streams a page body's bytes into a DocsStream while fingerprinting them"""
+
+    def __init__(self, array_key='docs'):
+        self.array_key = array_key
+        self.docs = []
+        self._stream = DocsStream(array_key)
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._digest = hashlib.sha256()
+
+    def feed(self, chunk):
+        """Add a chunk of raw body bytes"""
+        self._digest.update(chunk)
+        self.docs.extend(self._stream.feed(self._text.decode(chunk)))
+
+    def finish(self):
+        """
+        Returns:
+            Tuple of (data, fingerprint): the decoded object, and the SHA-256
+            hex digest of the raw body
+        """
+        self.docs.extend(self._stream.feed(self._text.decode(b'', final=True)))
+        self.docs.extend(self._stream.close())
+        data = dict(self._stream.fields)
+        data[self.array_key] = self.docs
+        return data, self._digest.hexdigest()
+
+
+def decode_page(chunks, array_key='docs'):
+    """
+    Decode a page body from an iterable of byte chunks.
+
+    Returns:
+        Tuple of (data, fingerprint) as PageDecoder.finish
+    """
+    decoder = PageDecoder(array_key)
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder.finish()
@@ -4,15 +4,110 @@ Fetches character, quote, and movie data from The One API with caching support.
 """
 
 import requests
-import json
 import logging
+import os
+import threading
 import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
+import cache_store
 from config import Config
+from enrichment import (
+    attach_sample_quotes, build_quote_index, character_quotes, enrich_characters, sample_index_matches
+)
+from file_lock import locked_file
+from json_stream import decode_page
+from lotr_store import get_store
+from rate_limiter import (
+    RETRYABLE_STATUS_CODES, backoff_delay, get_lotr_rate_limiter, get_lotr_request_slots, parse_retry_after
+)
+from transport import get_transport
 
 logger = logging.getLogger(__name__)
 
+# Items per page requested from The One API
+PAGE_LIMIT = 1000
+
+# Bytes read at a time when stream-decoding a page
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Parsed snapshots shared by every LOTRClient in this process:
+# store dir -> ((manifest mtime_ns, manifest size), data)
+_dataset_memo = {}
+_dataset_lock = threading.Lock()
+
+
+# Whether the version 1 cache file has been checked for migration
+_legacy_checked = False
+
+# Refreshes in progress in this process: cache path -> Future
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Background stale-while-revalidate refresh (one per process)
+_background_refresh = None
+_background_refresh_lock = threading.Lock()
+
+
+@contextmanager
+def _cache_file_lock(path):
+    """
+    Hold an exclusive lock on a file next to the cache, shared by all worker processes.
+    Without fcntl (e.g. on Windows) only threads in this process are coordinated.
+    """
+    Config.ensure_directories()
+    with locked_file(path):
+        yield
+
+
+def _join_refresh(path):
+    """
+    Join the refresh of a cache in progress in this process, or start leading one.
+    
+    Returns:
+        Tuple of (Future the refresh's result is set on, whether the caller leads it).
+        The leader must call _leave_refresh(path) when it is done.
+    """
+    with _inflight_lock:
+        flight = _inflight.get(path)
+        if flight is not None:
+            return flight, False
+        flight = Future()
+        _inflight[path] = flight
+        return flight, True
+
+
+def _leave_refresh(path):
+    """Forget the finished refresh of a cache so the next caller starts a new one"""
+    with _inflight_lock:
+        _inflight.pop(path, None)
+
+
+def _wait_for_retry(delay, cancel=None):
+    """Sleep through a retry backoff, waking early once cancel is set. Returns True if cancelled"""
+    if cancel is None:
+        time.sleep(delay)
+        return False
+    return cancel.wait(delay)
+
+
+def _migrate_legacy_cache(cache_dir):
+    """Convert a version 1 cache file (data/lotr_raw.json) once per process"""
+    global _legacy_checked
+    if _legacy_checked:
+        return
+    with _cache_file_lock(Config.CACHE_LOCK_FILE):
+        cache_store.migrate_legacy_file(Config.CACHE_FILE, cache_dir, compress=Config.CACHE_COMPRESS)
+    _legacy_checked = True
+
+
+def _file_key(path):
+    """Identify a version of a file by its mtime and size"""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
 
 class LOTRClient:
     """Client for The One API"""
@@ -20,7 +115,15 @@ class LOTRClient:
     def __init__(self):
         self.api_key = Config.LOTR_API_KEY
         self.base_url = Config.LOTR_API_BASE_URL
-        self.cache_file = Path(Config.CACHE_FILE)
+        self.cache_dir = Path(Config.CACHE_STORE_DIR)
+        # The manifest is written last, so it identifies the current snapshot
+        self.cache_file = cache_store.manifest_path(self.cache_dir)
+        self.cache_lock_file = Path(Config.CACHE_LOCK_FILE)
+        self.rate_limiter = get_lotr_rate_limiter()
+        self.request_slots = get_lotr_request_slots()
+        self.transport = get_transport()
+        self.store = get_store()
+        _migrate_legacy_cache(self.cache_dir)
     
     def _get_headers(self):
         """Get request headers with API key"""
@@ -29,34 +132,78 @@ class LOTRClient:
             'Accept': 'application/json'
         }
     
-    def _is_cache_valid(self):
-        """Check if cached data exists and is fresh"""
+    def _read_cache_meta(self):
+        """Read freshness metadata (the snapshot manifest) without loading the data"""
+        return cache_store.read_manifest(self.cache_dir)
+    
+    def _cache_age(self):
+        """Get the age of the cached data as a timedelta, or None if there is no usable cache"""
         if not self.cache_file.exists():
-            return False
+            return None
         
         try:
-            with open(self.cache_file, 'r') as f:
-                cache_data = json.load(f)
-            
-            cached_at = datetime.fromisoformat(cache_data['cached_at'])
-            max_age = timedelta(hours=Config.CACHE_MAX_AGE_HOURS)
-            
-            if datetime.now() - cached_at < max_age:
-                logger.info(f"✅ Cache is fresh (age: {datetime.now() - cached_at})")
-                return True
-            else:
-                logger.info(f"⏰ Cache is stale (age: {datetime.now() - cached_at})")
-                return False
+            meta = self._read_cache_meta()
+            if not meta:
+                return None
+            return datetime.now() - datetime.fromisoformat(meta['cached_at'])
         
         except Exception as e:
             logger.warning(f"Error reading cache: {e}")
+            return None
+    
+    def _is_cache_fresh(self):
+        """Same check as _is_cache_valid, without logging (for per-request paths)"""
+        age = self._cache_age()
+        return age is not None and age < timedelta(hours=Config.CACHE_MAX_AGE_HOURS)
+    
+    def _is_cache_valid(self):
+        """Check if cached data exists and is fresh"""
+        age = self._cache_age()
+        if age is None:
+            return False
+        
+        if age < timedelta(hours=Config.CACHE_MAX_AGE_HOURS):
+            logger.info(f"✅ Cache is fresh (age: {age})")
+            return True
+        else:
+            logger.info(f"⏰ Cache is stale (age: {age})")
             return False
     
     def _load_from_cache(self):
-        """Load all data from cache"""
+        """
+        Load all data from cache.
+        
+        The parsed dataset is memoized per process and keyed on the manifest's
+        mtime and size, so it is parsed at most once per change and shared by
+        every caller. Treat the returned dict as read-only.
+        """
         try:
-            with open(self.cache_file, 'r') as f:
-                cache_data = json.load(f)
+            key = _file_key(self.cache_file)
+            path = str(self.cache_dir)
+            
+            with _dataset_lock:
+                memo = _dataset_memo.get(path)
+                if memo and memo[0] == key:
+                    logger.debug("📦 Using in-memory dataset")
+                    return memo[1]
+                
+                manifest = cache_store.read_manifest(self.cache_dir)
+                if not manifest:
+                    return None
+                cache_data = cache_store.read_snapshot(self.cache_dir, manifest)
+                # sampleQuotes are not stored on disk; point them at the saved samples,
+                # or re-enrich if the snapshot predates them or sampling was reconfigured
+                if cache_data.get('quoteIndex') is not None and sample_index_matches(cache_data.get('sampleIndex')):
+                    attach_sample_quotes(
+                        cache_data['characters'], cache_data['quotes'], cache_data['movies'],
+                        cache_data['quoteIndex'], cache_data['sampleIndex']
+                    )
+                else:
+                    cache_data['characters'], cache_data['quoteIndex'], cache_data['sampleIndex'] = enrich_characters(
+                        cache_data['characters'], cache_data['quotes'], cache_data['movies'],
+                        index=cache_data.get('quoteIndex')
+                    )
+                _dataset_memo[path] = (key, cache_data)
             
             logger.info(f"📦 Loaded data from cache")
             return cache_data
@@ -66,123 +213,414 @@ class LOTRClient:
             return None
     
     def _save_to_cache(self, data):
-        """Save all data to cache"""
+        """
+        Save all data to cache in the compact per-entity format.
+        Files are renamed into place, so other workers never read a partial snapshot.
+        """
         try:
             Config.ensure_directories()
             
             data['cached_at'] = datetime.now().isoformat()
+            manifest = cache_store.write_snapshot(self.cache_dir, data, compress=Config.CACHE_COMPRESS)
+            data['snapshotId'] = manifest['generation']
             
-            with open(self.cache_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with _dataset_lock:
+                _dataset_memo[str(self.cache_dir)] = (_file_key(self.cache_file), data)
             
             logger.info(f"💾 Cached all LOTR data")
         
         except Exception as e:
             logger.warning(f"Error saving cache: {e}")
     
-    def _fetch_endpoint(self, endpoint, description):
-        """Fetch data from a specific endpoint with pagination"""
-        all_items = []
-        page = 1
-        total_pages = 1
+    def _fetch_page(self, endpoint, page, total_pages='?', previous=None, cancel=None):
+        """
+        Fetch a single page of an endpoint.
+        Waits for a free request slot and a rate limiter token, both shared process-wide.
+        
+        429s, transient 5xx responses and connection errors are retried with
+        jittered exponential backoff (honoring Retry-After). A 429 also slows
+        the shared rate limiter down. The request slot is released while waiting.
+        
+        Args:
+            previous: Page metadata from the last snapshot; its ETag/Last-Modified
+                      are sent as validators so the API can answer 304
+            cancel: Optional threading.Event; once set, the next attempt or backoff
+                    raises CancelledError instead of waiting
+        
+        Returns:
+            Tuple of (docs, total_pages, page_meta). docs is None when the page is
+            unchanged since the previous snapshot.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        params = {'limit': PAGE_LIMIT, 'page': page}
+        headers = _conditional_headers(self._get_headers(), previous)
         
-        while page <= total_pages:
-            url = f"{self.base_url}/{endpoint}"
-            params = {'limit': 1000, 'page': page}
+        for attempt in range(Config.LOTR_MAX_RETRIES + 1):
+            if cancel is not None and cancel.is_set():
+                raise CancelledError(f"{endpoint} page {page} cancelled")
+            last_attempt = attempt == Config.LOTR_MAX_RETRIES
+            retry_after = None
             
-            logger.info(f"📖 Fetching {description} (page {page}/{total_pages})...")
+            with self.request_slots:
+                self.rate_limiter.acquire()
+                logger.info(f"📖 Fetching {endpoint} (page {page}/{total_pages})...")
+                
+                try:
+                    response = self.transport.get(
+                        url,
+                        headers=headers,
+                        params=params,
+                        stream=True
+                    )
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    if last_attempt:
+                        raise
+                    reason = type(e).__name__
+                else:
+                    with response:
+                        if response.status_code not in RETRYABLE_STATUS_CODES or last_attempt:
+                            response.raise_for_status()
+                            result = self._parse_page(endpoint, page, response, previous)
+                            self.rate_limiter.recover()
+                            return result
+                        reason = response.status_code
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        if response.status_code == 429:
+                            self.rate_limiter.throttle(retry_after)
             
-            response = requests.get(
-                url,
-                headers=self._get_headers(),
-                params=params,
-                timeout=30
+            delay = backoff_delay(attempt, retry_after)
+            logger.warning(
+                f"🔁 {endpoint} page {page} failed ({reason}), "
+                f"retry {attempt + 1}/{Config.LOTR_MAX_RETRIES} in {delay:.1f}s"
             )
-            response.raise_for_status()
-            
-            data = response.json()
-            items = data.get('docs', [])
-            all_items.extend(items)
-            
-            total_pages = data.get('pages', 1)
-            page += 1
+            if _wait_for_retry(delay, cancel):
+                raise CancelledError(f"{endpoint} page {page} cancelled")
+    
+    def _parse_page(self, endpoint, page, response, previous=None):
+        """
+        Turn a successful page response into (docs, total_pages, page_meta).
+        The body is decoded as it streams in, so the raw bytes are never held whole.
+        """
+        if response.status_code == 304 and previous:
+            logger.info(f"♻️  {endpoint} page {page} not modified")
+            return None, previous.get('pages', 1), previous
+        
+        data, fingerprint = decode_page(response.iter_content(STREAM_CHUNK_SIZE))
+        if previous and previous.get('fingerprint') == fingerprint:
+            logger.info(f"♻️  {endpoint} page {page} unchanged (same fingerprint)")
+            return None, previous.get('pages', 1), previous
+        
+        page_meta = _page_meta(page, data, response.headers, fingerprint)
+        return data.get('docs', []), page_meta['pages'], page_meta
+    
+    def _fetch_endpoint(self, endpoint, description, parallel=None, previous=None, cancel=None):
+        """
+        Fetch data from a specific endpoint with pagination.
+        
+        Page 1 tells us how many pages there are. In parallel mode the
+        remaining pages are fetched by a bounded worker pool; every worker
+        shares the same rate limiter so we stay within The One API's limits.
+        
+        Args:
+            previous: Tuple of (items, page_metas) from the last snapshot. Pages the
+                      API reports as unchanged are taken from it instead.
+            cancel: Optional threading.Event that stops the fetch once set. A failing
+                    page sets it too, so the other pages stop retrying.
+        
+        Returns:
+            Tuple of (items, page_metas, changed) where changed is the list of
+            (old_docs, new_docs) for every page that differs from the snapshot
+        """
+        if parallel is None:
+            parallel = Config.LOTR_PARALLEL_FETCH
+        
+        previous_pages = _split_pages(*previous) if previous else {}
+        cancel = cancel or threading.Event()
+        
+        def fetch(page, total_pages='?'):
+            old_meta, old_docs = previous_pages.get(page, (None, None))
+            docs, pages, meta = self._fetch_page(endpoint, page, total_pages, old_meta, cancel)
+            return (old_docs, pages, meta) if docs is None else (docs, pages, meta)
+        
+        results = {1: fetch(1)}
+        total_pages = results[1][1]
+        remaining = list(range(2, total_pages + 1))
+        
+        if remaining and parallel:
+            workers = min(Config.LOTR_FETCH_WORKERS, len(remaining))
+            logger.info(f"🐎 Fetching {len(remaining)} more pages of {description} with {workers} workers")
             
-            # Rate limiting: be nice to the API
-            if page <= total_pages:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"lotr-{endpoint}")
+            futures = {
+                executor.submit(fetch, page, total_pages): page
+                for page in remaining
+            }
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            except Exception:
+                # Don't wait for pages still retrying; they see the event and give up
+                cancel.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+        else:
+            for page in remaining:
+                # Rate limiting: be nice to the API
                 time.sleep(0.5)
+                results[page] = fetch(page, total_pages)
         
-        logger.info(f"✅ Fetched {len(all_items)} {description}")
-        return all_items
+        return _assemble_pages(results, previous_pages, description)
     
-    def fetch_all_data(self, force_refresh=False):
+    def _fetch_endpoints(self, endpoints, previous=None):
+        """
+        Fetch several endpoints concurrently. The first failure is raised right
+        away: queued work is cancelled and running endpoints stop at their next
+        page attempt or backoff instead of retrying to the end.
+        
+        Args:
+            endpoints: List of (endpoint, description) tuples
+            previous: Optional dict of endpoint -> (items, page_metas) from the last snapshot
+        
+        Returns:
+            List of _fetch_endpoint results, in the same order as endpoints
+        """
+        previous = previous or {}
+        cancel = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(endpoints), thread_name_prefix="lotr-fetch")
+        futures = [
+            executor.submit(
+                self._fetch_endpoint, endpoint, description,
+                previous=previous.get(endpoint), cancel=cancel
+            )
+            for endpoint, description in endpoints
+        ]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except Exception:
+            cancel.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return [future.result() for future in futures]
+    
+    def _previous_snapshot(self):
+        """
+        Get (items, page_metas) per endpoint from the cached snapshot, for an
+        incremental refresh, plus the sampleIndex its sampleQuotes were built
+        with. Returns None if there is no usable snapshot.
+        """
+        if not self.cache_file.exists():
+            return None
+        
+        cached = self._load_from_cache()
+        if not cached or 'pages' not in cached:
+            return None
+        
+        return {
+            'character': (cached['characters'], cached['pages'].get('character', [])),
+            'quote': (cached['quotes'], cached['pages'].get('quote', [])),
+            'movie': (cached['movies'], cached['pages'].get('movie', [])),
+            'sampleIndex': cached.get('sampleIndex'),
+        }
+    
+    def fetch_all_data(self, force_refresh=False, incremental=None):
         """
         Fetch all LOTR data: characters, quotes, and movies.
-        Uses cache if available.
+        Uses cache if available. A stale cache younger than CACHE_MAX_STALE_HOURS
+        is served as-is while a background refresh replaces it.
+        
+        Args:
+            force_refresh: Skip the cache freshness check
+            incremental: Revalidate the cached snapshot page by page instead of
+                         downloading everything (defaults to LOTR_INCREMENTAL_REFRESH)
         
         Returns:
             Dict with characters, quotes, movies, and enriched data
         """
         # Try cache first if not forcing refresh
-        if not force_refresh and self._is_cache_valid():
-            cached = self._load_from_cache()
-            if cached:
-                return cached
-        
-        logger.info("🌍 The journey through Middle-earth commences...")
-        logger.info("Fetching all data from The One API...")
-        
-        try:
-            # Fetch all data types
-            characters = self._fetch_endpoint('character', 'characters')
-            time.sleep(1)  # Rate limit pause between endpoints
-            
-            quotes = self._fetch_endpoint('quote', 'quotes')
-            time.sleep(1)
-            
-            movies = self._fetch_endpoint('movie', 'movies')
+        if not force_refresh:
+            age = self._cache_age()
+            if age is not None and age < timedelta(hours=Config.CACHE_MAX_AGE_HOURS):
+                cached = self._load_from_cache()
+                if cached:
+                    logger.info(f"✅ Cache is fresh (age: {age})")
+                    return cached
             
-            # Create lookup maps
-            movie_map = {m['_id']: m for m in movies}
+            # Stale but within the hard limit: serve it now and refresh in the background
+            if (age is not None and Config.CACHE_STALE_WHILE_REVALIDATE
+                    and age < timedelta(hours=Config.CACHE_MAX_STALE_HOURS)):
+                cached = self._load_from_cache()
+                if cached:
+                    logger.info(f"⏰ Cache is stale (age: {age}), serving it while refreshing in the background")
+                    self._start_background_refresh(incremental)
+                    return cached
             
-            # Count quotes per character and collect sample quotes
-            quote_counts = {}
-            sample_quotes = {}
-            for quote in quotes:
-                char_id = quote.get('character')
-                if char_id:
-                    quote_counts[char_id] = quote_counts.get(char_id, 0) + 1
-                    if char_id not in sample_quotes:
-                        sample_quotes[char_id] = []
-                    # Keep all quotes for each character
-                    movie_name = movie_map.get(quote.get('movie'), {}).get('name', 'Unknown')
-                    sample_quotes[char_id].append({
-                        'dialog': quote.get('dialog', ''),
-                        'movie': movie_name
-                    })
+            if age is not None:
+                logger.info(f"⏰ Cache is too stale to serve (age: {age}), refreshing now")
+        
+        return self._refresh(incremental)
+    
+    def _start_background_refresh(self, incremental=None):
+        """
+        Start a background refresh unless one is already running in this process.
+        The new snapshot replaces the old one atomically when it is saved.
+        
+        Returns:
+            True if a refresh was started
+        """
+        global _background_refresh
+        
+        with _background_refresh_lock:
+            if _background_refresh is not None and _background_refresh.is_alive():
+                return False
             
-            # Enrich characters with quote counts
-            for char in characters:
-                char_id = char['_id']
-                char['quoteCount'] = quote_counts.get(char_id, 0)
-                char['sampleQuotes'] = sample_quotes.get(char_id, [])
+            def run():
+                try:
+                    self._refresh(incremental)
+                    logger.info("🔄 Background refresh complete")
+                except Exception as e:
+                    logger.error(f"Background refresh failed, keeping stale data: {e}")
             
-            # Build the complete data package
-            data = {
-                'characters': characters,
-                'quotes': quotes,
-                'movies': movies,
-                'stats': {
-                    'characterCount': len(characters),
-                    'quoteCount': len(quotes),
-                    'movieCount': len(movies),
-                    'charactersWithQuotes': len(quote_counts)
-                }
+            _background_refresh = threading.Thread(target=run, name="lotr-cache-refresh", daemon=True)
+            _background_refresh.start()
+            return True
+    
+    def _refresh(self, incremental=None):
+        """
+        Refresh the cache, coordinating with other callers.
+        
+        Threads in this process that ask for a refresh while one is running
+        wait for it and share its result. Across worker processes, a file lock
+        next to the cache lets one process refresh while the others wait and
+        then read what it saved.
+        
+        Returns:
+            Dict with characters, quotes, movies, and enriched data
+        """
+        path = str(self.cache_file)
+        flight, leader = _join_refresh(path)
+        
+        if not leader:
+            logger.info("⏳ A refresh is already in progress, waiting for it")
+            return flight.result()
+        
+        try:
+            requested_at = datetime.now()
+            with _cache_file_lock(self.cache_lock_file):
+                # Another process may have refreshed while we waited for the lock
+                data = self._load_if_refreshed_since(requested_at)
+                if data is None:
+                    data = self._fetch_fresh(incremental)
+                else:
+                    logger.info("📦 Another worker refreshed the cache, using its data")
+            flight.set_result(data)
+            return data
+        
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        
+        finally:
+            _leave_refresh(path)
+    
+    def _load_if_refreshed_since(self, since):
+        """Load the cache if it was written after `since`, otherwise return None"""
+        try:
+            meta = self._read_cache_meta() if self.cache_file.exists() else None
+            if meta and datetime.fromisoformat(meta['cached_at']) >= since:
+                return self._load_from_cache()
+        except Exception as e:
+            logger.warning(f"Error reading cache: {e}")
+        return None
+    
+    def _build_dataset(self, fetched, previous=None):
+        """
+        Enrich freshly fetched endpoints and package them as a dataset.
+        
+        Args:
+            fetched: [characters, quotes, movies] results of _fetch_endpoint
+            previous: The snapshot the fetch was revalidated against, if any
+        
+        Returns:
+            Dict with characters, quotes, movies, quote index, stats and page metadata
+        """
+        (characters, character_pages, characters_changed), \
+            (quotes, quote_pages, quotes_changed), \
+            (movies, movie_pages, movies_changed) = fetched
+        
+        # Only characters on changed pages, or whose quotes changed, need new enrichment.
+        # Movie names appear in every sample quote, so a movie change means a full pass,
+        # as does sampling reconfigured since the previous snapshot was enriched.
+        affected_ids = None
+        if previous and not movies_changed and sample_index_matches(previous.get('sampleIndex')):
+            affected_ids = set()
+            for old_docs, new_docs in characters_changed:
+                affected_ids.update(c.get('_id') for c in new_docs)
+            for old_docs, new_docs in quotes_changed:
+                affected_ids.update(q.get('character') for q in old_docs)
+                affected_ids.update(q.get('character') for q in new_docs)
+            affected_ids.discard(None)
+            logger.info(f"♻️  Incremental refresh: re-enriching {len(affected_ids)} characters")
+        
+        characters, quote_index, sample_index = enrich_characters(characters, quotes, movies, affected_ids=affected_ids)
+        
+        logger.info(f"🎉 Fetched {len(characters)} characters, {len(quotes)} quotes, {len(movies)} movies")
+        
+        # Build the complete data package
+        return {
+            'characters': characters,
+            'quotes': quotes,
+            'movies': movies,
+            'quoteIndex': quote_index,
+            'sampleIndex': sample_index,
+            'stats': {
+                'characterCount': len(characters),
+                'quoteCount': len(quotes),
+                'movieCount': len(movies),
+                'charactersWithQuotes': len({q.get('character') for q in quotes if q.get('character')})
+            },
+            'pages': {
+                'character': character_pages,
+                'quote': quote_pages,
+                'movie': movie_pages
             }
-            
-            logger.info(f"🎉 Fetched {len(characters)} characters, {len(quotes)} quotes, {len(movies)} movies")
+        }
+    
+    def _fetch_fresh(self, incremental=None):
+        """
+        Download fresh data from The One API, enrich it, and save it to the cache.
+        
+        Args:
+            incremental: Revalidate the cached snapshot page by page instead of
+                         downloading everything (defaults to LOTR_INCREMENTAL_REFRESH)
+        
+        Returns:
+            Dict with characters, quotes, movies, and enriched data
+        """
+        if incremental is None:
+            incremental = Config.LOTR_INCREMENTAL_REFRESH
+        previous = self._previous_snapshot() if incremental else None
+        
+        logger.info("🌍 The journey through Middle-earth commences...")
+        if previous:
+            logger.info("Revalidating cached data against The One API...")
+        else:
+            logger.info("Fetching all data from The One API...")
+        
+        try:
+            # Fetch all data types concurrently; they share one request budget
+            fetched = self._fetch_endpoints([
+                ('character', 'characters'),
+                ('quote', 'quotes'),
+                ('movie', 'movies'),
+            ], previous)
+            data = self._build_dataset(fetched, previous)
             
             # Cache the results
             self._save_to_cache(data)
+            self._sync_store(data)
             
             return data
         
@@ -210,9 +648,80 @@ class LOTRClient:
         """
         Get list of character IDs (for deletion operations).
         """
+        store = self.get_store()
+        if store is not None:
+            return store.get_character_ids()
+        
         data = self.fetch_all_data()
         return [char['_id'] for char in data['characters'] if '_id' in char]
     
+    def get_character_quotes(self, char_id):
+        """
+        Get all quotes for one character as {'dialog', 'movie'} dicts,
+        whatever QUOTE_SAMPLE_MODE trims sampleQuotes to.
+        Returns None if the character does not exist.
+        """
+        return self.get_quotes_for_characters([char_id]).get(char_id)
+    
+    def get_quotes_for_characters(self, char_ids):
+        """
+        Get the full quote list of several characters.
+        
+        Returns:
+            Dict of character ID -> list of {'dialog', 'movie'} dicts, in API
+            order (the order behind Data Cloud quote IDs). Unknown IDs are left out.
+        """
+        store = self.get_store()
+        if store is not None:
+            return store.get_quotes_for_characters(char_ids)
+        
+        return quotes_for_characters(self.fetch_all_data(), char_ids)
+    
+    def get_store(self):
+        """
+        Get the SQLite store synced with the current snapshot, or None if it is disabled.
+        A store behind a fresh cache is filled by streaming the snapshot files, so the
+        full dataset is only loaded when the cache itself has to be refreshed.
+        """
+        if self.store is None:
+            return None
+        
+        manifest = self._read_cache_meta()
+        if manifest is None or not self._is_cache_fresh():
+            self._sync_store(self.fetch_all_data())
+        elif self.store.get_snapshot_id() != manifest.get('generation'):
+            if not self._stream_cache_to_store(manifest):
+                self._sync_store(self.fetch_all_data())
+        
+        return self.store
+    
+    def _stream_cache_to_store(self, manifest):
+        """
+        Copy a cached snapshot into the SQLite store one record at a time.
+        
+        Returns:
+            True if the store now holds the manifest's generation
+        """
+        try:
+            self.store.replace_all(
+                cache_store.stream_snapshot(self.cache_dir, manifest), manifest['generation']
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Error streaming cache into SQLite store: {e}")
+            return False
+    
+    def _sync_store(self, data):
+        """Load a snapshot into the SQLite store if it is enabled and behind"""
+        if self.store is None or not data or not data.get('snapshotId'):
+            return
+        
+        try:
+            if self.store.get_snapshot_id() != data['snapshotId']:
+                self.store.replace_all(data, data['snapshotId'])
+        except Exception as e:
+            logger.warning(f"Error updating SQLite store: {e}")
+    
     def get_characters(self):
         """
         Get full character data including sampleQuotes (for deletion operations).
@@ -221,6 +730,98 @@ class LOTRClient:
         return data['characters']
 
 
+def quotes_for_characters(data, char_ids):
+    """
+    Get the full quote list of several characters from a dataset.
+    
+    Returns:
+        Dict of character ID -> list of {'dialog', 'movie'} dicts (unknown IDs left out)
+    """
+    known_ids = {char.get('_id') for char in data['characters']}
+    index = data.get('quoteIndex')
+    if index is None:
+        index = build_quote_index(data['quotes'])
+    return {
+        char_id: character_quotes(char_id, data['quotes'], data['movies'], index)
+        for char_id in char_ids
+        if char_id in known_ids
+    }
+
+
+def _conditional_headers(headers, previous):
+    """Add If-None-Match / If-Modified-Since from a previous page's metadata"""
+    if previous:
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('lastModified'):
+            headers['If-Modified-Since'] = previous['lastModified']
+    return headers
+
+
+def _page_meta(page, data, response_headers, fingerprint):
+    """Build the metadata stored for one fetched page"""
+    return {
+        'page': page,
+        'pages': data.get('pages', 1),
+        'count': len(data.get('docs', [])),
+        'etag': response_headers.get('ETag'),
+        'lastModified': response_headers.get('Last-Modified'),
+        'fingerprint': fingerprint
+    }
+
+
+def _split_pages(items, page_metas):
+    """
+    Split a snapshot's flat item list back into pages.
+    
+    Returns:
+        Dict of page number -> (page_meta, docs)
+    """
+    pages = {}
+    offset = 0
+    for meta in page_metas:
+        count = meta.get('count', 0)
+        pages[meta['page']] = (meta, items[offset:offset + count])
+        offset += count
+    return pages
+
+
+def _assemble_pages(results, previous_pages, description):
+    """
+    Join fetched pages back into one item list and work out what changed.
+    
+    Args:
+        results: Dict of page number -> (docs, total_pages, page_meta)
+        previous_pages: Output of _split_pages for the previous snapshot ({} if none)
+    
+    Returns:
+        Tuple of (items, page_metas, changed) as returned by _fetch_endpoint
+    """
+    all_items = []
+    page_metas = []
+    changed = []
+    reused = 0
+    for page in sorted(results):
+        docs, _, meta = results[page]
+        all_items.extend(docs)
+        page_metas.append(meta)
+        old_meta, old_docs = previous_pages.get(page, (None, None))
+        if meta is old_meta:
+            reused += 1
+        else:
+            changed.append((old_docs or [], docs))
+    
+    # Pages that disappeared since the last snapshot also count as changed
+    for page in sorted(set(previous_pages) - set(results)):
+        changed.append((previous_pages[page][1], []))
+    
+    if previous_pages:
+        logger.info(f"✅ Fetched {len(all_items)} {description} ({reused}/{len(page_metas)} pages reused)")
+    else:
+        logger.info(f"✅ Fetched {len(all_items)} {description}")
+    return all_items, page_metas, changed
+
+
 # Convenience functions
 def fetch_characters(force_refresh=False):
     """Fetch LOTR characters (convenience function)"""
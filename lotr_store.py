@@ -0,0 +1,262 @@
+"""
+LOTR SQLite Store
+Optional embedded store for characters, quotes and movies with indexes for
+targeted reads (a few characters' quotes, characters by race or realm,
+every character or quote ID) without loading the whole dataset into memory.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from character_index import SORT_FIELDS
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    race TEXT,
+    realm TEXT,
+    quote_count INTEGER NOT NULL DEFAULT 0,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quotes (
+    id TEXT PRIMARY KEY,
+    character_id TEXT,
+    movie_id TEXT,
+    dialog TEXT,
+    seq INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS movies (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_character ON quotes (character_id, seq);
+CREATE INDEX IF NOT EXISTS idx_characters_race ON characters (race COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_characters_realm ON characters (realm COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_characters_name ON characters (name COLLATE NOCASE);
+"""
+
+# Character fields kept out of the stored document (rebuilt from the quotes table)
+DERIVED_CHARACTER_FIELDS = ('sampleQuotes',)
+
+# IDs bound per IN (...) query, under SQLite's default variable limit
+MAX_QUERY_PARAMS = 500
+
+
+def _searchable(value):
+    """Stored form of a searchable column; the API uses 'NaN' for unknown"""
+    if not value or value == 'NaN':
+        return ''
+    return str(value)
+
+
+class LOTRStore:
+    """SQLite-backed store for one LOTR snapshot"""
+
+    def __init__(self, db_file=None):
+        self.db_file = Path(db_file or Config.SQLITE_STORE_FILE)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # WAL lets worker processes read while another one repopulates
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one operation (commits on success)"""
+        conn = sqlite3.connect(str(self.db_file), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_snapshot_id(self):
+        """Get the id of the snapshot currently loaded, or None if empty"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'snapshot_id'").fetchone()
+        return row['value'] if row else None
+
+    def replace_all(self, data, snapshot_id):
+        """
+        Replace the stored snapshot in a single transaction.
+
+        Rows are inserted as the records are read, so the entities can be
+        iterators (e.g. cache_store.stream_snapshot) rather than whole lists.
+
+        Args:
+            data: Dict with characters, quotes and movies (lists or iterables)
+            snapshot_id: Identifier of the snapshot (cache generation)
+        """
+        characters = (
+            (
+                c['_id'],
+                _searchable(c.get('name')),
+                _searchable(c.get('race')),
+                _searchable(c.get('realm')),
+                c.get('quoteCount', 0),
+                json.dumps({k: v for k, v in c.items() if k not in DERIVED_CHARACTER_FIELDS})
+            )
+            for c in data['characters'] if c.get('_id')
+        )
+        quotes = (
+            (q['_id'], q.get('character'), q.get('movie'), q.get('dialog', ''), seq)
+            for seq, q in enumerate(data['quotes']) if q.get('_id')
+        )
+        movies = (
+            (m['_id'], m.get('name'), json.dumps(m))
+            for m in data['movies'] if m.get('_id')
+        )
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM characters")
+            conn.execute("DELETE FROM quotes")
+            conn.execute("DELETE FROM movies")
+            stored_characters = conn.executemany(
+                "INSERT OR REPLACE INTO characters VALUES (?, ?, ?, ?, ?, ?)", characters
+            ).rowcount
+            stored_quotes = conn.executemany("INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?, ?)", quotes).rowcount
+            stored_movies = conn.executemany("INSERT OR REPLACE INTO movies VALUES (?, ?, ?)", movies).rowcount
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('snapshot_id', ?)",
+                (snapshot_id,)
+            )
+
+        logger.info(
+            f"🗄️  Stored {stored_characters} characters, {stored_quotes} quotes, "
+            f"{stored_movies} movies in {self.db_file}"
+        )
+
+    def get_character(self, char_id):
+        """Get one character (without sampleQuotes), or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT doc FROM characters WHERE id = ?", (char_id,)).fetchone()
+        return json.loads(row['doc']) if row else None
+
+    def find_characters(self, search=None, race=None, realm=None, sort='quoteCount', descending=None,
+                        offset=0, limit=50):
+        """
+        Filter, sort and page characters with the same rules as
+        character_index.CharacterIndex.query, using the race/realm/name indexes.
+
+        Args:
+            search: Case-insensitive substring of name, race or realm
+            race: Exact race (case-insensitive)
+            realm: Exact realm (case-insensitive)
+            sort: One of character_index.SORT_FIELDS
+            descending: Sort direction (defaults to descending for quoteCount,
+                        ascending for name)
+
+        Returns:
+            Tuple of (total matches, list of characters without sampleQuotes)
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort field: {sort}")
+        if descending is None:
+            descending = sort == 'quoteCount'
+
+        clauses = []
+        params = []
+        if race:
+            clauses.append("race = ? COLLATE NOCASE")
+            params.append(_searchable(race))
+        if realm:
+            clauses.append("realm = ? COLLATE NOCASE")
+            params.append(_searchable(realm))
+        needle = _searchable(search)
+        if needle:
+            pattern = '%' + needle.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append(
+                "(name LIKE ? ESCAPE '\\' OR race LIKE ? ESCAPE '\\' OR realm LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern] * 3)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        direction = "DESC" if descending else "ASC"
+        if sort == 'name':
+            order = f"name COLLATE NOCASE {direction}"
+        else:
+            # Quote count ties are ordered by name
+            order = f"quote_count {direction}, name COLLATE NOCASE"
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM characters{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT doc FROM characters{where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return total, [json.loads(row['doc']) for row in rows]
+
+    def get_character_ids(self):
+        """Get every stored character ID"""
+        with self._connect() as conn:
+            return [row['id'] for row in conn.execute("SELECT id FROM characters")]
+
+    def get_quotes_for_characters(self, char_ids):
+        """
+        Get several characters' quotes in sampleQuotes form, in API order,
+        with one query per chunk of IDs on a single connection.
+
+        Returns:
+            Dict of character ID -> list of {'dialog', 'movie'} dicts
+            (characters that are not stored are left out)
+        """
+        char_ids = list(dict.fromkeys(char_ids))
+        quotes = {}
+        with self._connect() as conn:
+            for start in range(0, len(char_ids), MAX_QUERY_PARAMS):
+                chunk = char_ids[start:start + MAX_QUERY_PARAMS]
+                placeholders = ', '.join('?' * len(chunk))
+                for row in conn.execute(f"SELECT id FROM characters WHERE id IN ({placeholders})", chunk):
+                    quotes[row['id']] = []
+                rows = conn.execute(
+                    f"""
+                    SELECT q.character_id, q.dialog, COALESCE(m.name, 'Unknown') AS movie
+                    FROM quotes q LEFT JOIN movies m ON m.id = q.movie_id
+                    WHERE q.character_id IN ({placeholders})
+                    ORDER BY q.seq
+                    """,
+                    chunk
+                )
+                for row in rows:
+                    if row['character_id'] in quotes:
+                        quotes[row['character_id']].append({'dialog': row['dialog'], 'movie': row['movie']})
+        return quotes
+
+    def get_quote_ids(self):
+        """
+        Get the Data Cloud quote IDs ({characterId}_{index}) for every stored character.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, quote_count FROM characters WHERE quote_count > 0").fetchall()
+        return [f"{row['id']}_{idx}" for row in rows for idx in range(row['quote_count'])]
+
+
+# Singleton instance
+_store_instance = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Get the singleton store, or None if the SQLite store is disabled"""
+    global _store_instance
+    if not Config.SQLITE_STORE_ENABLED:
+        return None
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                _store_instance = LOTRStore()
+    return _store_instance
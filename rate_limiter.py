@@ -0,0 +1,178 @@
+"""
+Rate Limiter
+Global request budget for The One API: a token bucket for request rate
+(100 requests every 10 minutes per API key) and a semaphore capping how
+many requests are in flight at once across all endpoints.
+
+Also holds the retry backoff shared by the sync and async clients. When the
+API throttles us the bucket halves its rate and honors Retry-After, then
+creeps back up to the configured rate as requests succeed.
+"""
+
+import random
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+# Responses worth retrying: throttling and transient server errors
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter with adaptive slow-down"""
+
+    # Fraction of the configured rate regained per successful request after throttling
+    RECOVERY_STEP = 0.1
+
+    def __init__(self, rate, capacity, min_rate=None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (burst size)
+            min_rate: Lowest rate throttle() may drop to (defaults to a tenth of rate)
+        """
+        self.rate = float(rate)
+        self.max_rate = self.rate
+        self.min_rate = float(min_rate) if min_rate is not None else self.rate / 10
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill (lock held)"""
+        now = time.monotonic()
+        # No tokens accrue while paused by a Retry-After
+        start = max(self.updated_at, self.blocked_until)
+        if now > start:
+            self.tokens = min(self.capacity, self.tokens + (now - start) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens without blocking.
+
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        with self._lock:
+            self._refill()
+            if self.updated_at < self.blocked_until:
+                return self.blocked_until - self.updated_at
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Block until tokens are available.
+
+        Returns:
+            True if acquired, False if the timeout elapsed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return True
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+
+            logger.debug(f"⏳ Rate limit reached, waiting {wait:.2f}s")
+            time.sleep(wait)
+
+    def throttle(self, retry_after=None):
+        """
+        Slow down after the server throttled us: halve the rate, drop any
+        saved-up burst, and hand out no tokens for retry_after seconds.
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, self.updated_at + retry_after)
+        logger.warning(f"🐢 Throttled by the API, request rate lowered to {self.rate * 60:.1f}/min")
+
+    def recover(self):
+        """Step the rate back towards the configured rate after a successful request"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate * self.RECOVERY_STEP)
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta seconds or an HTTP date).
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt, retry_after=None, base=None, cap=None):
+    """
+    Seconds to wait before retry number `attempt` (0 for the first retry).
+
+    Uses exponential backoff with full jitter, so workers that failed together
+    don't retry together. A Retry-After from the server is a lower bound.
+    """
+    base = Config.LOTR_RETRY_BASE_SECONDS if base is None else base
+    cap = Config.LOTR_RETRY_MAX_SECONDS if cap is None else cap
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after + random.uniform(0, base))
+    return delay
+
+
+# Singleton instances
+_lotr_limiter = None
+_lotr_request_slots = None
+_lotr_limiter_lock = threading.Lock()
+
+
+def get_lotr_rate_limiter():
+    """Get the singleton rate limiter for The One API"""
+    global _lotr_limiter
+    if _lotr_limiter is None:
+        with _lotr_limiter_lock:
+            if _lotr_limiter is None:
+                _lotr_limiter = TokenBucket(
+                    rate=Config.LOTR_RATE_LIMIT / Config.LOTR_RATE_PERIOD_SECONDS,
+                    capacity=Config.LOTR_RATE_BURST
+                )
+    return _lotr_limiter
+
+
+def get_lotr_request_slots():
+    """Get the singleton semaphore bounding in-flight One API requests"""
+    global _lotr_request_slots
+    if _lotr_request_slots is None:
+        with _lotr_limiter_lock:
+            if _lotr_request_slots is None:
+                _lotr_request_slots = threading.BoundedSemaphore(Config.LOTR_FETCH_WORKERS)
+    return _lotr_request_slots
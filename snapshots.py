@@ -0,0 +1,104 @@
+"""
+Dataset Snapshot Registry
+Keeps the datasets handed out by /fetch so the ingest endpoints can refer to
+one by ID instead of receiving the whole characters array back.
+
+Snapshots are immutable: the ID is the cache generation, and a dataset is
+never modified after it is registered. The most recent ones are kept in
+memory. A snapshot this worker has not seen is loaded from the cache if it
+is the current one, so any worker can serve an ID handed out by another.
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from config import Config
+from lotr_client import LOTRClient
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotRegistry:
+    """Thread-safe, bounded map of snapshot ID -> dataset"""
+
+    def __init__(self, max_snapshots=None):
+        """
+        Args:
+            max_snapshots: Number of snapshots kept in memory (defaults to SNAPSHOT_REGISTRY_SIZE)
+        """
+        self.max_snapshots = max_snapshots or Config.SNAPSHOT_REGISTRY_SIZE
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def register(self, data):
+        """
+        Register a dataset and return its snapshot ID.
+        Datasets that were never cached (no snapshotId) get a one-off ID.
+        """
+        snapshot_id = data.get('snapshotId') or f"mem-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._snapshots[snapshot_id] = data
+            self._snapshots.move_to_end(snapshot_id)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def get(self, snapshot_id):
+        """
+        Get a registered dataset.
+
+        Returns:
+            The dataset, or None if the snapshot is unknown or has expired
+        """
+        with self._lock:
+            data = self._snapshots.get(snapshot_id)
+            if data is not None:
+                self._snapshots.move_to_end(snapshot_id)
+                return data
+
+        # Registered by another worker: it is still on disk if it is the current snapshot.
+        # The manifest is checked first so unknown or stale IDs never load the dataset.
+        client = LOTRClient()
+        manifest = client._read_cache_meta()
+        if manifest is None or manifest.get('generation') != snapshot_id:
+            return None
+        data = client._load_from_cache()
+        if data is not None and data.get('snapshotId') == snapshot_id:
+            self.register(data)
+            return data
+        return None
+
+
+def select_characters(data, character_ids=None):
+    """
+    Pick characters from a snapshot, in snapshot order.
+
+    Args:
+        character_ids: Optional list of IDs to keep (all characters if None)
+
+    Returns:
+        Tuple of (characters, missing_ids)
+    """
+    if character_ids is None:
+        return data['characters'], []
+
+    wanted = set(character_ids)
+    characters = [char for char in data['characters'] if char.get('_id') in wanted]
+    found = {char['_id'] for char in characters}
+    return characters, [char_id for char_id in character_ids if char_id not in found]
+
+
+# Singleton instance
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_snapshot_registry():
+    """Get the singleton snapshot registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SnapshotRegistry()
+    return _registry
@@ -31,13 +31,22 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
+# Production mode: gunicorn with preloaded, forked workers (see gunicorn.conf.py)
+if [ "$1" = "--production" ]; then
+    echo "🏰 Starting production server (gunicorn)..."
+    echo ""
+    echo "Workers and threads are set by SERVER_WORKERS / SERVER_THREADS in .env"
+    echo ""
+    exec gunicorn -c gunicorn.conf.py wsgi:app
+fi
+
 # Start Flask app
 echo "🚀 Starting Flask application..."
 echo ""
 echo "Open your browser to: http://localhost:5001"
 echo ""
 echo "Press Ctrl+C to stop the server."
+echo "(For concurrent users, run ./start.sh --production instead.)"
 echo ""
 
 python app.py
-
@@ -6,6 +6,7 @@ const wipeBtn = document.getElementById('wipeBtn');
 const confirmBtn = document.getElementById('confirmBtn');
 const confirmQuotesBtn = document.getElementById('confirmQuotesBtn');
 const cancelBtn = document.getElementById('cancelBtn');
+const deltaCheckbox = document.getElementById('deltaCheckbox');
 const spinner = document.getElementById('spinner');
 const spinnerText = document.getElementById('spinnerText');
 const previewSection = document.getElementById('previewSection');
@@ -48,6 +49,7 @@ let currentJsonView = 'characters';
 // Constants
 const MAX_CHARACTERS = 10000;
 const MAX_LOG_ENTRIES = 50;
+const JOB_POLL_INTERVAL_MS = 1000;
 
 /**
  * Escape HTML to prevent XSS attacks
@@ -207,17 +209,13 @@ function showCharacterDetail(char) {
     
     // Build quotes HTML safely
     let quotesHtml = '';
-    if (char.sampleQuotes && char.sampleQuotes.length > 0) {
-        quotesHtml = char.sampleQuotes.map(q => {
-            const dialog = escapeHtml(q.dialog || '');
-            const movie = escapeHtml(q.movie || 'Unknown');
-            return `
-                <div class="quote-item">
-                    <div class="quote-text">"${dialog}"</div>
-                    <div class="quote-movie">— ${movie}</div>
-                </div>
-            `;
-        }).join('');
+    const sampleQuotes = char.sampleQuotes || [];
+    if (sampleQuotes.length > 0) {
+        quotesHtml = renderQuoteItems(sampleQuotes);
+        // sampleQuotes may be trimmed on the server (QUOTE_SAMPLE_MODE)
+        if (quoteCount > sampleQuotes.length) {
+            quotesHtml += `<button class="show-all-quotes" onclick="loadAllQuotes()">Show all ${quoteCount} quotes</button>`;
+        }
     } else {
         quotesHtml = '<p class="no-quotes">This character has no recorded quotes in the films.</p>';
     }
@@ -273,6 +271,47 @@ function showCharacterDetail(char) {
     characterDetail.scrollIntoView({ behavior: 'smooth', block: 'start' });
 }
 
+/**
+ * Build quote items HTML safely
+ */
+function renderQuoteItems(quotes) {
+    return quotes.map(q => {
+        const dialog = escapeHtml(q.dialog || '');
+        const movie = escapeHtml(q.movie || 'Unknown');
+        return `
+            <div class="quote-item">
+                <div class="quote-text">"${dialog}"</div>
+                <div class="quote-movie">— ${movie}</div>
+            </div>
+        `;
+    }).join('');
+}
+
+/**
+ * Replace the sampled quotes of the selected character with all of its quotes
+ */
+async function loadAllQuotes() {
+    const charId = selectedCharacterId;
+    const quotesList = characterDetail.querySelector('.quotes-list');
+    if (!charId || !quotesList) return;
+    
+    try {
+        const response = await fetch(`/characters/${encodeURIComponent(charId)}/quotes`);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+        const data = await response.json();
+        // Ignore the answer if another character was opened meanwhile
+        if (selectedCharacterId === charId) {
+            quotesList.innerHTML = renderQuoteItems(data.quotes || []);
+        }
+    } catch (error) {
+        addLogEntry(`🔥 Could not load quotes: ${error.message}`, true);
+    }
+}
+
+window.loadAllQuotes = loadAllQuotes;
+
 /**
  * Close character detail
  */
@@ -385,6 +424,136 @@ function setupTabs() {
     });
 }
 
+/**
+ * Body for /ingest and /ingest-quotes: the server already holds the fetched
+ * snapshot, so only its ID is sent (older servers get the characters array)
+ */
+function ingestRequestBody() {
+    if (fetchedData.snapshotId) {
+        return { snapshotId: fetchedData.snapshotId };
+    }
+    return { characters: fetchedData.characters };
+}
+
+/**
+ * Spinner text for a job's progress counters
+ */
+function showJobProgress(label, progress) {
+    if (progress.totalBatches) {
+        const rate = progress.recordsPerSecond ? `, ${progress.recordsPerSecond} records/s` : '';
+        spinnerText.textContent = `${label} (batch ${progress.completedBatches}/${progress.totalBatches}, ${progress.ingestedRecords} records${rate})`;
+    } else if (progress.totalSteps) {
+        spinnerText.textContent = `${label} (step ${progress.step}/${progress.totalSteps})`;
+    }
+}
+
+/**
+ * Follow a job's Server-Sent Events: log lines appear as they happen.
+ * Resolves with {result, shownLogs}; rejects if the stream breaks
+ * before the job is done (with the shownLogs set so far), so the
+ * caller can fall back to polling.
+ */
+function followJobEvents(jobId, label) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`/jobs/${encodeURIComponent(jobId)}/events`);
+        // Positions in result.logs of the lines shown live. Keyed on the
+        // server's index, not a count: the server trims old events, so a late
+        // subscriber may never see the first lines.
+        const shownLogs = new Set();
+        
+        source.addEventListener('log', event => {
+            const log = JSON.parse(event.data);
+            addLogEntry(log.message);
+            if (Number.isInteger(log.index)) shownLogs.add(log.index);
+        });
+        source.addEventListener('progress', event => {
+            showJobProgress(label, JSON.parse(event.data));
+        });
+        source.addEventListener('done', event => {
+            source.close();
+            const done = JSON.parse(event.data);
+            if (done.state === 'failed') {
+                reject(Object.assign(new Error(done.error || 'The job failed'), { jobFailed: true }));
+            } else {
+                resolve({ result: done.result, shownLogs });
+            }
+        });
+        source.onerror = () => {
+            source.close();
+            reject(Object.assign(new Error('Event stream interrupted'), { shownLogs }));
+        };
+    });
+}
+
+/**
+ * Poll GET /jobs/<jobId> until the job is done and return its result
+ */
+async function pollJob(jobId, label) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        
+        const jobResponse = await fetch(`/jobs/${encodeURIComponent(jobId)}`);
+        if (!jobResponse.ok) {
+            throw new Error(`HTTP ${jobResponse.status}: ${jobResponse.statusText}`);
+        }
+        const job = await jobResponse.json();
+        
+        if (job.state === 'finished') {
+            return job.result;
+        }
+        if (job.state === 'failed') {
+            throw new Error(job.error || 'The job failed');
+        }
+        showJobProgress(label, job.progress || {});
+    }
+}
+
+/**
+ * Ingest and wipe run as background jobs: the POST answers with a jobId,
+ * and the job's events (or, without EventSource, GET /jobs/<jobId>) report
+ * progress until it finishes.
+ * Returns the job's result (the same summary the endpoints used to return),
+ * without the log lines that were already shown live.
+ */
+async function waitForJob(response, label) {
+    if (response.status === 503) {
+        throw new Error('The server is busy with other jobs. Try again shortly.');
+    }
+    
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+    
+    const accepted = await response.json();
+    if (!accepted.jobId) {
+        return accepted;
+    }
+    
+    if (accepted.logs && Array.isArray(accepted.logs)) {
+        accepted.logs.forEach(log => addLogEntry(log));
+    }
+    
+    let shownLogs = new Set();
+    let result;
+    if (window.EventSource) {
+        try {
+            ({ result, shownLogs } = await followJobEvents(accepted.jobId, label));
+        } catch (error) {
+            if (error.jobFailed) throw error;
+            console.warn('Job event stream unavailable, polling instead:', error);
+            shownLogs = error.shownLogs || shownLogs;
+        }
+    }
+    if (result === undefined) {
+        result = await pollJob(accepted.jobId, label);
+    }
+    
+    if (result && Array.isArray(result.logs)) {
+        return { ...result, logs: result.logs.filter((_, index) => !shownLogs.has(index)) };
+    }
+    return result;
+}
+
 /**
  * Step 1: Fetch data
  */
@@ -399,11 +568,8 @@ async function handleFetch() {
     closeCharacterDetail();
     
     try {
-        const response = await fetch('/fetch', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({})
-        });
+        // GET lets the browser revalidate its cached copy (304 when unchanged)
+        const response = await fetch('/fetch');
         
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}: ${response.statusText}`);
@@ -488,14 +654,17 @@ async function handleConfirm() {
         const response = await fetch('/ingest', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ characters: fetchedData.characters })
+            body: JSON.stringify({
+                ...ingestRequestBody(),
+                delta: Boolean(deltaCheckbox && deltaCheckbox.checked)
+            })
         });
         
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        if (response.status === 410) {
+            throw new Error('The fetched data has expired on the server. Fetch again!');
         }
         
-        const data = await response.json();
+        const data = await waitForJob(response, 'Forging records in the fires of Mount Doom');
         
         if (data.logs && Array.isArray(data.logs)) {
             data.logs.forEach(log => addLogEntry(log, data.status === 'error'));
@@ -551,7 +720,8 @@ async function handleConfirmQuotes() {
     }
     
     // Check if there are any quotes
-    const totalQuotes = fetchedData.characters.reduce((sum, c) => sum + (c.sampleQuotes?.length || 0), 0);
+    // quoteCount covers every quote; sampleQuotes may be trimmed
+    const totalQuotes = fetchedData.characters.reduce((sum, c) => sum + (c.quoteCount ?? c.sampleQuotes?.length ?? 0), 0);
     if (totalQuotes === 0) {
         addLogEntry('🔥 No quotes found in character data', true);
         return;
@@ -564,14 +734,14 @@ async function handleConfirmQuotes() {
         const response = await fetch('/ingest-quotes', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ characters: fetchedData.characters })
+            body: JSON.stringify(ingestRequestBody())
         });
         
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        if (response.status === 410) {
+            throw new Error('The fetched data has expired on the server. Fetch again!');
         }
         
-        const data = await response.json();
+        const data = await waitForJob(response, 'Sending quotes to Data Cloud');
         
         if (data.logs && Array.isArray(data.logs)) {
             data.logs.forEach(log => addLogEntry(log, data.status === 'error'));
@@ -647,11 +817,7 @@ async function handleWipe() {
             body: JSON.stringify({})
         });
         
-        if (!response.ok) {
-            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-        }
-        
-        const data = await response.json();
+        const data = await waitForJob(response, 'Deleting records from Data Cloud');
         
         if (data.logs && Array.isArray(data.logs)) {
             data.logs.forEach(log => addLogEntry(log, data.status === 'error'));
@@ -0,0 +1,114 @@
+"""
+Tests for the Flask endpoints' request validation (no external calls)
+"""
+
+import pytest
+
+from config import Config
+from lotr_store import LOTRStore
+
+# app validates the configuration on import; these tests never reach the APIs
+for _setting in ('LOTR_API_KEY', 'DC_CLIENT_ID', 'DC_CLIENT_SECRET'):
+    if not getattr(Config, _setting):
+        setattr(Config, _setting, 'test')
+for _setting in ('DC_AUTH_URL', 'DC_INGESTION_URL'):
+    if not getattr(Config, _setting):
+        setattr(Config, _setting, 'https://example.invalid')
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_STORE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(Config, 'CACHE_FILE', str(tmp_path / 'lotr_raw.json'))
+    monkeypatch.setattr(Config, 'CACHE_LOCK_FILE', str(tmp_path / 'lotr_raw.lock'))
+    monkeypatch.setattr(Config, 'SQLITE_STORE_ENABLED', False)
+    monkeypatch.setattr(Config, 'JOB_STATE_DIR', str(tmp_path / 'jobs'))
+    monkeypatch.setattr(Config, 'DEAD_LETTER_DIR', str(tmp_path / 'dead_letters'))
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('endpoint', ['/ingest', '/ingest-quotes'])
+@pytest.mark.parametrize('body', [[], [1, 2], 'characters', 42, None])
+def test_ingest_rejects_json_bodies_that_are_not_objects(client, endpoint, body):
+    response = client.post(endpoint, json=body)
+
+    assert response.status_code == 400
+    assert response.json['status'] == 'error'
+
+
+def test_ingest_of_an_unknown_snapshot_is_gone(client):
+    response = client.post('/ingest', json={'snapshotId': 'no-such-snapshot'})
+    assert response.status_code == 410
+
+
+def test_ingest_rejects_non_string_character_ids(client):
+    registry = app_module.get_snapshot_registry()
+    snapshot_id = registry.register({'characters': [{'_id': 'c1', 'name': 'Frodo'}]})
+
+    response = client.post('/ingest', json={'snapshotId': snapshot_id, 'characterIds': [1]})
+    assert response.status_code == 400
+
+
+def test_selected_characters_keep_snapshot_order():
+    data = {'characters': [{'_id': 'c1'}, {'_id': 'c2'}, {'_id': 'c3'}]}
+
+    characters, missing = app_module.select_characters(data, ['c3', 'gone', 'c1'])
+
+    assert [char['_id'] for char in characters] == ['c1', 'c3']
+    assert missing == ['gone']
+
+
+def test_fetch_is_compressed_and_revalidated_with_an_etag(client, monkeypatch):
+    data = {
+        'snapshotId': 'snap-fetch-test',
+        'characters': [{'_id': 'c1', 'name': 'Frodo'}],
+        'movies': [],
+        'stats': {'characterCount': 1, 'quoteCount': 0, 'movieCount': 0, 'charactersWithQuotes': 0},
+    }
+    monkeypatch.setattr(app_module, 'fetch_all_data', lambda force_refresh=False: data)
+
+    response = client.get('/fetch', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    etag = response.headers['ETag']
+
+    revalidated = client.get('/fetch', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+    plain = client.get('/fetch', headers={'If-None-Match': etag})
+    assert plain.status_code == 200
+    assert plain.json['snapshotId'] == 'snap-fetch-test'
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'x', 42])
+def test_replay_rejects_json_bodies_that_are_not_objects(client, body):
+    response = client.post('/dead-letters/replay', json=body)
+
+    assert response.status_code == 400
+    assert response.json['status'] == 'error'
+
+
+def test_replay_rejects_ids_that_are_not_strings(client):
+    response = client.post('/dead-letters/replay', json={'ids': [1]})
+    assert response.status_code == 400
+
+
+def test_characters_are_served_from_the_sqlite_store_when_enabled(client, monkeypatch, tmp_path):
+    store = LOTRStore(tmp_path / 'lotr.db')
+    store.replace_all({'characters': [
+        {'_id': 'c1', 'name': 'Frodo', 'race': 'Hobbit', 'quoteCount': 2},
+        {'_id': 'c2', 'name': 'Legolas', 'race': 'Elf', 'quoteCount': 5},
+    ], 'quotes': [], 'movies': []}, 'gen-1')
+    monkeypatch.setattr(app_module.LOTRClient, 'get_store', lambda self: store)
+    monkeypatch.setattr(app_module, 'fetch_all_data', lambda *args: pytest.fail('dataset loaded'))
+
+    response = client.get('/characters?race=hobbit&fields=name')
+
+    assert response.status_code == 200
+    assert response.json['snapshotId'] == 'gen-1'
+    assert response.json['total'] == 1
+    assert response.json['characters'] == [{'_id': 'c1', 'name': 'Frodo'}]
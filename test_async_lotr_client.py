@@ -0,0 +1,104 @@
+"""
+Tests for refresh coordination between the sync and async LOTR clients
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import lotr_client
+from config import Config
+from lotr_client import LOTRClient
+
+aiohttp = pytest.importorskip('aiohttp')
+from async_lotr_client import AsyncLOTRClient  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def cache_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_STORE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(Config, 'CACHE_FILE', str(tmp_path / 'lotr_raw.json'))
+    monkeypatch.setattr(Config, 'CACHE_LOCK_FILE', str(tmp_path / 'cache.lock'))
+    monkeypatch.setattr(Config, 'SQLITE_STORE_ENABLED', False)
+
+
+def test_async_refresh_joins_a_sync_refresh_in_progress(monkeypatch):
+    started = threading.Event()
+    fetches = []
+
+    def slow_sync_fetch(self, incremental=None):
+        fetches.append('sync')
+        started.set()
+        time.sleep(0.3)
+        return {'from': 'sync'}
+
+    async def async_fetch(self, incremental=None):
+        fetches.append('async')
+        return {'from': 'async'}
+
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', slow_sync_fetch)
+    monkeypatch.setattr(AsyncLOTRClient, '_fetch_fresh', async_fetch)
+
+    sync_result = {}
+    thread = threading.Thread(target=lambda: sync_result.update(LOTRClient()._refresh()))
+    thread.start()
+    started.wait(5)
+
+    async def refresh():
+        async with AsyncLOTRClient() as client:
+            return await client._refresh()
+
+    assert asyncio.run(refresh()) == {'from': 'sync'}
+    thread.join(5)
+    assert sync_result == {'from': 'sync'}
+    assert fetches == ['sync']
+    assert not lotr_client._inflight
+
+
+def test_sync_refresh_joins_an_async_refresh_in_progress(monkeypatch):
+    fetches = []
+    sync_result = {}
+
+    async def slow_async_fetch(self, incremental=None):
+        fetches.append('async')
+        waiter = threading.Thread(target=lambda: sync_result.update(LOTRClient()._refresh()))
+        waiter.start()
+        await asyncio.sleep(0.3)
+        self.waiter = waiter
+        return {'from': 'async'}
+
+    def sync_fetch(self, incremental=None):
+        fetches.append('sync')
+        return {'from': 'sync'}
+
+    monkeypatch.setattr(AsyncLOTRClient, '_fetch_fresh', slow_async_fetch)
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', sync_fetch)
+
+    async def refresh():
+        async with AsyncLOTRClient() as client:
+            data = await client._refresh()
+            return data, client.waiter
+
+    data, waiter = asyncio.run(refresh())
+    waiter.join(5)
+    assert data == {'from': 'async'}
+    assert sync_result == {'from': 'async'}
+    assert fetches == ['async']
+
+
+def test_failed_async_refresh_releases_the_cache_lock(monkeypatch):
+    async def failing_fetch(self, incremental=None):
+        raise Exception("🔥 The journey has encountered darkness")
+
+    monkeypatch.setattr(AsyncLOTRClient, '_fetch_fresh', failing_fetch)
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', lambda self, incremental=None: {'from': 'sync'})
+
+    async def refresh():
+        async with AsyncLOTRClient() as client:
+            return await client._refresh()
+
+    with pytest.raises(Exception, match='darkness'):
+        asyncio.run(refresh())
+    assert LOTRClient()._refresh() == {'from': 'sync'}
@@ -0,0 +1,91 @@
+"""
+Tests for byte-size-aware adaptive batching
+"""
+
+import json
+
+from batching import PAYLOAD_OVERHEAD, AdaptiveBatcher, record_size
+
+
+def _records(count, text_size=80):
+    return [{'quoteId': f"q{n}", 'dialog': 'x' * text_size} for n in range(count)]
+
+
+def _drain(batcher):
+    batches = []
+    while (batch := batcher.next_batch()) is not None:
+        batches.append(batch)
+    return batches
+
+
+def test_record_size_matches_the_encoded_payload():
+    record = {'dialog': 'Ñot ascii ✨'}
+    assert record_size(record) == len(json.dumps(record).encode('utf-8'))
+
+
+def test_batches_stay_under_the_target_and_keep_order():
+    records = _records(50)
+    batcher = AdaptiveBatcher(records, target_bytes=1000, max_bytes=1000, min_bytes=200, max_records=100)
+
+    batches = _drain(batcher)
+
+    assert [record for batch in batches for record in batch] == records
+    assert all(len(json.dumps({'data': batch})) <= 1000 for batch in batches)
+    assert len(batches) > 1
+
+
+def test_record_cap_applies_to_small_records():
+    batcher = AdaptiveBatcher(_records(25, text_size=1), target_bytes=100_000, max_bytes=100_000,
+                              max_records=10)
+    assert [len(batch) for batch in _drain(batcher)] == [10, 10, 5]
+
+
+def test_oversized_record_goes_out_alone():
+    records = _records(2) + [{'quoteId': 'big', 'dialog': 'x' * 5000}] + _records(2)
+    batcher = AdaptiveBatcher(records, target_bytes=1000, max_bytes=1000, min_bytes=200, max_records=100)
+
+    assert [{'quoteId': 'big', 'dialog': 'x' * 5000}] in _drain(batcher)
+
+
+def test_target_grows_when_fast_and_halves_when_slow_or_failed():
+    batcher = AdaptiveBatcher(_records(10), target_bytes=1000, max_bytes=2000, min_bytes=200,
+                              target_latency=1.0)
+
+    batcher.observe([], True, 0.1)
+    assert batcher.target_bytes == 1200
+    batcher.observe([], True, 5.0)
+    assert batcher.target_bytes == 600
+    batcher.observe([], False, 0.1, 500)
+    assert batcher.target_bytes == 300
+    for _ in range(3):
+        batcher.observe([], False, 0.1)
+    assert batcher.target_bytes == 200
+
+
+def test_payload_too_large_lowers_the_ceiling_for_the_rest_of_the_run():
+    records = _records(20)
+    batcher = AdaptiveBatcher(records, target_bytes=2000, max_bytes=4000, min_bytes=100)
+    batch = batcher.next_batch()
+    batch_bytes = PAYLOAD_OVERHEAD + sum(record_size(r) for r in batch) + 2 * (len(batch) - 1)
+
+    batcher.observe(batch, False, 0.1, 413)
+
+    assert batcher.max_bytes == batch_bytes // 2
+    assert batcher.target_bytes == batcher.max_bytes
+    for _ in range(20):
+        batcher.observe([], True, 0.1)
+    assert batcher.target_bytes == batch_bytes // 2
+
+
+def test_requeued_records_go_out_first_in_smaller_batches():
+    records = _records(20)
+    batcher = AdaptiveBatcher(records, target_bytes=2000, max_bytes=4000, min_bytes=100)
+    rejected = batcher.next_batch()
+    batcher.observe(rejected, False, 0.1, 413)
+    batcher.requeue(rejected)
+
+    batches = _drain(batcher)
+
+    assert [record for batch in batches for record in batch] == records
+    assert len(batches[0]) < len(rejected)
+    assert batcher.estimated_total() == len(batches)
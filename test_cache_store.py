@@ -0,0 +1,83 @@
+"""
+Tests for the versioned LOTR cache store
+"""
+
+import json
+
+import cache_store
+
+
+def _snapshot():
+    return {
+        'characters': [{'_id': 'c1', 'name': 'Frodo', 'sampleQuotes': [{'dialog': 'x'}]}],
+        'quotes': [{'_id': 'q1', 'character': 'c1', 'dialog': 'x'}],
+        'movies': [{'_id': 'm1', 'name': 'The Fellowship of the Ring'}],
+        'stats': {'characters': 1},
+        'pages': {},
+        'cached_at': '2026-01-01T00:00:00',
+    }
+
+
+def test_snapshot_round_trip_drops_derived_fields(tmp_path):
+    manifest = cache_store.write_snapshot(tmp_path, _snapshot())
+    data = cache_store.read_snapshot(tmp_path, cache_store.read_manifest(tmp_path))
+
+    assert data['snapshotId'] == manifest['generation']
+    assert data['characters'] == [{'_id': 'c1', 'name': 'Frodo'}]
+    assert data['quotes'] == _snapshot()['quotes']
+    assert data['cached_at'] == '2026-01-01T00:00:00'
+
+
+def test_rewrite_keeps_only_current_and_previous_generation(tmp_path):
+    first = cache_store.write_snapshot(tmp_path, _snapshot())
+    second = cache_store.write_snapshot(tmp_path, _snapshot())
+    third = cache_store.write_snapshot(tmp_path, _snapshot())
+
+    names = {path.name for path in tmp_path.iterdir()}
+    assert not set(first['files'].values()) & names
+    assert set(second['files'].values()) <= names
+    assert set(third['files'].values()) <= names
+
+
+def test_legacy_file_is_migrated_once(tmp_path):
+    legacy = tmp_path / 'lotr_raw.json'
+    legacy.write_text(json.dumps(_snapshot(), indent=2), encoding='utf-8')
+    store_dir = tmp_path / 'store'
+
+    manifest = cache_store.migrate_legacy_file(legacy, store_dir)
+
+    assert manifest['version'] == cache_store.FORMAT_VERSION
+    assert not legacy.exists()
+    data = cache_store.read_snapshot(store_dir, cache_store.read_manifest(store_dir))
+    assert data['movies'] == _snapshot()['movies']
+    assert cache_store.migrate_legacy_file(legacy, store_dir) is None
+
+
+def test_unknown_or_newer_manifest_versions_are_ignored(tmp_path):
+    cache_store.manifest_path(tmp_path).write_text(json.dumps({'version': 99}), encoding='utf-8')
+    assert cache_store.read_manifest(tmp_path) is None
+
+    cache_store.manifest_path(tmp_path).write_text(json.dumps({'version': 1}), encoding='utf-8')
+    assert cache_store.read_manifest(tmp_path) is None
+
+
+def test_manifest_migrations_are_applied_in_order(tmp_path, monkeypatch):
+    def from_v1(manifest):
+        return dict(manifest, version=2, migrated=True)
+
+    monkeypatch.setitem(cache_store._MANIFEST_MIGRATIONS, 1, from_v1)
+    cache_store.manifest_path(tmp_path).write_text(json.dumps({'version': 1}), encoding='utf-8')
+
+    assert cache_store.read_manifest(tmp_path) == {'version': 2, 'migrated': True}
+
+
+def test_stream_snapshot_yields_records_lazily(tmp_path):
+    manifest = cache_store.write_snapshot(tmp_path, _snapshot())
+
+    streams = cache_store.stream_snapshot(tmp_path, manifest)
+
+    assert set(streams) == set(cache_store.ENTITIES)
+    assert not isinstance(streams['quotes'], list)
+    assert next(streams['characters']) == {'_id': 'c1', 'name': 'Frodo'}
+    assert list(streams['quotes']) == _snapshot()['quotes']
+    assert list(streams['movies']) == _snapshot()['movies']
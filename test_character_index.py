@@ -0,0 +1,77 @@
+"""
+Tests for the precomputed character index behind GET /characters
+"""
+
+import pytest
+
+from character_index import CharacterIndex, get_character_index
+
+CHARACTERS = [
+    {'_id': 'c1', 'name': 'Frodo Baggins', 'race': 'Hobbit', 'realm': 'NaN', 'quoteCount': 10,
+     'sampleQuotes': [{'dialog': 'I will take it.'}]},
+    {'_id': 'c2', 'name': 'Samwise Gamgee', 'race': 'Hobbit', 'realm': '', 'quoteCount': 10},
+    {'_id': 'c3', 'name': 'Aragorn II Elessar', 'race': 'Human', 'realm': 'Gondor', 'quoteCount': 50},
+    {'_id': 'c4', 'name': 'Boromir', 'race': 'Human', 'realm': 'gondor', 'quoteCount': 0},
+    {'_id': 'c5', 'name': 'Legolas', 'race': 'Elf', 'realm': 'Mirkwood'},
+]
+
+
+def _ids(page):
+    return [char['_id'] for char in page]
+
+
+def test_default_order_is_most_quoted_first_with_ties_by_name():
+    total, page = CharacterIndex(CHARACTERS).query()
+    assert total == 5
+    assert _ids(page) == ['c3', 'c1', 'c2', 'c4', 'c5']
+
+
+@pytest.mark.parametrize('sort, descending, expected', [
+    ('name', None, ['c3', 'c4', 'c1', 'c5', 'c2']),
+    ('name', True, ['c2', 'c5', 'c1', 'c4', 'c3']),
+    ('quoteCount', False, ['c4', 'c5', 'c1', 'c2', 'c3']),
+])
+def test_sort_orders(sort, descending, expected):
+    _, page = CharacterIndex(CHARACTERS).query(sort=sort, descending=descending)
+    assert _ids(page) == expected
+
+
+def test_unknown_sort_field_is_rejected():
+    with pytest.raises(ValueError):
+        CharacterIndex(CHARACTERS).query(sort='birth')
+
+
+def test_filters_are_case_insensitive_and_combine():
+    index = CharacterIndex(CHARACTERS)
+
+    assert _ids(index.query(race='hobbit')[1]) == ['c1', 'c2']
+    assert _ids(index.query(realm='GONDOR')[1]) == ['c3', 'c4']
+    assert _ids(index.query(race='Human', search='bor')[1]) == ['c4']
+    assert _ids(index.query(search='MIRK')[1]) == ['c5']
+    assert index.query(search='nan') == (0, [])
+
+
+def test_paging_reports_the_total_matches():
+    total, page = CharacterIndex(CHARACTERS).query(sort='name', offset=1, limit=2)
+    assert total == 5
+    assert _ids(page) == ['c4', 'c1']
+
+
+def test_projection():
+    index = CharacterIndex(CHARACTERS)
+
+    _, page = index.query(race='Hobbit')
+    assert 'sampleQuotes' not in page[0] and page[0]['name'] == 'Frodo Baggins'
+
+    _, page = index.query(race='Hobbit', fields=['name', 'sampleQuotes', 'missing'])
+    assert page[0] == {'_id': 'c1', 'name': 'Frodo Baggins', 'sampleQuotes': [{'dialog': 'I will take it.'}]}
+
+
+def test_index_is_reused_for_the_same_snapshot_only():
+    data = {'snapshotId': 'snap-index-test', 'characters': list(CHARACTERS)}
+
+    index = get_character_index(data)
+    assert get_character_index(data) is index
+
+    rebuilt = {'snapshotId': 'snap-index-test', 'characters': list(CHARACTERS)}
+    assert get_character_index(rebuilt) is not index
@@ -0,0 +1,106 @@
+"""
+Tests for the dead-letter store and replaying failed batches
+"""
+
+import pytest
+
+import ingestion
+from dead_letters import DeadLetterStore
+from error_journal import ErrorJournal
+from ingest_ledger import IngestLedger
+
+FRODO = {'characterId': 'c1', 'name': 'Frodo'}
+QUOTE = {'quoteId': 'q1', 'dialog': 'Po-tay-toes'}
+
+
+def test_store_keeps_batches_until_removed(tmp_path):
+    store = DeadLetterStore(str(tmp_path))
+    first = store.add('characters', [FRODO], 'HTTP 500', 500, 'run-1')
+    second = store.add('quotes', [QUOTE], 'Not sent', run_id='run-1')
+
+    assert [letter['id'] for letter in store.list()] == [first, second]
+    assert [letter['id'] for letter in store.list('quotes')] == [second]
+    assert 'records' not in store.list()[0]
+    assert store.get(first)['records'] == [FRODO]
+
+    store.remove(first)
+    store.remove(first)
+    assert store.get(first) is None
+    assert [letter['id'] for letter in store.list()] == [second]
+
+
+def test_store_refuses_unknown_kinds_and_ids(tmp_path):
+    store = DeadLetterStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.add('movies', [], 'HTTP 500')
+    assert store.get('../../etc/passwd') is None
+    assert DeadLetterStore(str(tmp_path / 'missing')).list() == []
+
+
+def test_failed_replays_are_counted(tmp_path):
+    store = DeadLetterStore(str(tmp_path))
+    letter = store.get(store.add('characters', [FRODO], 'HTTP 500', 500))
+
+    store.record_failure(letter, 'HTTP 503', 503)
+
+    saved = store.get(letter['id'])
+    assert saved['replayAttempts'] == 1
+    assert saved['statusCode'] == 503
+    assert 'lastReplayAt' in saved
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    store = DeadLetterStore(str(tmp_path / 'dead'))
+    ledger = IngestLedger(path=str(tmp_path / 'ledger.json'))
+    journal = ErrorJournal(path=str(tmp_path / 'errors.ndjson'))
+    failing = set()
+
+    def send(batch, batch_num, total_batches):
+        ids = {record.get('characterId') or record.get('quoteId') for record in batch}
+        if ids & failing:
+            return {'success': False, 'batch_num': batch_num, 'count': len(batch), 'error': 'HTTP 503',
+                    'status_code': 503}
+        return {'success': True, 'batch_num': batch_num, 'count': len(batch)}
+
+    monkeypatch.setattr(ingestion, 'get_dead_letter_store', lambda: store)
+    monkeypatch.setattr(ingestion, 'get_ingest_ledger', lambda: ledger)
+    monkeypatch.setattr(ingestion, 'get_error_journal', lambda: journal)
+    monkeypatch.setattr(ingestion, 'send_batch_to_ingestion_api', send)
+    monkeypatch.setattr(ingestion, 'send_quote_batch_to_ingestion_api', send)
+    return store, ledger, journal, failing
+
+
+def test_replay_removes_ingested_batches_and_keeps_the_rest(replay):
+    store, ledger, journal, failing = replay
+    store.add('characters', [FRODO], 'HTTP 500', 500)
+    kept = store.add('quotes', [QUOTE], 'HTTP 500', 500)
+    failing.add('q1')
+
+    result = ingestion.replay_dead_letters()
+
+    assert result['status'] == 'partial'
+    assert result['replayedBatches'] == 1
+    assert result['remainingBatches'] == 1
+    assert [letter['id'] for letter in store.list()] == [kept]
+    assert store.get(kept)['replayAttempts'] == 1
+    assert ledger.changed('characters', [FRODO], 'characterId') == ([], 1)
+    assert journal.read(run_id=result['runId'])[0] == 1
+
+
+def test_replay_only_the_chosen_batches(replay):
+    store, _, _, _ = replay
+    chosen = store.add('characters', [FRODO], 'HTTP 500', 500)
+    other = store.add('quotes', [QUOTE], 'HTTP 500', 500)
+
+    result = ingestion.replay_dead_letters([chosen])
+
+    assert result['status'] == 'success'
+    assert result['ingestedCount'] == 1
+    assert [letter['id'] for letter in store.list()] == [other]
+
+
+def test_replay_with_nothing_stored(replay):
+    result = ingestion.replay_dead_letters()
+    assert result['status'] == 'success'
+    assert result['replayedBatches'] == 0
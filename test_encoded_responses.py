@@ -0,0 +1,55 @@
+"""
+Tests for pre-encoded /fetch response bodies
+"""
+
+import gzip
+import json
+
+import pytest
+
+from encoded_responses import EncodedBody, available_encodings, get_encoded_body
+
+PAYLOAD = {'status': 'success', 'characters': [{'_id': 'c1', 'name': 'Éowyn'}] * 50}
+
+
+def test_identity_body_is_compact_utf8_json():
+    body = EncodedBody('snap-1', PAYLOAD).body('identity')
+    assert json.loads(body) == PAYLOAD
+    assert 'Éowyn'.encode('utf-8') in body
+
+
+def test_gzip_body_is_stable_and_cached():
+    body = EncodedBody('snap-1', PAYLOAD)
+
+    compressed = body.body('gzip')
+
+    assert json.loads(gzip.decompress(compressed)) == PAYLOAD
+    assert body.body('gzip') is compressed
+    assert EncodedBody('snap-1', PAYLOAD).body('gzip') == compressed
+    assert len(compressed) < len(body.body('identity'))
+
+
+def test_each_coding_has_its_own_etag():
+    body = EncodedBody('snap-1', PAYLOAD)
+    assert body.etag('gzip') != body.etag('identity')
+    assert body.etag('gzip') == EncodedBody('snap-1', {}).etag('gzip')
+
+
+def test_unsupported_coding_is_rejected():
+    with pytest.raises(ValueError):
+        EncodedBody('snap-1', PAYLOAD).body('deflate')
+    assert available_encodings()[-2:] == ['gzip', 'identity']
+
+
+def test_payload_is_built_once_per_version():
+    builds = []
+
+    def build():
+        builds.append(1)
+        return PAYLOAD
+
+    first = get_encoded_body('snap-encoded-test', build)
+    second = get_encoded_body('snap-encoded-test', build)
+
+    assert first is second
+    assert len(builds) == 1
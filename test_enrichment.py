@@ -0,0 +1,80 @@
+"""
+Tests for quote enrichment and warm loads from a saved sample index
+"""
+
+import json
+
+import pytest
+
+from enrichment import (
+    attach_sample_quotes, build_quote_index, character_quotes, enrich_characters, sample_index_matches
+)
+
+CHARACTERS = [{'_id': 'c1', 'name': 'Frodo'}, {'_id': 'c2', 'name': 'Sam'}, {'_id': 'c3', 'name': 'Tom'}]
+MOVIES = [{'_id': 'm1', 'name': 'The Two Towers'}]
+QUOTES = [
+    {'_id': 'q1', 'character': 'c1', 'movie': 'm1', 'dialog': 'I will take it.'},
+    {'_id': 'q2', 'character': 'c2', 'movie': 'm1', 'dialog': 'Po-tay-toes'},
+    {'_id': 'q3', 'character': 'c1', 'movie': 'm9', 'dialog': 'I wish the Ring had never come to me.'},
+    {'_id': 'q4', 'character': 'c1', 'movie': 'm1', 'dialog': 'Go back, Sam.'},
+]
+
+
+def test_quote_index_keeps_api_order():
+    assert build_quote_index(QUOTES) == {'c1': [0, 2, 3], 'c2': [1]}
+
+
+@pytest.mark.parametrize('mode, expected', [
+    ('all', ['I will take it.', 'I wish the Ring had never come to me.', 'Go back, Sam.']),
+    ('first', ['I will take it.', 'I wish the Ring had never come to me.']),
+    ('top', ['I wish the Ring had never come to me.', 'I will take it.']),
+])
+def test_samples_follow_the_mode_and_count_every_quote(mode, expected):
+    enriched, _, _ = enrich_characters(CHARACTERS, QUOTES, MOVIES, sample_mode=mode, sample_size=2)
+
+    frodo = enriched[0]
+    assert frodo['quoteCount'] == 3
+    assert [quote['dialog'] for quote in frodo['sampleQuotes']] == expected
+    assert enriched[2]['quoteCount'] == 0 and enriched[2]['sampleQuotes'] == []
+    assert 'sampleQuotes' not in CHARACTERS[0]
+
+
+def test_random_samples_are_stable_per_character():
+    first, _, _ = enrich_characters(CHARACTERS, QUOTES, MOVIES, sample_mode='random', sample_size=2)
+    second, _, _ = enrich_characters(CHARACTERS, QUOTES, MOVIES, sample_mode='random', sample_size=2)
+    assert first[0]['sampleQuotes'] == second[0]['sampleQuotes']
+    assert len(first[0]['sampleQuotes']) == 2
+
+
+def test_characters_share_one_view_per_quote():
+    enriched, _, _ = enrich_characters(CHARACTERS + [dict(CHARACTERS[0])], QUOTES, MOVIES, sample_mode='all')
+    assert enriched[0]['sampleQuotes'][0] is enriched[3]['sampleQuotes'][0]
+
+
+@pytest.mark.parametrize('mode', ['all', 'first', 'top', 'random'])
+def test_warm_load_from_saved_indexes_matches_enrichment(mode):
+    enriched, index, samples = enrich_characters(CHARACTERS, QUOTES, MOVIES, sample_mode=mode, sample_size=2)
+    # As saved in and read back from the cache (JSON, without sampleQuotes)
+    index, samples = json.loads(json.dumps(index)), json.loads(json.dumps(samples))
+    loaded = [{k: v for k, v in char.items() if k != 'sampleQuotes'} for char in enriched]
+
+    assert sample_index_matches(samples, mode, 2)
+    result = attach_sample_quotes(loaded, QUOTES, MOVIES, index, samples)
+
+    assert result is loaded
+    assert loaded == enriched
+
+
+def test_saved_samples_for_other_settings_do_not_match():
+    _, _, samples = enrich_characters(CHARACTERS, QUOTES, MOVIES, sample_mode='first', sample_size=2)
+    assert not sample_index_matches(samples, 'first', 3)
+    assert not sample_index_matches(samples, 'top', 2)
+    assert not sample_index_matches(None, 'first', 2)
+
+
+def test_character_quotes_returns_the_full_set():
+    index = build_quote_index(QUOTES)
+    assert character_quotes('c1', QUOTES, MOVIES, index)[1] == {
+        'dialog': 'I wish the Ring had never come to me.', 'movie': 'Unknown'
+    }
+    assert character_quotes('missing', QUOTES, MOVIES, index) == []
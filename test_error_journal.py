@@ -0,0 +1,105 @@
+"""
+Tests for the ingestion error journal
+"""
+
+import threading
+
+from error_journal import ErrorJournal
+
+
+def _entry(run_id, n, kind='characters'):
+    return {'runId': run_id, 'kind': kind, 'batch': n, 'timestamp': f"2026-01-01T00:00:{n:02d}Z"}
+
+
+def test_entries_are_paged_oldest_first_and_by_run(tmp_path):
+    journal = ErrorJournal(path=str(tmp_path / 'errors.ndjson'), max_bytes=1_000_000, backups=2)
+    for n in range(6):
+        journal.append(_entry('run-a' if n % 2 else 'run-b', n))
+
+    total, page = journal.read(offset=1, limit=2)
+    assert total == 6
+    assert [entry['batch'] for entry in page] == [1, 2]
+
+    total, page = journal.read(run_id='run-a', limit=10)
+    assert total == 3
+    assert [entry['batch'] for entry in page] == [1, 3, 5]
+
+
+def test_runs_are_summarized_most_recent_first(tmp_path):
+    journal = ErrorJournal(path=str(tmp_path / 'errors.ndjson'), max_bytes=1_000_000, backups=2)
+    journal.append(_entry('run-a', 1))
+    journal.append(_entry('run-b', 2, kind='quotes'))
+    journal.append(_entry('run-a', 3))
+
+    runs = journal.runs()
+
+    assert [run['runId'] for run in runs] == ['run-a', 'run-b']
+    assert runs[0]['errorCount'] == 2
+    assert runs[0]['firstAt'] == '2026-01-01T00:00:01Z'
+    assert runs[0]['lastAt'] == '2026-01-01T00:00:03Z'
+    assert runs[1]['kind'] == 'quotes'
+
+
+def test_rotation_keeps_the_configured_backups(tmp_path):
+    path = tmp_path / 'errors.ndjson'
+    journal = ErrorJournal(path=str(path), max_bytes=200, backups=2)
+    for n in range(20):
+        journal.append(_entry('run-a', n))
+
+    assert sorted(p.name for p in tmp_path.glob('errors.ndjson*') if not p.name.endswith('.lock')) == [
+        'errors.ndjson', 'errors.ndjson.1', 'errors.ndjson.2'
+    ]
+    total, page = journal.read(limit=100)
+    batches = [entry['batch'] for entry in page]
+    assert batches == sorted(batches)
+    assert batches[-1] == 19
+    assert total < 20
+
+
+def test_concurrent_appends_never_interleave(tmp_path):
+    journal = ErrorJournal(path=str(tmp_path / 'errors.ndjson'), max_bytes=1_000_000, backups=1)
+
+    def writer(run_id):
+        for n in range(50):
+            journal.append(_entry(run_id, n) | {'detail': 'x' * 500})
+
+    threads = [threading.Thread(target=writer, args=(f"run-{t}",)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert journal.read(limit=0)[0] == 200
+    assert all(run['errorCount'] == 50 for run in journal.runs())
+
+
+def test_reading_does_not_hold_up_appends(tmp_path):
+    journal = ErrorJournal(path=str(tmp_path / 'errors.ndjson'), max_bytes=1_000_000, backups=1)
+    for n in range(3):
+        journal.append(_entry('run-a', n))
+
+    entries = journal._entries()
+    next(entries)  # a scan in progress
+    appended = threading.Thread(target=journal.append, args=(_entry('run-b', 9),))
+    appended.start()
+    appended.join(timeout=2)
+
+    assert not appended.is_alive()
+    entries.close()
+    assert journal.read(run_id='run-b')[0] == 1
+
+
+def test_reads_survive_a_rotation_mid_scan(tmp_path):
+    journal = ErrorJournal(path=str(tmp_path / 'errors.ndjson'), max_bytes=300, backups=2)
+    for n in range(2):
+        journal.append(_entry('run-a', n))
+
+    entries = journal._entries()
+    first = next(entries)
+    for n in range(2, 6):
+        journal.append(_entry('run-a', n))
+
+    # The scan keeps reading the file it opened, wherever rotation moved it
+    batches = [first['batch']] + [entry['batch'] for entry in entries]
+    assert batches == list(range(len(batches)))
+    assert len(batches) >= 2
@@ -0,0 +1,48 @@
+"""
+Tests for the cross-process file lock helper
+"""
+
+import multiprocessing
+import threading
+import time
+
+from file_lock import locked_file
+
+
+def _hold(path, acquired, release):
+    with locked_file(path):
+        acquired.set()
+        release.wait(5)
+
+
+def test_lock_file_and_its_directory_are_created(tmp_path):
+    path = tmp_path / 'nested' / 'data.lock'
+
+    with locked_file(path):
+        assert path.exists()
+
+    with locked_file(path):
+        pass
+
+
+def test_another_process_waits_for_the_lock(tmp_path):
+    path = tmp_path / 'data.lock'
+    acquired = multiprocessing.Event()
+    release = multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold, args=(path, acquired, release))
+    holder.start()
+    try:
+        assert acquired.wait(5)
+        released_at = []
+
+        def release_later():
+            time.sleep(0.2)
+            released_at.append(time.monotonic())
+            release.set()
+
+        threading.Thread(target=release_later).start()
+        with locked_file(path):
+            assert released_at and time.monotonic() >= released_at[0]
+    finally:
+        release.set()
+        holder.join(5)
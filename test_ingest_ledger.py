@@ -0,0 +1,106 @@
+"""
+Tests for the ingestion ledger and delta character ingestion
+"""
+
+import multiprocessing
+
+import pytest
+
+import ingestion
+from dead_letters import DeadLetterStore
+from error_journal import ErrorJournal
+from ingest_ledger import IngestLedger, fingerprint
+
+FRODO = {'characterId': 'c1', 'name': 'Frodo', 'race': 'Hobbit', 'ingestedAt': '2026-01-01T00:00:00.000Z'}
+SAM = {'characterId': 'c2', 'name': 'Sam', 'race': 'Hobbit', 'ingestedAt': '2026-01-01T00:00:00.000Z'}
+
+
+def test_fingerprint_ignores_ingested_at_and_key_order():
+    later = dict(FRODO, ingestedAt='2026-06-01T12:00:00.000Z')
+    reordered = dict(reversed(list(FRODO.items())))
+
+    assert fingerprint(later) == fingerprint(FRODO) == fingerprint(reordered)
+    assert fingerprint(dict(FRODO, race='Ring-bearer')) != fingerprint(FRODO)
+
+
+def test_only_new_or_changed_records_are_picked(tmp_path):
+    ledger = IngestLedger(path=str(tmp_path / 'ledger.json'))
+    ledger.record('characters', [FRODO, SAM], 'characterId')
+
+    merry = {'characterId': 'c3', 'name': 'Merry', 'ingestedAt': 'now'}
+    changed, unchanged = ledger.changed(
+        'characters', [dict(FRODO, ingestedAt='now'), dict(SAM, race='Gardener'), merry], 'characterId'
+    )
+
+    assert [record['characterId'] for record in changed] == ['c2', 'c3']
+    assert unchanged == 1
+
+
+def test_records_from_other_ledgers_are_merged(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    IngestLedger(path=path).record('characters', [FRODO], 'characterId')
+    IngestLedger(path=path).record('characters', [SAM], 'characterId')
+
+    changed, unchanged = IngestLedger(path=path).changed('characters', [FRODO, SAM], 'characterId')
+    assert changed == [] and unchanged == 2
+
+
+def _record_from_another_process(path, start):
+    records = [{'characterId': f"c{n}", 'name': f"Hobbit {n}"} for n in range(start, start + 20)]
+    for record in records:
+        IngestLedger(path=path).record('characters', [record], 'characterId')
+
+
+def test_concurrent_processes_do_not_lose_each_others_records(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    workers = [multiprocessing.Process(target=_record_from_another_process, args=(path, start))
+               for start in (0, 100, 200)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    ledger = IngestLedger(path=path)._load()
+    assert len(ledger['characters']) == 60
+
+
+def test_clear_forgets_everything(tmp_path):
+    ledger = IngestLedger(path=str(tmp_path / 'ledger.json'))
+    ledger.record('characters', [FRODO], 'characterId')
+
+    ledger.clear()
+    ledger.clear()
+
+    assert ledger.changed('characters', [FRODO], 'characterId') == ([FRODO], 0)
+
+
+@pytest.fixture
+def delta_ingest(tmp_path, monkeypatch):
+    ledger = IngestLedger(path=str(tmp_path / 'ledger.json'))
+    sent = []
+
+    def send(batch, batch_num, total_batches):
+        sent.extend(record['characterId'] for record in batch)
+        return {'success': True, 'batch_num': batch_num, 'count': len(batch)}
+
+    monkeypatch.setattr(ingestion, 'get_ingest_ledger', lambda: ledger)
+    monkeypatch.setattr(ingestion, 'get_dead_letter_store', lambda: DeadLetterStore(str(tmp_path / 'dead')))
+    monkeypatch.setattr(ingestion, 'get_error_journal', lambda: ErrorJournal(path=str(tmp_path / 'errors.ndjson')))
+    monkeypatch.setattr(ingestion, 'send_batch_to_ingestion_api', send)
+    return sent
+
+
+def test_delta_ingest_sends_only_what_changed(delta_ingest):
+    characters = [{'_id': 'c1', 'name': 'Frodo'}, {'_id': 'c2', 'name': 'Sam'}]
+    assert ingestion.ingest_characters(characters, delta=True)['ingestedCount'] == 2
+
+    characters[1]['race'] = 'Hobbit'
+    result = ingestion.ingest_characters(characters, delta=True)
+
+    assert result['mode'] == 'delta'
+    assert result['ingestedCount'] == 1
+    assert result['unchangedRecords'] == 1
+    assert delta_ingest == ['c1', 'c2', 'c2']
+
+    result = ingestion.ingest_characters(characters, delta=True)
+    assert result['totalBatches'] == 0 and result['unchangedRecords'] == 2
@@ -0,0 +1,161 @@
+"""
+Tests for batch dispatch to the Ingestion API (no external calls)
+"""
+
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import ingestion
+from batching import AdaptiveBatcher
+from ingestion import dispatch_batches, post_with_retries
+
+
+def _records(count, text_size=80):
+    return [{'quoteId': f"q{n}", 'dialog': 'x' * text_size} for n in range(count)]
+
+
+def test_payload_too_large_batch_is_split_and_resent():
+    records = _records(40)
+    batcher = AdaptiveBatcher(records, target_bytes=4000, max_bytes=4000, min_bytes=100)
+    limit = 1500
+    sent = []
+
+    def send(batch, batch_num, total_batches):
+        size = len(json.dumps({'data': batch}))
+        sent.append(size)
+        if size > limit:
+            return {'success': False, 'batch_num': batch_num, 'count': len(batch), 'status_code': 413,
+                    'error': 'HTTP 413'}
+        return {'success': True, 'batch_num': batch_num, 'count': len(batch)}
+
+    results = list(dispatch_batches(batcher, send, max_in_flight=1, max_failed=0))
+
+    assert all(result['success'] for _, result in results)
+    assert [record for batch, _ in results for record in batch] == records
+    assert any(size > limit for size in sent)
+    assert batcher.max_bytes <= limit
+
+
+def test_results_come_back_in_batch_order_while_sends_overlap():
+    batcher = AdaptiveBatcher(_records(12), target_bytes=10_000, max_bytes=10_000, max_records=2)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def send(batch, batch_num, total_batches):
+        with lock:
+            active.append(batch_num)
+            peak.append(len(active))
+        # Earlier batches take longer, so they finish last
+        time.sleep(0.05 / batch_num)
+        with lock:
+            active.remove(batch_num)
+        return {'success': True, 'batch_num': batch_num, 'count': len(batch)}
+
+    results = list(dispatch_batches(batcher, send, max_in_flight=3, max_failed=0))
+
+    assert [result['batch_num'] for _, result in results] == [1, 2, 3, 4, 5, 6]
+    assert max(peak) == 3
+
+
+def test_dispatch_stops_after_too_many_failures_and_skips_the_rest():
+    batcher = AdaptiveBatcher(_records(10), target_bytes=10_000, max_bytes=10_000, max_records=1)
+    sent = []
+
+    def send(batch, batch_num, total_batches):
+        sent.append(batch_num)
+        return {'success': False, 'batch_num': batch_num, 'count': len(batch), 'error': 'HTTP 500'}
+
+    results = [result for _, result in dispatch_batches(batcher, send, max_in_flight=1, max_failed=2)]
+
+    assert sent == [1, 2]
+    assert [result['batch_num'] for result in results] == list(range(1, 11))
+    assert all(result.get('skipped') for result in results[2:])
+    assert not any(result.get('skipped') for result in results[:2])
+
+
+def test_a_send_that_raises_counts_as_a_failed_batch():
+    batcher = AdaptiveBatcher(_records(2), target_bytes=10_000, max_bytes=10_000, max_records=1)
+
+    def send(batch, batch_num, total_batches):
+        if batch_num == 1:
+            raise RuntimeError('The beacons are not lit')
+        return {'success': True, 'batch_num': batch_num, 'count': len(batch)}
+
+    results = [result for _, result in dispatch_batches(batcher, send, max_in_flight=2, max_failed=0)]
+
+    assert results[0] == {'success': False, 'batch_num': 1, 'count': 1, 'error': 'The beacons are not lit'}
+    assert results[1]['success']
+
+
+class FakeAuth:
+    def get_headers(self):
+        return {'Authorization': 'Bearer test'}
+
+
+class FakeTransport:
+    """Answers POSTs with queued status codes or exceptions"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers)
+        response._content = b'{}'
+        response.url = url
+        return response
+
+
+@pytest.fixture
+def retrying(monkeypatch):
+    delays = []
+    monkeypatch.setattr(ingestion, 'get_auth', FakeAuth)
+    monkeypatch.setattr(ingestion.time, 'sleep', delays.append)
+    monkeypatch.setattr(ingestion.Config, 'INGEST_MAX_RETRIES', 3)
+
+    def use(outcomes):
+        transport = FakeTransport(outcomes)
+        monkeypatch.setattr(ingestion, 'get_transport', lambda: transport)
+        return transport
+
+    use.delays = delays
+    return use
+
+
+def test_throttled_and_transient_failures_are_retried(retrying):
+    transport = retrying([(429, {'Retry-After': '7'}), 503, requests.exceptions.ConnectionError(), 202])
+
+    response = post_with_retries('https://example.invalid/ingest', {'data': []}, 'Batch 1/1')
+
+    assert response.status_code == 202
+    assert transport.calls == 4
+    assert retrying.delays[0] >= 7
+
+
+def test_client_errors_are_not_retried(retrying):
+    transport = retrying([400])
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        post_with_retries('https://example.invalid/ingest', {'data': []}, 'Batch 1/1')
+    assert transport.calls == 1
+
+
+def test_retries_give_up_after_the_limit(retrying):
+    transport = retrying([500] * 4)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        post_with_retries('https://example.invalid/ingest', {'data': []}, 'Batch 1/1')
+    assert transport.calls == 4
+    assert len(retrying.delays) == 3
@@ -0,0 +1,194 @@
+"""
+Tests for background jobs and their event logs
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+import jobs
+from config import Config
+from jobs import JobLogs, JobManager, JobQueueFull, report_progress
+
+
+@pytest.fixture(autouse=True)
+def job_state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'JOB_STATE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _wait(job):
+    events = []
+    last_id = 0
+    done = False
+    while not done:
+        new, done = job.events_after(last_id, timeout=5)
+        events.extend(new)
+        if new:
+            last_id = new[-1][0]
+    return events
+
+
+def test_job_runs_in_the_background_and_reports_its_result():
+    manager = JobManager(max_workers=1, max_pending=2, history_size=5)
+
+    def pipeline(count):
+        logs = JobLogs()
+        logs.append('⚔️ So it begins')
+        report_progress(completedBatches=1, totalBatches=1, ingestedRecords=count)
+        logs.append('🎉 It is done')
+        return {'status': 'success', 'logs': logs}
+
+    job = manager.submit('ingest', pipeline, 3)
+    events = _wait(job)
+
+    state = manager.get(job.id).to_dict()
+    assert state['state'] == jobs.FINISHED
+    assert state['result']['status'] == 'success'
+    assert state['progress']['ingestedRecords'] == 3
+    assert [name for _, name, _ in events] == ['state', 'state', 'log', 'progress', 'log', 'done']
+
+
+def test_log_events_carry_their_position_in_the_result_logs():
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+
+    def pipeline():
+        logs = JobLogs()
+        for n in range(3):
+            logs.append(f"line {n}")
+        return {'logs': logs}
+
+    job = manager.submit('ingest', pipeline)
+    events = _wait(job)
+
+    logs = [data for _, name, data in events if name == 'log']
+    assert logs == [{'message': f"line {n}", 'index': n} for n in range(3)]
+
+
+def test_late_subscribers_can_tell_which_lines_were_trimmed(monkeypatch):
+    monkeypatch.setattr(jobs, 'MAX_JOB_EVENTS', 5)
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+
+    def pipeline():
+        logs = JobLogs()
+        for n in range(10):
+            logs.append(f"line {n}")
+        return {'logs': logs}
+
+    job = manager.submit('ingest', pipeline)
+    _wait(job)
+    events, done = job.events_after(0)
+
+    shown = {data['index'] for _, name, data in events if name == 'log'}
+    result_logs = job.to_dict()['result']['logs']
+    unseen = [line for index, line in enumerate(result_logs) if index not in shown]
+    assert done
+    assert unseen == [f"line {n}" for n in range(6)]
+
+
+def test_failed_job_reports_its_error():
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+
+    def pipeline():
+        raise RuntimeError('The bridge is broken')
+
+    job = manager.submit('wipe', pipeline)
+    _wait(job)
+
+    state = job.to_dict()
+    assert state['state'] == jobs.FAILED
+    assert state['error'] == 'The bridge is broken'
+
+
+def test_submit_refuses_jobs_beyond_the_queue_size():
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+    release = threading.Event()
+    job = manager.submit('ingest', release.wait, 5)
+
+    with pytest.raises(JobQueueFull):
+        manager.submit('ingest', release.wait, 5)
+
+    release.set()
+    _wait(job)
+
+
+def test_other_workers_read_a_job_from_its_state_file():
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+    job = manager.submit('ingest', lambda: {'status': 'success'})
+    _wait(job)
+
+    stored = JobManager().get(job.id)
+    assert isinstance(stored, jobs.StoredJob)
+    assert stored.to_dict()['result'] == {'status': 'success'}
+    assert stored.events_after(0)[1] is True
+    assert JobManager().get('not-a-job-id') is None
+
+
+def test_report_progress_outside_a_job_is_a_no_op():
+    report_progress(completedBatches=1)
+
+
+def test_events_are_appended_and_state_is_saved_only_on_state_changes(monkeypatch, job_state_dir):
+    saves = []
+    real_replace = jobs.os.replace
+    monkeypatch.setattr(jobs.os, 'replace', lambda src, dst: (saves.append(dst), real_replace(src, dst)))
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+
+    def pipeline():
+        logs = JobLogs()
+        for n in range(50):
+            logs.append(f"line {n}")
+            report_progress(completedBatches=n + 1, totalBatches=50, ingestedRecords=n)
+        return {'logs': logs}
+
+    job = manager.submit('ingest', pipeline)
+    _wait(job)
+    # The final state is saved just after the done event
+    deadline = time.monotonic() + 5
+    while manager._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert len(saves) == 3  # queued, running, done
+    lines = (job_state_dir / f"{job.id}.events.ndjson").read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 103  # 2 states, 50 logs, 50 progress, done
+
+
+def test_stored_job_follows_progress_from_the_events_file():
+    manager = JobManager(max_workers=1, max_pending=1, history_size=5)
+    release = threading.Event()
+
+    def pipeline():
+        report_progress(completedBatches=1, totalBatches=4, ingestedRecords=10)
+        release.wait(5)
+        return {'status': 'success'}
+
+    job = manager.submit('ingest', pipeline)
+    while job.to_dict()['progress'].get('completedBatches') != 1:
+        job.events_after(0, timeout=0.1)
+
+    stored = JobManager().get(job.id)
+    assert stored.to_dict()['state'] == jobs.RUNNING
+    assert stored.to_dict()['progress']['completedBatches'] == 1
+    assert not stored.events_after(0)[1]
+
+    release.set()
+    _wait(job)
+    events, done = stored.events_after(0)
+    assert done
+    assert events[-1][1] == 'done'
+
+
+def test_old_job_files_are_pruned_whoever_wrote_them(job_state_dir):
+    old = job_state_dir / f"{'a' * 32}.json"
+    old_events = job_state_dir / f"{'a' * 32}.events.ndjson"
+    recent = job_state_dir / f"{'b' * 32}.json"
+    for path in (old, old_events, recent):
+        path.write_text('{}', encoding='utf-8')
+    two_days_ago = time.time() - 48 * 3600
+    os.utime(old, (two_days_ago, two_days_ago))
+    os.utime(old_events, (two_days_ago, two_days_ago))
+
+    assert jobs.prune_job_files(max_age_hours=24) == 2
+    assert sorted(path.name for path in job_state_dir.iterdir()) == [recent.name]
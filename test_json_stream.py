@@ -0,0 +1,92 @@
+"""
+Tests for the streaming One API page decoder
+"""
+
+import hashlib
+import json
+
+import pytest
+
+from json_stream import DocsStream, decode_page
+
+PAGE = {
+    'docs': [
+        {'_id': 'q1', 'dialog': 'Deeds will not be less valiant because they are unpraised.', 'movie': None},
+        {'_id': 'q2', 'dialog': 'Ñot ascii — “quoted” ✨', 'score': 12345},
+        None,
+        [1, 2.5, True, False],
+    ],
+    'total': 4,
+    'limit': 1000,
+    'offset': 0,
+    'page': 1,
+    'pages': 1,
+}
+
+
+def _stream(text, chunk_size):
+    stream = DocsStream()
+    items = []
+    for start in range(0, len(text), chunk_size):
+        items.extend(stream.feed(text[start:start + chunk_size]))
+    items.extend(stream.close())
+    return items, stream.fields
+
+
+def test_null_docs_member_is_kept_as_a_field():
+    stream = DocsStream()
+    assert stream.feed('{"docs":null,"pages":1}') == []
+    assert stream.close() == []
+    assert stream.fields == {'docs': None, 'pages': 1}
+
+
+def test_null_members_and_entries_are_decoded():
+    items, fields = _stream('{"total":null,"docs":[null,{"a":null},null],"pages":null}', 4096)
+    assert items == [None, {'a': None}, None]
+    assert fields == {'total': None, 'pages': None}
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64])
+def test_values_split_across_chunk_boundaries(chunk_size):
+    text = json.dumps(PAGE, ensure_ascii=False, indent=1)
+    items, fields = _stream(text, chunk_size)
+
+    assert items == PAGE['docs']
+    assert fields == {k: v for k, v in PAGE.items() if k != 'docs'}
+
+
+def test_number_at_a_chunk_boundary_is_not_cut_short():
+    stream = DocsStream()
+    assert stream.feed('{"docs":[12') == []
+    assert stream.feed('34, 5') == [1234]
+    assert stream.feed(']}') == [5]
+    assert stream.close() == []
+
+
+@pytest.mark.parametrize('text', [
+    '{"docs":[{"_id":"q1"},{"_id":"q',
+    '{"docs":[{"_id":"q1"}],"pages":1',
+    '{"docs":[',
+    '{"pages":nul',
+    '',
+])
+def test_truncated_input_raises(text):
+    stream = DocsStream()
+    stream.feed(text)
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+def test_data_after_the_object_raises():
+    with pytest.raises(ValueError):
+        _stream('{"docs":[]} {}', 4096)
+
+
+def test_decode_page_splits_multibyte_characters_and_fingerprints_the_body():
+    body = json.dumps(PAGE, ensure_ascii=False).encode('utf-8')
+    chunks = [body[i:i + 5] for i in range(0, len(body), 5)]
+
+    data, fingerprint = decode_page(chunks)
+
+    assert data == PAGE
+    assert fingerprint == hashlib.sha256(body).hexdigest()
@@ -0,0 +1,429 @@
+"""
+Tests for the One API client's fetching and caching (no external calls)
+"""
+
+import io
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+import requests
+
+import lotr_client
+from config import Config
+from lotr_client import LOTRClient
+from rate_limiter import TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def cache_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'JOB_STATE_DIR', str(tmp_path / 'jobs'))
+    monkeypatch.setattr(Config, 'LOG_DIR', str(tmp_path / 'logs'))
+    monkeypatch.setattr(Config, 'CACHE_STORE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(Config, 'CACHE_FILE', str(tmp_path / 'lotr_raw.json'))
+    monkeypatch.setattr(Config, 'CACHE_LOCK_FILE', str(tmp_path / 'cache.lock'))
+    monkeypatch.setattr(Config, 'SQLITE_STORE_ENABLED', False)
+
+
+class FakeTransport:
+    """Answers GETs with queued (status, body, headers) tuples or exceptions"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.requests = []
+
+    def get(self, url, headers=None, params=None, stream=False):
+        self.requests.append({'url': url, 'headers': dict(headers or {}), 'params': dict(params or {})})
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, body, response_headers = outcome
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(response_headers)
+        response.raw = io.BytesIO(json.dumps(body).encode('utf-8') if body is not None else b'')
+        response.url = url
+        return response
+
+
+def _client(outcomes):
+    client = LOTRClient()
+    client.transport = FakeTransport(outcomes)
+    client.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+    return client
+
+
+CHARACTERS = [{'_id': 'c1', 'name': 'Frodo'}, {'_id': 'c2', 'name': 'Sam'}]
+
+
+def test_unmodified_page_is_reused_from_the_previous_snapshot():
+    client = _client([
+        (200, {'docs': CHARACTERS, 'pages': 1}, {'ETag': '"v1"'}),
+        (304, None, {}),
+    ])
+    items, metas, changed = client._fetch_endpoint('character', 'characters', parallel=False)
+    assert items == CHARACTERS
+    assert metas[0]['etag'] == '"v1"'
+
+    items, _, changed = client._fetch_endpoint('character', 'characters', parallel=False,
+                                               previous=(items, metas))
+
+    assert items == CHARACTERS
+    assert changed == []
+    assert client.transport.requests[1]['headers']['If-None-Match'] == '"v1"'
+
+
+def test_page_with_the_same_body_counts_as_unchanged():
+    page = (200, {'docs': CHARACTERS, 'pages': 1}, {})
+    client = _client([page, page])
+    items, metas, _ = client._fetch_endpoint('character', 'characters', parallel=False)
+
+    _, new_metas, changed = client._fetch_endpoint('character', 'characters', parallel=False,
+                                                   previous=(items, metas))
+
+    assert changed == []
+    assert new_metas == metas
+
+
+def test_changed_and_removed_pages_are_reported(monkeypatch):
+    monkeypatch.setattr(lotr_client.time, 'sleep', lambda seconds: None)
+    first = [
+        (200, {'docs': CHARACTERS[:1], 'pages': 2}, {}),
+        (200, {'docs': CHARACTERS[1:], 'pages': 2}, {}),
+    ]
+    renamed = [{'_id': 'c1', 'name': 'Frodo Baggins'}]
+    client = _client(first + [(200, {'docs': renamed, 'pages': 1}, {})])
+    items, metas, _ = client._fetch_endpoint('character', 'characters', parallel=False)
+
+    items, _, changed = client._fetch_endpoint('character', 'characters', parallel=False,
+                                               previous=(items, metas))
+
+    assert items == renamed
+    assert changed == [(CHARACTERS[:1], renamed), (CHARACTERS[1:], [])]
+
+
+def _dataset(client, characters=CHARACTERS):
+    quotes = [{'_id': 'q1', 'character': 'c1', 'movie': 'm1', 'dialog': 'I will take it.'}]
+    movies = [{'_id': 'm1', 'name': 'The Fellowship of the Ring'}]
+    return client._build_dataset([(characters, [], []), (quotes, [], []), (movies, [], [])])
+
+
+def test_reconfigured_sampling_re_enriches_every_character(monkeypatch):
+    client = _client([])
+    monkeypatch.setattr(Config, 'QUOTE_SAMPLE_MODE', 'all')
+    data = _dataset(client)
+    monkeypatch.setattr(Config, 'QUOTE_SAMPLE_MODE', 'first')
+    monkeypatch.setattr(Config, 'QUOTE_SAMPLE_SIZE', 1)
+    previous = {'sampleIndex': data['sampleIndex']}
+    unchanged = [(data['characters'], [], []), (data['quotes'], [], []), (data['movies'], [], [])]
+
+    rebuilt = client._build_dataset(unchanged, previous)
+
+    assert rebuilt['sampleIndex']['mode'] == 'first'
+    assert rebuilt['characters'][0] is not data['characters'][0]
+
+    again = client._build_dataset(
+        [(rebuilt['characters'], [], []), (data['quotes'], [], []), (data['movies'], [], [])],
+        {'sampleIndex': rebuilt['sampleIndex']}
+    )
+    assert again['characters'][0] is rebuilt['characters'][0]
+
+def test_saved_dataset_is_shared_without_reparsing(monkeypatch):
+    client = _client([])
+    data = _dataset(client)
+    client._save_to_cache(data)
+
+    assert LOTRClient()._load_from_cache() is data
+
+    monkeypatch.setattr(lotr_client, '_dataset_memo', {})
+    parses = []
+    read_snapshot = lotr_client.cache_store.read_snapshot
+    monkeypatch.setattr(lotr_client.cache_store, 'read_snapshot',
+                        lambda *args: parses.append(1) or read_snapshot(*args))
+
+    loaded = LOTRClient()._load_from_cache()
+    assert LOTRClient()._load_from_cache() is loaded
+    assert len(parses) == 1
+    assert loaded['characters'][0]['sampleQuotes'] == data['characters'][0]['sampleQuotes']
+
+
+def test_a_snapshot_saved_by_another_worker_replaces_the_shared_dataset():
+    client = _client([])
+    client._save_to_cache(_dataset(client))
+    first = LOTRClient()._load_from_cache()
+
+    # Written straight to disk, as another process would
+    other = dict(_dataset(client, CHARACTERS[:1]), cached_at='2026-01-01T00:00:00')
+    lotr_client.cache_store.write_snapshot(client.cache_dir, other, compress=Config.CACHE_COMPRESS)
+
+    second = LOTRClient()._load_from_cache()
+    assert second is not first
+    assert second['stats']['characterCount'] == 1
+
+
+def _stale_cache(monkeypatch, hours):
+    client = _client([])
+    data = _dataset(client)
+    client._save_to_cache(data)
+    monkeypatch.setattr(LOTRClient, '_cache_age', lambda self: timedelta(hours=hours))
+    return data
+
+
+def test_stale_cache_is_served_while_it_refreshes_in_the_background(monkeypatch):
+    cached = _stale_cache(monkeypatch, Config.CACHE_MAX_AGE_HOURS + 1)
+    refreshed = threading.Event()
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh',
+                        lambda self, incremental=None: refreshed.set() or {'from': 'api'})
+
+    assert LOTRClient().fetch_all_data() is cached
+    assert refreshed.wait(5)
+    lotr_client._background_refresh.join(5)
+
+
+def test_cache_past_the_stale_limit_is_refreshed_before_answering(monkeypatch):
+    _stale_cache(monkeypatch, Config.CACHE_MAX_STALE_HOURS + 1)
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', lambda self, incremental=None: {'from': 'api'})
+
+    assert LOTRClient().fetch_all_data() == {'from': 'api'}
+
+
+def test_only_one_background_refresh_runs_at_a_time(monkeypatch):
+    _stale_cache(monkeypatch, Config.CACHE_MAX_AGE_HOURS + 1)
+    release = threading.Event()
+    fetches = []
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh',
+                        lambda self, incremental=None: fetches.append(1) or release.wait(5) or {})
+
+    client = LOTRClient()
+    client.fetch_all_data()
+    assert not client._start_background_refresh()
+
+    release.set()
+    lotr_client._background_refresh.join(5)
+    assert fetches == [1]
+
+
+def test_concurrent_refreshes_share_one_fetch(monkeypatch):
+    fetches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fetch(self, incremental=None):
+        fetches.append(1)
+        started.set()
+        release.wait(5)
+        return {'from': 'api'}
+
+    joined = []
+    join_refresh = lotr_client._join_refresh
+
+    def counting_join(path):
+        flight, leads = join_refresh(path)
+        joined.append(leads)
+        return flight, leads
+
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', fetch)
+    monkeypatch.setattr(lotr_client, '_join_refresh', counting_join)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(LOTRClient()._refresh()))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(LOTRClient()._refresh())) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    while len(joined) < 5:
+        time.sleep(0.01)
+
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert fetches == [1]
+    assert joined == [True, False, False, False, False]
+    assert len(results) == 5 and all(result is results[0] for result in results)
+    assert not lotr_client._inflight
+
+
+def test_failed_refresh_is_shared_and_the_next_one_starts_afresh(monkeypatch):
+    def failing_fetch(self, incremental=None):
+        raise Exception('🔥 The journey has encountered darkness')
+
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', failing_fetch)
+    with pytest.raises(Exception, match='darkness'):
+        LOTRClient()._refresh()
+
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', lambda self, incremental=None: {'from': 'api'})
+    assert LOTRClient()._refresh() == {'from': 'api'}
+
+
+def test_refresh_uses_a_snapshot_another_worker_saved_while_it_waited(monkeypatch):
+    client = _client([])
+    monkeypatch.setattr(LOTRClient, '_fetch_fresh', lambda self, incremental=None: pytest.fail('fetched'))
+
+    # The other worker saves while this one waits for the cache lock
+    real_lock = lotr_client._cache_file_lock
+
+    @contextmanager
+    def lock_after_another_save(path):
+        with real_lock(path):
+            client._save_to_cache(_dataset(client))
+            yield
+
+    monkeypatch.setattr(lotr_client, '_cache_file_lock', lock_after_another_save)
+
+    assert LOTRClient()._refresh()['stats']['characterCount'] == 2
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Backoff delays slept, on a fake clock that sleeping advances"""
+    delays = []
+    now = [1000.0]
+
+    def sleep(seconds):
+        delays.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(lotr_client.time, 'sleep', sleep)
+    monkeypatch.setattr(lotr_client, '_wait_for_retry', lambda seconds, cancel=None: sleep(seconds))
+    monkeypatch.setattr(lotr_client.time, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(Config, 'LOTR_MAX_RETRIES', 3)
+    return delays
+
+
+def test_rate_limited_page_is_retried_after_slowing_down(delays):
+    client = _client([
+        (429, {'message': 'Too many requests'}, {'Retry-After': '4'}),
+        (200, {'docs': CHARACTERS, 'pages': 1}, {}),
+    ])
+    rate = client.rate_limiter.rate
+
+    docs, pages, _ = client._fetch_page('character', 1)
+
+    assert docs == CHARACTERS and pages == 1
+    assert delays[0] >= 4
+    assert client.rate_limiter.rate < rate
+
+
+def test_transient_failures_are_retried(delays):
+    client = _client([
+        requests.exceptions.ConnectionError(),
+        (502, {}, {}),
+        (200, {'docs': CHARACTERS, 'pages': 1}, {}),
+    ])
+
+    assert client._fetch_page('character', 1)[0] == CHARACTERS
+    assert len(delays) == 2
+
+
+def test_client_errors_and_the_last_retry_are_raised(delays):
+    with pytest.raises(requests.exceptions.HTTPError):
+        _client([(401, {}, {})])._fetch_page('character', 1)
+    assert delays == []
+
+    client = _client([(503, {}, {})] * 4)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._fetch_page('character', 1)
+    assert len(client.transport.requests) == 4
+
+
+class PagedTransport(FakeTransport):
+    """Serves every page of some endpoints, whatever order they are asked for in"""
+
+    def __init__(self, endpoints, per_page=2, failing=()):
+        super().__init__([])
+        self.endpoints = endpoints
+        self.per_page = per_page
+        self.failing = failing
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, stream=False):
+        endpoint = url.rsplit('/', 1)[1]
+        if endpoint in self.failing:
+            with self.lock:
+                self.outcomes.append((500, {}, {}))
+                return super().get(url, headers, params, stream)
+        items = self.endpoints[endpoint]
+        pages = max(1, -(-len(items) // self.per_page))
+        start = (params['page'] - 1) * self.per_page
+        with self.lock:
+            self.outcomes.append((200, {'docs': items[start:start + self.per_page], 'pages': pages}, {}))
+            return super().get(url, headers, params, stream)
+
+
+def test_pages_fetched_in_parallel_come_back_in_order(monkeypatch):
+    monkeypatch.setattr(Config, 'LOTR_FETCH_WORKERS', 4)
+    quotes = [{'_id': f"q{n}", 'dialog': f"line {n}"} for n in range(15)]
+    client = _client([])
+    client.transport = PagedTransport({'quote': quotes})
+
+    items, metas, _ = client._fetch_endpoint('quote', 'quotes', parallel=True)
+
+    assert items == quotes
+    assert [meta['page'] for meta in metas] == list(range(1, 9))
+    assert sorted(request['params']['page'] for request in client.transport.requests) == list(range(1, 9))
+
+
+def test_endpoints_are_fetched_together_and_returned_in_order():
+    endpoints = {
+        'character': CHARACTERS,
+        'quote': [{'_id': f"q{n}", 'character': 'c1'} for n in range(5)],
+        'movie': [{'_id': 'm1', 'name': 'The Return of the King'}],
+    }
+    client = _client([])
+    client.transport = PagedTransport(endpoints)
+
+    results = client._fetch_endpoints([('movie', 'movies'), ('character', 'characters'), ('quote', 'quotes')])
+
+    assert [items for items, _, _ in results] == [endpoints['movie'], endpoints['character'], endpoints['quote']]
+
+
+def test_a_failing_endpoint_fails_the_whole_fetch(delays):
+    client = _client([])
+    client.transport = PagedTransport({'character': CHARACTERS, 'movie': []}, failing={'quote'})
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._fetch_endpoints([('character', 'characters'), ('quote', 'quotes'), ('movie', 'movies')])
+
+
+def test_a_failing_endpoint_does_not_wait_for_the_others_to_retry(monkeypatch):
+    monkeypatch.setattr(Config, 'LOTR_MAX_RETRIES', 3)
+    retrying = threading.Event()
+
+    class Transport(FakeTransport):
+        def get(self, url, headers=None, params=None, stream=False):
+            if url.endswith('/character'):
+                retrying.set()
+                self.outcomes.append((503, {}, {'Retry-After': '30'}))
+            else:
+                retrying.wait(5)
+                self.outcomes.append((401, {}, {}))
+            return super().get(url, headers, params, stream)
+
+    client = _client([])
+    client.transport = Transport([])
+
+    started = time.monotonic()
+    with pytest.raises(requests.exceptions.HTTPError):
+        client._fetch_endpoints([('character', 'characters'), ('quote', 'quotes')])
+
+    assert time.monotonic() - started < 5
+    assert [r['url'].rsplit('/', 1)[1] for r in client.transport.requests].count('character') == 1
+
+def test_store_behind_a_fresh_cache_is_filled_from_the_snapshot_files(tmp_path, monkeypatch):
+    from lotr_store import LOTRStore
+
+    client = LOTRClient()
+    data = client._build_dataset([(list(CHARACTERS), [], []), ([], [], []), ([], [], [])])
+    client._save_to_cache(data)
+    client.store = LOTRStore(tmp_path / 'store.db')
+    monkeypatch.setattr(client, 'fetch_all_data', lambda: pytest.fail('dataset should not be loaded'))
+
+    store = client.get_store()
+
+    assert store.get_snapshot_id() == data['snapshotId']
+    assert [c['name'] for c in store.find_characters(sort='name')[1]] == ['Frodo', 'Sam']
@@ -0,0 +1,94 @@
+"""
+Tests for the optional SQLite store
+"""
+
+import pytest
+
+import lotr_store
+from character_index import CharacterIndex
+from lotr_store import LOTRStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LOTRStore(tmp_path / 'lotr.db')
+    store.replace_all({
+        'characters': [
+            {'_id': 'c1', 'name': 'Frodo', 'quoteCount': 2, 'sampleQuotes': [{'dialog': 'a'}]},
+            {'_id': 'c2', 'name': 'Sam', 'quoteCount': 1},
+            {'_id': 'c3', 'name': 'Tom Bombadil', 'quoteCount': 0},
+        ],
+        'quotes': [
+            {'_id': 'q1', 'character': 'c1', 'movie': 'm1', 'dialog': 'first'},
+            {'_id': 'q2', 'character': 'c2', 'movie': 'm2', 'dialog': 'po-tay-toes'},
+            {'_id': 'q3', 'character': 'c1', 'movie': 'm9', 'dialog': 'second'},
+        ],
+        'movies': [{'_id': 'm1', 'name': 'The Two Towers'}, {'_id': 'm2', 'name': 'The Return of the King'}],
+    }, 'gen-1')
+    return store
+
+
+def test_quotes_for_several_characters_keep_api_order(store):
+    quotes = store.get_quotes_for_characters(['c1', 'c2', 'c3', 'missing'])
+
+    assert quotes == {
+        'c1': [{'dialog': 'first', 'movie': 'The Two Towers'}, {'dialog': 'second', 'movie': 'Unknown'}],
+        'c2': [{'dialog': 'po-tay-toes', 'movie': 'The Return of the King'}],
+        'c3': [],
+    }
+
+
+def test_quotes_are_fetched_in_chunks(store, monkeypatch):
+    monkeypatch.setattr(lotr_store, 'MAX_QUERY_PARAMS', 1)
+    quotes = store.get_quotes_for_characters(['c2', 'c1', 'c2'])
+
+    assert list(quotes) == ['c2', 'c1']
+    assert len(quotes['c1']) == 2
+
+
+def test_stored_characters_leave_out_derived_fields(store):
+    assert store.get_character('c1') == {'_id': 'c1', 'name': 'Frodo', 'quoteCount': 2}
+    assert store.get_snapshot_id() == 'gen-1'
+    assert sorted(store.get_quote_ids()) == ['c1_0', 'c1_1', 'c2_0']
+
+
+PEOPLE = [
+    {'_id': 'c1', 'name': 'Frodo Baggins', 'race': 'Hobbit', 'realm': 'NaN', 'quoteCount': 10},
+    {'_id': 'c2', 'name': 'Samwise Gamgee', 'race': 'Hobbit', 'realm': '', 'quoteCount': 10},
+    {'_id': 'c3', 'name': 'Aragorn II Elessar', 'race': 'Human', 'realm': 'Gondor', 'quoteCount': 50},
+    {'_id': 'c4', 'name': 'Boromir', 'race': 'Human', 'realm': 'gondor', 'quoteCount': 0},
+    {'_id': 'c5', 'name': 'Legolas', 'race': 'Elf', 'realm': 'Mirkwood', 'quoteCount': 3},
+    {'_id': 'c6', 'name': 'Percent 100%_', 'race': 'NaN', 'quoteCount': 1},
+]
+
+
+@pytest.mark.parametrize('query', [
+    {},
+    {'race': 'hobbit'},
+    {'realm': 'GONDOR'},
+    {'race': 'Human', 'search': 'bor'},
+    {'search': 'MIRK'},
+    {'search': 'nan'},
+    {'search': '%'},
+    {'search': '_'},
+    {'race': 'NaN'},
+    {'sort': 'name'},
+    {'sort': 'quoteCount', 'descending': False},
+    {'sort': 'name', 'offset': 1, 'limit': 2},
+])
+def test_find_characters_matches_the_in_memory_index(tmp_path, query):
+    store = LOTRStore(tmp_path / 'lotr.db')
+    store.replace_all({'characters': PEOPLE, 'quotes': [], 'movies': []}, 'gen-1')
+
+    assert store.find_characters(**query) == CharacterIndex(PEOPLE).query(**query)
+
+
+def test_find_characters_uses_the_indexes(store):
+    with store._connect() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT doc FROM characters WHERE race = ? COLLATE NOCASE", ('Hobbit',)
+        ).fetchall()
+    assert any('idx_characters_race' in row['detail'] for row in plan)
+
+    with pytest.raises(ValueError):
+        store.find_characters(sort='birth')
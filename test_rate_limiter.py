@@ -0,0 +1,97 @@
+"""
+Tests for The One API rate limiter
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from rate_limiter import TokenBucket, backoff_delay, parse_retry_after
+
+
+def test_bucket_hands_out_its_burst_then_makes_callers_wait():
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    wait = bucket.try_acquire()
+    assert 0 < wait <= 1
+
+
+def test_bucket_acquire_gives_up_at_timeout():
+    bucket = TokenBucket(rate=0.01, capacity=1)
+    assert bucket.acquire(timeout=0.1)
+    assert not bucket.acquire(timeout=0.1)
+
+
+def test_bucket_refills_at_its_rate(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('rate_limiter.time.monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.try_acquire()
+    bucket.try_acquire()
+
+    now[0] += 0.5
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_throttle_halves_the_rate_and_honors_retry_after(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('rate_limiter.time.monotonic', lambda: now[0])
+    bucket = TokenBucket(rate=4, capacity=4)
+
+    bucket.throttle(retry_after=2)
+    assert bucket.rate == 2
+    assert bucket.try_acquire() == pytest.approx(2)
+
+    now[0] += 2.5
+    assert bucket.try_acquire() == 0.0
+
+
+def test_rate_recovers_in_steps_and_never_drops_below_min_rate():
+    bucket = TokenBucket(rate=10, capacity=1, min_rate=2)
+    for _ in range(5):
+        bucket.throttle()
+    assert bucket.rate == 2
+
+    bucket.recover()
+    assert bucket.rate == pytest.approx(3)
+    for _ in range(20):
+        bucket.recover()
+    assert bucket.rate == 10
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('7', 7.0),
+    ('1.5', 1.5),
+    ('-3', 0.0),
+    (None, None),
+    ('', None),
+    ('soon', None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == pytest.approx(30, abs=2)
+
+    past = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
+
+
+def test_backoff_grows_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr('rate_limiter.random.uniform', lambda low, high: high)
+    assert [backoff_delay(attempt, base=1, cap=10) for attempt in range(5)] == [1, 2, 4, 8, 10]
+
+
+def test_backoff_is_jittered():
+    delays = {backoff_delay(3, base=1, cap=30) for _ in range(50)}
+    assert len(delays) > 1
+    assert all(0 <= delay <= 8 for delay in delays)
+
+
+def test_backoff_waits_at_least_retry_after():
+    assert all(backoff_delay(0, retry_after=5, base=1, cap=2) >= 5 for _ in range(50))
@@ -0,0 +1,73 @@
+"""
+Tests for the dataset snapshot registry
+"""
+
+import logging
+
+import pytest
+
+from config import Config
+from lotr_client import LOTRClient
+from snapshots import SnapshotRegistry
+
+
+@pytest.fixture(autouse=True)
+def cache_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(Config, 'JOB_STATE_DIR', str(tmp_path / 'jobs'))
+    monkeypatch.setattr(Config, 'LOG_DIR', str(tmp_path / 'logs'))
+    monkeypatch.setattr(Config, 'CACHE_STORE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(Config, 'CACHE_FILE', str(tmp_path / 'lotr_raw.json'))
+    monkeypatch.setattr(Config, 'CACHE_LOCK_FILE', str(tmp_path / 'cache.lock'))
+    monkeypatch.setattr(Config, 'SQLITE_STORE_ENABLED', False)
+
+
+def test_least_recently_used_snapshots_are_dropped():
+    registry = SnapshotRegistry(max_snapshots=2)
+    first = registry.register({'snapshotId': 'gen-1', 'characters': []})
+    registry.register({'snapshotId': 'gen-2', 'characters': []})
+
+    registry.get(first)
+    registry.register({'snapshotId': 'gen-3', 'characters': []})
+
+    assert registry.get('gen-1') is not None
+    assert registry.get('gen-2') is None
+    assert registry.get('gen-3') is not None
+
+
+def test_uncached_datasets_get_a_one_off_id():
+    registry = SnapshotRegistry()
+    data = {'characters': []}
+
+    snapshot_id = registry.register(data)
+
+    assert snapshot_id.startswith('mem-')
+    assert registry.register(data) != snapshot_id
+    assert registry.get(snapshot_id) is data
+
+
+def test_the_current_snapshot_is_found_for_another_workers_id():
+    client = LOTRClient()
+    data = client._build_dataset([([{'_id': 'c1', 'name': 'Frodo'}], [], []), ([], [], []), ([], [], [])])
+    client._save_to_cache(data)
+    registry = SnapshotRegistry()
+
+    assert registry.get(data['snapshotId'])['characters'][0]['name'] == 'Frodo'
+    assert registry.get('an-older-generation') is None
+
+
+def test_unknown_ids_are_rejected_without_loading_the_cache(monkeypatch, caplog):
+    def no_load(self):
+        pytest.fail('dataset should not be loaded')
+
+    monkeypatch.setattr(LOTRClient, '_load_from_cache', no_load)
+    registry = SnapshotRegistry()
+
+    with caplog.at_level(logging.ERROR):
+        assert registry.get('gen-unknown') is None
+
+        client = LOTRClient()
+        client._save_to_cache(client._build_dataset([([], [], []), ([], [], []), ([], [], [])]))
+        assert registry.get('gen-unknown') is None
+
+    assert not caplog.records
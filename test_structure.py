@@ -14,12 +14,30 @@ def test_file_structure():
     
     required_files = [
         'app.py',
+        'async_lotr_client.py',
         'auth.py',
+        'batching.py',
+        'cache_store.py',
+        'character_index.py',
         'config.py',
+        'dead_letters.py',
         'deletion.py',
+        'encoded_responses.py',
+        'enrichment.py',
+        'error_journal.py',
+        'file_lock.py',
+        'gunicorn.conf.py',
+        'ingest_ledger.py',
         'ingestion.py',
+        'jobs.py',
+        'json_stream.py',
         'lotr_client.py',
+        'lotr_store.py',
+        'rate_limiter.py',
+        'snapshots.py',
+        'transport.py',
         'setup.py',
+        'wsgi.py',
         'requirements.txt',
         'README.md',
         '.gitignore',
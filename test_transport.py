@@ -0,0 +1,56 @@
+"""
+Tests for the pooled HTTP transport's connection counters
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from transport import HTTPTransport
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_keep_alive_connections_are_reused(server_url):
+    transport = HTTPTransport(default_timeout=5, host_timeouts={})
+    for _ in range(3):
+        assert transport.get(server_url).text == 'ok'
+
+    stats = transport.stats()['127.0.0.1']
+    assert stats == {'requests': 3, 'newConnections': 1, 'reusedConnections': 2}
+    transport.close()
+
+
+def test_each_transport_counts_only_its_own_requests(server_url):
+    first = HTTPTransport(default_timeout=5, host_timeouts={})
+    second = HTTPTransport(default_timeout=5, host_timeouts={})
+    first.get(server_url)
+    first.get(server_url)
+    second.get(server_url)
+
+    assert first.stats()['127.0.0.1']['requests'] == 2
+    assert second.stats()['127.0.0.1'] == {'requests': 1, 'newConnections': 1, 'reusedConnections': 0}
+    first.close()
+    second.close()
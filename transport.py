@@ -0,0 +1,173 @@
+"""
+HTTP Transport
+Shared keep-alive connection pools for The One API, Salesforce and Data Cloud.
+Reusing connections avoids a new TCP + TLS handshake for every request.
+"""
+
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _ConnectionCounter:
+    """Thread-safe per-host counters of requests sent and sockets opened"""
+
+    def __init__(self):
+        self.requests = {}
+        self.connections = {}
+        self._lock = threading.Lock()
+
+    def add(self, counts, host):
+        with self._lock:
+            counts[host] = counts.get(host, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            hosts = set(self.requests) | set(self.connections)
+            return {
+                host: {
+                    'requests': self.requests.get(host, 0),
+                    'newConnections': self.connections.get(host, 0),
+                    'reusedConnections': max(self.requests.get(host, 0) - self.connections.get(host, 0), 0)
+                }
+                for host in hosts
+            }
+
+
+def _counting_pool_classes(counter):
+    """Connection pool classes whose connections report new sockets to counter"""
+
+    class CountingHTTPConnection(HTTPConnection):
+        def connect(self):
+            counter.add(counter.connections, self.host)
+            return super().connect()
+
+    class CountingHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            counter.add(counter.connections, self.host)
+            return super().connect()
+
+    class CountingHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = CountingHTTPConnection
+
+    class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = CountingHTTPSConnection
+
+    return {'http': CountingHTTPConnectionPool, 'https': CountingHTTPSConnectionPool}
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts its own requests and newly opened connections per host"""
+
+    def __init__(self, *args, **kwargs):
+        # Set before HTTPAdapter.__init__, which builds the pool manager
+        self.counter = _ConnectionCounter()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _counting_pool_classes(self.counter)
+
+    def send(self, request, **kwargs):
+        self.counter.add(self.counter.requests, urlsplit(request.url).hostname)
+        return super().send(request, **kwargs)
+
+    def stats(self):
+        """
+        Get this adapter's connection counters per host.
+
+        Returns:
+            Dict of host -> {'requests', 'newConnections', 'reusedConnections'}
+        """
+        return self.counter.stats()
+
+
+class HTTPTransport:
+    """Pooled HTTP transport with per-host timeouts"""
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, default_timeout=None, host_timeouts=None):
+        """
+        Args:
+            pool_connections: Number of per-host pools to keep
+            pool_maxsize: Keep-alive connections kept per host
+            default_timeout: Timeout (seconds) for hosts without an override
+            host_timeouts: Dict of hostname -> timeout (seconds)
+        """
+        self.default_timeout = default_timeout or Config.HTTP_TIMEOUT_SECONDS
+        self.host_timeouts = host_timeouts if host_timeouts is not None else Config.get_http_host_timeouts()
+
+        self.adapter = CountingHTTPAdapter(
+            pool_connections=pool_connections or Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        )
+
+        self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        # Stay stateless like bare requests calls: never send cookies back
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def timeout_for(self, url):
+        """Get the timeout for a URL's host"""
+        return self.host_timeouts.get(urlsplit(url).hostname, self.default_timeout)
+
+    def request(self, method, url, **kwargs):
+        """Send a request over the shared pools (uses the host timeout unless one is given)"""
+        kwargs.setdefault('timeout', self.timeout_for(url))
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def stats(self):
+        """Get connection reuse counters per host"""
+        return self.adapter.stats()
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+# Singleton instance
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Get the singleton HTTP transport"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
+
+
+def reset_transport():
+    """Close and drop the singleton transport (e.g. after forking a worker)"""
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = None
@@ -0,0 +1,44 @@
+"""
+WSGI Entry Point
+Production serving with gunicorn (see gunicorn.conf.py):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With SERVER_PRELOAD (the default) the app is imported once in the gunicorn
+master and warm_up() runs there before workers are forked, so every worker
+starts with the parsed snapshot, its /fetch bodies and character index and a
+Data Cloud token, shared copy-on-write instead of rebuilt per worker.
+"""
+
+import logging
+# gunicorn serves wsgi:app, so app is re-exported here
+from app import app, get_fetch_body  # noqa: F401
+from auth import get_auth
+from character_index import get_character_index
+from encoded_responses import available_encodings
+from lotr_client import LOTRClient
+from transport import reset_transport
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Load the shared state workers would otherwise each build on first use"""
+    data = LOTRClient()._load_from_cache()
+    if data is None:
+        logger.info("📭 No cached snapshot to preload; the first /fetch will fetch it")
+    else:
+        body = get_fetch_body(data)
+        for encoding in available_encodings():
+            body.body(encoding)
+        get_character_index(data)
+        logger.info(f"📦 Preloaded snapshot {body.version} ({len(data['characters'])} characters)")
+    
+    try:
+        get_auth().get_token()
+        logger.info("🔑 Data Cloud token ready")
+    except Exception as e:
+        logger.warning(f"Could not warm the Data Cloud token, workers will fetch it: {e}")
+    
+    # Workers must not share the master's sockets; each opens its own pools
+    reset_transport()